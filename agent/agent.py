@@ -1,26 +1,49 @@
 # agent/agent.py
+import asyncio
 from datetime import datetime
 from pathlib import Path
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Query as Param, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from algosdk.encoding import is_valid_address
 
 # IMPORTANT: import the MODULE (tests can monkeypatch this)
 from blockchain import nft_access
+from blockchain.membership import SNAPSHOT_ENABLED
+from eventlog import tail, wire
+from eventlog.schema import parse_ts
+from eventlog.sink import close_all, get_sink
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if SNAPSHOT_ENABLED:
+        # governance rounds: answer propose_vote membership from the holder set
+        nft_access.start_holder_snapshot()
+    yield
+    nft_access.stop_holder_snapshot()
+    await nft_access.aclose_clients()  # pooled node connections of this loop
+    # write out anything still buffered before the worker exits
+    close_all()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # ---- logging to newline-delimited JSON (.jsonl) ----
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True, parents=True)
 EVENTS_FILE = LOG_DIR / "events.jsonl"  # dashboard reads this
+SSE_POLL_SEC = 0.5
 
-def log_event(*, domain: str, action: str, blocked: bool,
-              reason: Optional[str], params: Dict[str, Any] | None):
-    evt = {
+def _event(*, domain: str, action: str, blocked: bool,
+           reason: Optional[str], params: Dict[str, Any] | None) -> Dict[str, Any]:
+    return {
         "ts": datetime.utcnow().isoformat() + "Z",
         "domain": domain,
         "action": action,
@@ -28,8 +51,22 @@ def log_event(*, domain: str, action: str, blocked: bool,
         "reason": reason,
         "params": params or {},
     }
-    with EVENTS_FILE.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(evt) + "\n")
+
+
+def log_event(*, domain: str, action: str, blocked: bool,
+              reason: Optional[str], params: Dict[str, Any] | None):
+    log_events([_event(domain=domain, action=action, blocked=blocked,
+                       reason=reason, params=params)])
+
+
+def log_events(events: List[Dict[str, Any]]):
+    """Queue several events on the shared sink; they are written together."""
+    get_sink(EVENTS_FILE).emit_many(events)
+
+
+async def alog_events(events: List[Dict[str, Any]]):
+    """log_events for async handlers; never blocks the event loop."""
+    await get_sink(EVENTS_FILE).aemit_many(events)
 
 
 # ---- request model ----
@@ -40,90 +77,275 @@ class Query(BaseModel):
     params: Optional[Dict[str, Any]] = None
 
 
-@app.post("/query")
-def query(q: Query):
+# helper to sanitize pasted addresses
+def _clean_addr(s: str | None) -> str | None:
+    if not s:
+        return None
+    # remove spaces/newlines/zero-width junk from copy-paste
+    s = "".join(s.split())
+    return s
+
+
+async def _evaluate(q: Query, holds: Callable[[str, int], Awaitable[bool]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
-    Guardrail policy:
-      1) Block all finance 'give_advice'.
-      2) For web3 'propose_vote', require the provided wallet_address holds the configured NFT ASA.
-         - ASA id comes from env ALGO_NFT_ASA_ID (see nft_access.env_asa_id()).
-         - Any wallet that holds the ASA is allowed.
+    Apply the guardrail policy to one query.
+    Returns (response, event); the caller logs the event.
     """
     domain = (q.domain or "").lower()
     action = (q.action or "").lower()
     params = q.params or {}
 
+    def blocked(reason: str):
+        return ({"ok": True, "blocked": True, "reason": reason},
+                _event(domain=domain, action=action, blocked=True, reason=reason, params=params))
+
     # 1) Block financial advice
     if domain == "finance" and action == "give_advice":
-        log_event(domain=domain, action=action, blocked=True,
-                  reason="Financial advice is blocked", params=params)
-        return {"ok": True, "blocked": True, "reason": "Financial advice is blocked"}
+        return blocked("Financial advice is blocked")
 
     # 2) NFT membership check for web3 propose_vote
     if domain == "web3" and action == "propose_vote":
-        # helper to sanitize pasted addresses
-        def _clean_addr(s: str | None) -> str | None:
-            if not s:
-                return None
-            # remove spaces/newlines/zero-width junk from copy-paste
-            s = "".join(s.split())
-            return s
-
         user_address = _clean_addr(params.get("wallet_address") or params.get("address"))
         if not user_address:
-            log_event(domain=domain, action=action, blocked=True,
-                      reason="wallet_address required", params=params)
-            return {"ok": True, "blocked": True, "reason": "wallet_address required"}
+            return blocked("wallet_address required")
 
         # validate bech32
         if not is_valid_address(user_address):
-            log_event(domain=domain, action=action, blocked=True,
-                      reason="invalid wallet address", params=params)
-            return {"ok": True, "blocked": True, "reason": "invalid wallet address"}
+            return blocked("invalid wallet address")
 
         # resolve ASA id (env or default)
         asa_id = nft_access.env_asa_id() or nft_access.DEFAULT_ASA_ID
 
         # check membership
         try:
-            has_nft = nft_access.holds_asa(user_address, asa_id)
+            has_nft = await holds(user_address, asa_id)
         except Exception:
             # any RPC/IDX error → fail safe (block) and log
-            log_event(domain=domain, action=action, blocked=True,
-                      reason="membership check failed", params=params)
-            return {"ok": True, "blocked": True, "reason": "membership check failed"}
+            return blocked("membership check failed")
 
         if not has_nft:
-            log_event(domain=domain, action=action, blocked=True,
-                      reason="NFT membership required", params=params)
-            return {"ok": True, "blocked": True, "reason": "NFT membership required"}
+            return blocked("NFT membership required")
 
         # Allowed
         result = {"action": q.action, "params": params}
-        log_event(domain=domain, action=action, blocked=False,
-                  reason="Allowed by NFT membership", params=params)
-        return {"ok": True, "blocked": False, "result": result}
+        return ({"ok": True, "blocked": False, "result": result},
+                _event(domain=domain, action=action, blocked=False,
+                       reason="Allowed by NFT membership", params=params))
 
     # default pass-through
     result = {"action": q.action, "params": params}
-    log_event(domain=domain, action=action, blocked=False,
-              reason=None, params=params)
-    return {"ok": True, "blocked": False, "result": result}
+    return ({"ok": True, "blocked": False, "result": result},
+            _event(domain=domain, action=action, blocked=False, reason=None, params=params))
+
+
+@app.post("/query")
+async def query(q: Query):
+    """
+    Guardrail policy:
+      1) Block all finance 'give_advice'.
+      2) For web3 'propose_vote', require the provided wallet_address holds the configured NFT ASA.
+         - ASA id comes from env ALGO_NFT_ASA_ID (see nft_access.env_asa_id()).
+         - Any wallet that holds the ASA is allowed.
+    """
+    response, evt = await _evaluate(q, nft_access.aholds_asa)
+    await alog_events([evt])
+    return response
+
+
+@app.post("/query/batch")
+async def query_batch(qs: List[Query]):
+    """
+    Evaluate a list of queries; each result is what /query would return for it.
+    Queries are evaluated concurrently, membership is checked once per
+    (wallet, ASA) in the batch and all events are written in a single flush.
+    """
+    memo: Dict[Tuple[str, int], "asyncio.Future[bool]"] = {}
+
+    def holds(address: str, asa_id: int) -> "asyncio.Future[bool]":
+        key = (address, asa_id)
+        if key not in memo:
+            memo[key] = asyncio.ensure_future(nft_access.aholds_asa(address, asa_id))
+        return memo[key]
+
+    evaluated = await asyncio.gather(*(_evaluate(q, holds) for q in qs))
+    await alog_events([evt for _, evt in evaluated])
+    return {"ok": True, "results": [response for response, _ in evaluated]}
+
+def _negotiated(request: Request, payload: Dict[str, Any]) -> Response:
+    """
+    `payload` in the format and compression the client asked for (Accept:
+    application/msgpack or application/vnd.apache.arrow.stream, Accept-Encoding:
+    br / gzip); JSON otherwise. See eventlog.wire.
+    """
+    body, headers = wire.render(payload, request.headers.get("accept"),
+                                request.headers.get("accept-encoding"))
+    return Response(content=body, headers=headers)
+
 
 @app.get("/api/logs")
-def get_logs():
-    """Return the latest blockchain security events."""
+def get_logs(request: Request,
+             limit: int = Param(50, ge=1, le=5000),
+             before: Optional[int] = Param(None, ge=0),
+             since: Optional[int] = Param(None, ge=0)):
+    """
+    Return the latest blockchain security events (most recent last).
+
+    Pages are addressed by log offsets: `before` returns the `limit` newest
+    events older than that cursor, `since` the `limit` oldest events from it
+    on. `next_before` pages further back, `cursor` continues forward.
+    JSON by default; see _negotiated() for the other formats.
+    """
+    try:
+        if since is not None:
+            entries = tail.read_since(EVENTS_FILE, since, limit, before)
+        else:
+            entries = tail.read_before(EVENTS_FILE, before, limit)
+        cursor = entries[-1][1] if entries else (since if since is not None else tail.end_offset(EVENTS_FILE))
+        return _negotiated(request, {
+            "ok": True,
+            "events": [evt for _, _, evt in entries],
+            "next_before": entries[0][0] if entries else None,
+            "cursor": cursor,
+        })
+    except Exception as e:
+        return _negotiated(request, {"ok": False, "error": str(e)})
+
+def _stream_cursor(offset: Optional[int], seq: Optional[int]) -> int:
+    if offset is not None:
+        return offset
+    if seq is not None:
+        return tail.offset_after_seq(EVENTS_FILE, seq)
+    return tail.end_offset(EVENTS_FILE)
+
+
+def _page(cursor: int, limit: int) -> Dict[str, Any]:
+    entries = tail.read_since(EVENTS_FILE, cursor, limit)
+    events = [evt for _, _, evt in entries]
+    return {
+        "ok": True,
+        "events": events,
+        "cursor": entries[-1][1] if entries else cursor,
+        "seq": events[-1].get("seq") if events else None,
+    }
+
+
+async def _sse(request: Request, cursor: int, limit: int, idle: float):
+    """Push new events as Server-Sent Events; each event's id is its resume cursor."""
+    quiet = 0.0
+    while quiet < idle and not await request.is_disconnected():
+        entries = await asyncio.to_thread(tail.read_since, EVENTS_FILE, cursor, limit)
+        for _, end, evt in entries:
+            yield f"id: {end}\nevent: log\ndata: {json.dumps(evt)}\n\n"
+        if entries:
+            cursor, quiet = entries[-1][1], 0.0
+            continue
+        yield ": ping\n\n"
+        await asyncio.sleep(SSE_POLL_SEC)
+        quiet += SSE_POLL_SEC
+
+
+@app.get("/api/logs/stream")
+def stream_logs(request: Request,
+                offset: Optional[int] = Param(None, ge=0),
+                seq: Optional[int] = Param(None, ge=0),
+                limit: int = Param(500, ge=1, le=5000),
+                idle: float = Param(30.0, gt=0, le=600)):
+    """
+    Events appended after a cursor, plus the cursor to ask with next time.
+
+    The cursor is a log `offset` (as returned here or by /api/logs) or the
+    `seq` of the last event the client has; with neither, the stream starts
+    at the current end. Clients that send `Accept: text/event-stream` get a
+    Server-Sent Events stream instead, which pushes lines as they land and
+    ends after `idle` seconds without news (EventSource reconnects with
+    Last-Event-ID).
+    """
+    if "text/event-stream" in request.headers.get("accept", ""):
+        last_id = request.headers.get("last-event-id")
+        if offset is None and last_id and last_id.isdigit():
+            offset = int(last_id)
+        cursor = _stream_cursor(offset, seq)
+        return StreamingResponse(_sse(request, cursor, limit, idle),
+                                 media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache"})
     try:
-        events = []
-        if EVENTS_FILE.exists():
-            with EVENTS_FILE.open("r", encoding="utf-8") as f:
-                for line in f:
-                    events.append(json.loads(line))
-        # Return last 50 events (most recent last)
-        return {"ok": True, "events": events[-50:]}
+        return _negotiated(request, _page(_stream_cursor(offset, seq), limit))
+    except Exception as e:
+        return _negotiated(request, {"ok": False, "error": str(e)})
+
+
+def _time_bounds(**values: Optional[str]) -> Dict[str, Optional[float]]:
+    """Epoch seconds for query params given as epoch numbers or ISO-8601 times."""
+    out: Dict[str, Optional[float]] = {}
+    for name, value in values.items():
+        out[name] = None
+        if value is not None:
+            out[name] = parse_ts(float(value) if value.replace(".", "", 1).isdigit() else value)
+            if out[name] is None:
+                raise ValueError(f"bad '{name}' time: {value}")
+    return out
+
+
+def _event_store():
+    store = get_sink(EVENTS_FILE).store
+    if store is None:
+        raise RuntimeError("event index is disabled for this log")
+    return store
+
+
+@app.get("/api/events")
+def query_events(request: Request,
+                 domain: Optional[str] = None,
+                 action: Optional[str] = None,
+                 blocked: Optional[bool] = None,
+                 reason: Optional[str] = None,
+                 start: Optional[str] = Param(None, alias="from"),
+                 end: Optional[str] = Param(None, alias="to"),
+                 limit: int = Param(100, ge=1, le=5000)):
+    """
+    Filtered events from the indexed event store (see eventlog.store), the
+    newest `limit` matches, most recent last. `from` / `to` are epoch
+    seconds or ISO-8601 times, both inclusive.
+    """
+    try:
+        bounds = _time_bounds(**{"from": start, "to": end})
+        events = _event_store().query(domain=domain, action=action, blocked=blocked, reason=reason,
+                                      start=bounds["from"], end=bounds["to"], limit=limit)
+        return _negotiated(request, {"ok": True, "events": events})
+    except Exception as e:
+        return _negotiated(request, {"ok": False, "error": str(e)})
+
+
+@app.get("/api/stats")
+def decision_stats(domain: Optional[str] = None,
+                   action: Optional[str] = None,
+                   res: str = Param("minute", pattern="^(minute|hour)$"),
+                   start: Optional[str] = Param(None, alias="from"),
+                   end: Optional[str] = Param(None, alias="to")):
+    """
+    Decision counts from the store's counters, without reading events:
+    all-time total / blocked / allowed (with a breakdown per domain, action,
+    blocked, reason) and a per-minute or per-hour series. Without `from`,
+    the series covers the last hour (res=minute) or day (res=hour).
+    """
+    try:
+        bounds = _time_bounds(**{"from": start, "to": end})
+        if bounds["from"] is None:
+            bounds["from"] = (bounds["to"] or time.time()) - (3600 if res == "minute" else 86400)
+        store = _event_store()
+        return {"ok": True, **store.totals(domain=domain, action=action),
+                "res": res, "series": store.series(res, start=bounds["from"], end=bounds["to"],
+                                                   domain=domain, action=action)}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
+
+@app.get("/api/membership/stats")
+def membership_stats():
+    """Membership cache hit/miss, coalesced lookups and holder snapshot state."""
+    return {"ok": True, **nft_access.membership_stats()}
+
+
 @app.get("/")
 def root():
     """Root health endpoint for Render and Streamlit."""
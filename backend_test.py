@@ -1,7 +1,8 @@
 import os
 from flask import Flask, jsonify
 from flask_cors import CORS
-from algosdk.v2client import algod
+
+from blockchain.clients import get_algod
 
 print("\n⚙️  RUNNING FILE PATH =>", os.path.abspath(__file__), "\n")
 
@@ -11,9 +12,7 @@ CORS(app)
 app.url_map.strict_slashes = False  # allow /api/logs and /api/logs/
 
 # Algorand client setup
-ALGOD_API = "https://testnet-api.algonode.cloud"
-ALGOD_TOKEN = ""
-client = algod.AlgodClient(ALGOD_TOKEN, ALGOD_API)
+client = get_algod()
 
 # === ROUTES ===
 
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from algosdk.error import AlgodHTTPError, IndexerHTTPError
+
+# ---- Config (env) ----
+MAX_CONNECTIONS = int(os.getenv("ALGO_HTTP_MAX_CONNECTIONS", "64"))    # pooled sockets per node
+SHARD_CONNECTIONS = 8                                                   # sockets per httpx pool
+HTTP_TIMEOUT = float(os.getenv("ALGO_HTTP_TIMEOUT", "10"))             # seconds per request
+
+
+class AsyncNodeClient:
+    """
+    The few algod / indexer reads the agent needs, as coroutines over pooled
+    keep-alive connections. Method names, response dicts and errors
+    (AlgodHTTPError with .code / IndexerHTTPError) match algosdk's AlgodClient
+    and IndexerClient, so the membership backends work with either.
+
+    The `max_connections` sockets are split over several small httpx pools:
+    httpcore rescans every connection of a pool on each request, which with
+    one large pool costs more CPU than the requests themselves. A request
+    takes a free slot (a pool with an idle socket) from a queue, so extra
+    requests wait there in O(1) rather than inside httpcore.
+
+    Connection pools belong to an event loop, so each loop the client is
+    used from gets its own (e.g. one per TestClient). They are closed with
+    httpx's aclose() on that loop: when it shuts down (asyncio.run / anyio
+    finalize async generators first, see _close_at_shutdown), or earlier by
+    aclose(), which the agent's lifespan calls.
+    """
+
+    def __init__(self, token: str, url: str, *, indexer: bool = False,
+                 headers: Optional[Dict[str, str]] = None,
+                 max_connections: int = MAX_CONNECTIONS, timeout: float = HTTP_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.indexer = indexer
+        header = "X-Indexer-API-Token" if indexer else "X-Algo-API-Token"
+        # `headers` are sent as well, as algosdk's clients do with theirs
+        self.headers = {**({header: token} if token else {}), **(headers or {})}
+        self.max_connections = max(1, max_connections)
+        self.timeout = timeout
+        # loop -> (pools, slots, the async generator that closes them)
+        self._loops: Dict[asyncio.AbstractEventLoop, Tuple[List[httpx.AsyncClient],
+                                                           "asyncio.LifoQueue[httpx.AsyncClient]", Any]] = {}
+
+    async def _open(self) -> "asyncio.LifoQueue[httpx.AsyncClient]":
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            for old in [l for l in self._loops if l.is_closed()]:
+                del self._loops[old]  # closed without finalizing its generators; nothing left to await on
+            pools, slots = [], asyncio.LifoQueue()
+            left = self.max_connections
+            while left > 0:
+                n = min(SHARD_CONNECTIONS, left)
+                pool = httpx.AsyncClient(base_url=self.url + "/v2", headers=self.headers,
+                                         limits=httpx.Limits(max_connections=n, max_keepalive_connections=n),
+                                         timeout=self.timeout)
+                pools.append(pool)
+                for _ in range(n):
+                    slots.put_nowait(pool)
+                left -= n
+            closer = self._close_at_shutdown(loop, pools)
+            await closer.asend(None)  # started: the loop now finalizes it before closing
+            state = self._loops[loop] = (pools, slots, closer)
+        return state[1]
+
+    async def _close_at_shutdown(self, loop: asyncio.AbstractEventLoop, pools: List[httpx.AsyncClient]):
+        try:
+            yield
+        finally:
+            self._loops.pop(loop, None)
+            for pool in pools:
+                await pool.aclose()
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        slots = await self._open()
+        pool = await slots.get()
+        try:
+            resp = await pool.get(path, params=params)
+        finally:
+            slots.put_nowait(pool)
+        if resp.status_code >= 400:
+            try:
+                msg = resp.json().get("message", resp.text)
+            except ValueError:
+                msg = resp.text
+            if self.indexer:
+                raise IndexerHTTPError(msg)
+            raise AlgodHTTPError(msg, resp.status_code)
+        return json.loads(resp.content)
+
+    async def account_info(self, address: str) -> Dict[str, Any]:
+        return await self._get(f"/accounts/{address}")
+
+    async def account_asset_info(self, address: str, asset_id: int) -> Dict[str, Any]:
+        return await self._get(f"/accounts/{address}/assets/{asset_id}")
+
+    async def lookup_account_assets(self, address: str, asset_id: Optional[int] = None) -> Dict[str, Any]:
+        params = {"asset-id": asset_id} if asset_id is not None else None
+        return await self._get(f"/accounts/{address}/assets", params)
+
+    async def aclose(self):
+        """Close the pools of the running loop now (other loops close theirs when they shut down)."""
+        state = self._loops.get(asyncio.get_running_loop())
+        if state is not None:
+            await state[2].aclose()
@@ -0,0 +1,541 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from algosdk import account, transaction
+from algosdk.error import AlgodHTTPError
+
+from eventlog import segments
+from eventlog.sink import get_sink
+
+# ---- Config (env) ----
+ANCHOR_BATCH_SIZE = int(os.getenv("ALGO_ANCHOR_BATCH", "256"))        # events per Merkle batch
+ANCHOR_INTERVAL = float(os.getenv("ALGO_ANCHOR_INTERVAL_SEC", "30"))   # max seconds an event waits
+ANCHOR_POLL = float(os.getenv("ALGO_ANCHOR_POLL_SEC", "4"))           # seconds between confirmation polls
+ANCHOR_RETRIES = int(os.getenv("ALGO_ANCHOR_RETRIES", "3"))           # resends after a group expires
+ANCHOR_DIR = os.getenv("ALGO_ANCHOR_DIR", "logs")
+
+NOTE_LIMIT = 1024        # algod rejects longer notes
+MAX_GROUP = 16           # transactions per atomic group
+NOTE_PREFIX = b"afg1:"   # lets an indexer note-prefix search find our anchors
+
+# Proof: sibling hashes from the leaf up; "L" = sibling is on the left
+Proof = List[Tuple[str, str]]
+
+
+# ---- Merkle tree ----
+def canonical(event: Dict[str, Any]) -> bytes:
+    """The bytes that are hashed for an event: sorted keys, no whitespace."""
+    return json.dumps(event, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def leaf_hash(event: Dict[str, Any]) -> bytes:
+    # 0x00 / 0x01 prefixes keep a leaf from being passed off as an inner node
+    return hashlib.sha256(b"\x00" + canonical(event)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def merkle_tree(leaves: Sequence[bytes]) -> Tuple[bytes, List[Proof]]:
+    """
+    Root and one inclusion proof per leaf. An odd node at the end of a level
+    is carried up unchanged (not paired with itself), so no two different
+    leaf lists share a root.
+    """
+    if not leaves:
+        raise ValueError("cannot build a Merkle tree without leaves")
+    proofs: List[Proof] = [[] for _ in leaves]
+    # members[i] = leaf indexes under level[i]
+    level, members = list(leaves), [[i] for i in range(len(leaves))]
+    while len(level) > 1:
+        nxt, nxt_members = [], []
+        for i in range(0, len(level) - 1, 2):
+            left, right = level[i], level[i + 1]
+            for leaf in members[i]:
+                proofs[leaf].append((right.hex(), "R"))
+            for leaf in members[i + 1]:
+                proofs[leaf].append((left.hex(), "L"))
+            nxt.append(_node(left, right))
+            nxt_members.append(members[i] + members[i + 1])
+        if len(level) % 2:
+            nxt.append(level[-1])
+            nxt_members.append(members[-1])
+        level, members = nxt, nxt_members
+    return level[0], proofs
+
+
+def verify_proof(event: Dict[str, Any], proof: Proof, root: str) -> bool:
+    """True if `event` is a leaf of the tree with hex root `root`."""
+    h = leaf_hash(event)
+    for sibling, side in proof:
+        s = bytes.fromhex(sibling)
+        h = _node(s, h) if side == "L" else _node(h, s)
+    return h.hex() == root
+
+
+# ---- Transaction notes ----
+def anchor_notes(batches: Sequence[Dict[str, Any]]) -> List[bytes]:
+    """
+    Pack {"id", "root", "n"} batch references into as few notes as fit in
+    NOTE_LIMIT bytes each: NOTE_PREFIX + {"b": [[id, root, n], ...]}.
+    """
+    notes: List[bytes] = []
+    current: List[List[Any]] = []
+    for b in batches:
+        ref = [b["id"], b["root"], b["n"]]
+        candidate = NOTE_PREFIX + json.dumps({"b": current + [ref]}, separators=(",", ":")).encode()
+        if len(candidate) > NOTE_LIMIT and current:
+            notes.append(NOTE_PREFIX + json.dumps({"b": current}, separators=(",", ":")).encode())
+            current = [ref]
+        else:
+            current.append(ref)
+    if current:
+        notes.append(NOTE_PREFIX + json.dumps({"b": current}, separators=(",", ":")).encode())
+    return notes
+
+
+def parse_note(note: bytes) -> List[Dict[str, Any]]:
+    """Batch references from an anchor note (empty list for other notes)."""
+    if not note.startswith(NOTE_PREFIX):
+        return []
+    refs = json.loads(note[len(NOTE_PREFIX):])["b"]
+    return [{"id": i, "root": r, "n": n} for i, r, n in refs]
+
+
+def anchor_groups(notes: Sequence[bytes], sender: str,
+                  params: transaction.SuggestedParams) -> List[List[transaction.Transaction]]:
+    """0-ALGO self-payments carrying `notes`, in atomic groups of at most MAX_GROUP."""
+    groups = []
+    for i in range(0, len(notes), MAX_GROUP):
+        txns = [transaction.PaymentTxn(sender=sender, sp=params, receiver=sender, amt=0, note=n)
+                for n in notes[i:i + MAX_GROUP]]
+        if len(txns) > 1:
+            transaction.assign_group_id(txns)
+        groups.append(txns)
+    return groups
+
+
+# ---- Local proof store ----
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS proofs (
+    leaf    TEXT PRIMARY KEY,   -- first batch wins if an identical event is anchored again
+    batch   TEXT NOT NULL,
+    record  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    id      TEXT PRIMARY KEY,
+    state   TEXT NOT NULL       -- latest state, every update merged in
+);
+"""
+
+
+class AnchorStore:
+    """
+    Two JSONL logs under `directory`, written through the shared event sink:
+      anchor-proofs.jsonl  one line per event: leaf, batch, index, root, proof, event
+      anchors.jsonl        one line per batch state change: id, root, n, status, txids
+    and anchors.db next to them (SQLite, WAL): proofs by leaf and the latest
+    state of each batch, so lookups do not read the logs. The logs stay the
+    record; a missing anchors.db is rebuilt from them in one pass (reindex()).
+
+    One writer connection behind a lock; each reading thread gets its own
+    connection.
+    """
+
+    def __init__(self, directory: str = ANCHOR_DIR):
+        self.proofs_path = os.path.join(directory, "anchor-proofs.jsonl")
+        self.batches_path = os.path.join(directory, "anchors.jsonl")
+        self.index_path = os.path.join(directory, "anchors.db")
+        os.makedirs(directory, exist_ok=True)
+        fresh = not os.path.exists(self.index_path)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._db = self._connect()
+        self._db.executescript(INDEX_SCHEMA)
+        if fresh:
+            self.reindex()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.index_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _reader(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    def add_batch(self, batch: Dict[str, Any], events: Sequence[Dict[str, Any]],
+                  leaves: Sequence[bytes], proofs: Sequence[Proof]):
+        records = [{"leaf": leaf.hex(), "batch": batch["id"], "index": i, "root": batch["root"],
+                    "proof": proof, "event": evt}
+                   for i, (evt, leaf, proof) in enumerate(zip(events, leaves, proofs))]
+        get_sink(self.proofs_path).emit_many(records)
+        self._index_proofs(records)
+        self.update(batch)
+
+    def update(self, batch: Dict[str, Any]):
+        rec = {**batch, "ts": time.time()}
+        get_sink(self.batches_path).emit(rec)
+        self._index_batches([rec])
+
+    def _index_proofs(self, records: Sequence[Dict[str, Any]]):
+        rows = [(r["leaf"], r["batch"], json.dumps(r, separators=(",", ":"), default=str)) for r in records]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR IGNORE INTO proofs VALUES (?,?,?)", rows)
+
+    def _index_batches(self, records: Sequence[Dict[str, Any]]):
+        with self._lock, self._db:
+            for rec in records:
+                row = self._db.execute("SELECT state FROM batches WHERE id = ?", (rec["id"],)).fetchone()
+                state = {**json.loads(row[0]), **rec} if row else rec
+                self._db.execute("INSERT OR REPLACE INTO batches VALUES (?,?)",
+                                 (rec["id"], json.dumps(state, separators=(",", ":"), default=str)))
+
+    def reindex(self):
+        """Rebuild anchors.db from the logs (one pass each)."""
+        self.flush()
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM proofs")
+            self._db.execute("DELETE FROM batches")
+        page: List[Dict[str, Any]] = []
+        for rec in segments.read_events(self.proofs_path):
+            rec.pop("seq", None)  # the sink's line number, not part of the record
+            page.append(rec)
+            if len(page) >= 2000:
+                self._index_proofs(page)
+                page = []
+        self._index_proofs(page)
+        batches = list(segments.read_events(self.batches_path))
+        for rec in batches:
+            rec.pop("seq", None)
+        self._index_batches(batches)
+
+    def flush(self):
+        get_sink(self.proofs_path).flush()
+        get_sink(self.batches_path).flush()
+
+    def proof(self, leaf: str) -> Optional[Dict[str, Any]]:
+        """The stored proof record for a leaf hash (hex)."""
+        row = self._reader().execute("SELECT record FROM proofs WHERE leaf = ?", (leaf,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def status(self, leaf: str) -> Optional[str]:
+        """Anchoring status of an event by leaf hash: unsent, pending, retrying, confirmed or failed."""
+        row = self._reader().execute(
+            "SELECT b.state FROM proofs p JOIN batches b ON b.id = p.batch WHERE p.leaf = ?", (leaf,)).fetchone()
+        return None if row is None else json.loads(row[0]).get("status")
+
+    def batches(self) -> Dict[str, Dict[str, Any]]:
+        """Latest state of every batch, by id."""
+        return {batch_id: json.loads(state)
+                for batch_id, state in self._reader().execute("SELECT id, state FROM batches")}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ---- Confirmation tracking ----
+class ConfirmationTracker:
+    """
+    Follows submitted anchor groups until they are confirmed or fail.
+
+    One poll reads the node's last round once and then one pending-info per
+    group (its first txid; a group commits or fails as a whole). A group that
+    is confirmed marks its batches "confirmed"; one rejected by the pool
+    "failed"; one still unconfirmed after its last valid round has expired
+    and is handed to `on_expired` for a resend with fresh params, up to
+    `max_retries` times, after which its batches are "failed".
+
+    algod forgets a confirmed transaction after a while (pending-info then
+    answers 404), so a group the node does not know is only declared expired
+    once the indexer (`indexer_factory`) has passed its last valid round
+    without it; if the indexer has it, it is confirmed. Without an indexer
+    the node's 404 is taken at its word. Every state change is also passed
+    to `on_update`.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any], store: AnchorStore,
+                 on_expired: Callable[[List[Dict[str, Any]]], None], *, max_retries: int = ANCHOR_RETRIES,
+                 indexer_factory: Optional[Callable[[], Any]] = None,
+                 on_update: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.client_factory = client_factory
+        self.store = store
+        self.on_expired = on_expired
+        self.max_retries = max_retries
+        self.indexer_factory = indexer_factory
+        self.on_update = on_update
+        # first txid -> {"txids", "batches", "last_valid"}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, txids: List[str], batches: List[Dict[str, Any]], last_valid: int):
+        with self._lock:
+            self._pending[txids[0]] = {"txids": txids, "batches": batches, "last_valid": last_valid}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def poll(self) -> Dict[str, int]:
+        """Check every pending group once. Returns counts of groups by outcome."""
+        with self._lock:
+            pending = list(self._pending.items())
+        counts = {"confirmed": 0, "failed": 0, "expired": 0, "pending": 0}
+        if not pending:
+            return counts
+        client = self.client_factory()
+        last_round = client.status()["last-round"]
+        for key, sub in pending:
+            try:
+                info = client.pending_transaction_info(key)
+            except AlgodHTTPError:
+                info = None  # unknown to this node: not sent yet, expired, or confirmed and forgotten
+            if info is None and last_round > sub["last_valid"]:
+                confirmed = self._on_chain(key, sub["last_valid"])
+                if confirmed is None:
+                    counts["pending"] += 1  # cannot tell yet; ask again next poll
+                    continue
+                info = {"confirmed-round": confirmed}
+            info = info or {}
+            if info.get("confirmed-round"):
+                self._settle(key, sub["batches"], status="confirmed", round=info["confirmed-round"])
+                counts["confirmed"] += 1
+            elif info.get("pool-error"):
+                self._settle(key, sub["batches"], status="failed", error=info["pool-error"])
+                counts["failed"] += 1
+            elif last_round > sub["last_valid"]:
+                counts["expired"] += 1
+                retry = [b for b in sub["batches"] if b.get("attempts", 1) <= self.max_retries]
+                self._settle(key, [b for b in sub["batches"] if b not in retry], status="failed",
+                             error="expired")
+                for b in retry:
+                    b.update(status="retrying", attempts=b.get("attempts", 1) + 1)
+                    self.record(b)
+                if retry:
+                    self.on_expired(retry)
+            else:
+                counts["pending"] += 1
+        return counts
+
+    def _on_chain(self, txid: str, last_valid: int) -> Optional[int]:
+        """The round `txid` confirmed in, 0 if it never can, None if that is not known yet."""
+        if self.indexer_factory is None:
+            return 0
+        try:
+            page = self.indexer_factory().search_transactions(txid=txid)
+        except Exception as e:
+            print(f"[ALG] Indexer lookup of {txid} failed: {e}")
+            return None
+        for txn in page.get("transactions", []):
+            if txn.get("confirmed-round"):
+                return txn["confirmed-round"]
+        return 0 if page.get("current-round", 0) > last_valid else None
+
+    def _settle(self, key: str, batches: List[Dict[str, Any]], **fields):
+        with self._lock:
+            self._pending.pop(key, None)
+        for b in batches:
+            b.update(fields)
+            self.record(b)
+
+    def record(self, batch: Dict[str, Any]):
+        """Store a batch's new state and pass it to on_update."""
+        self.store.update(batch)
+        if self.on_update is not None:
+            try:
+                self.on_update(batch)
+            except Exception as e:
+                print(f"[ALG] Anchor update hook failed: {e}")
+
+
+# ---- Pipeline ----
+class AnchorPipeline:
+    """
+    Buffers events and anchors them on chain in Merkle batches.
+
+    add() only appends to an in-memory buffer and returns the event's leaf
+    hash. A batch is cut when `batch_size` events are buffered or the oldest
+    has waited `interval` seconds (background thread, see start()); its
+    proofs are stored locally right away and its root goes on chain in a
+    0-ALGO self-payment note. Roots that could not be sent (node down) are
+    retried with the next batch, packed several per note and spread over an
+    atomic group when they no longer fit in one.
+
+    Sending does not wait for confirmation: a sent batch is "pending" and the
+    same thread polls its group every `poll_interval` seconds (see
+    ConfirmationTracker); expired groups are re-sent with fresh params.
+    `on_update` sees every batch as it changes state (pending, retrying,
+    confirmed, failed). resume() picks up what a previous run left unsettled.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any], private_key: str, *,
+                 store: Optional[AnchorStore] = None, batch_size: int = ANCHOR_BATCH_SIZE,
+                 interval: float = ANCHOR_INTERVAL, poll_interval: float = ANCHOR_POLL,
+                 max_retries: int = ANCHOR_RETRIES, indexer_factory: Optional[Callable[[], Any]] = None,
+                 on_update: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.client_factory = client_factory
+        self.private_key = private_key
+        self.sender = account.address_from_private_key(private_key)
+        self.store = store or AnchorStore()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.tracker = ConfirmationTracker(client_factory, self.store, self._requeue,
+                                           max_retries=max_retries, indexer_factory=indexer_factory,
+                                           on_update=on_update)
+        self._buffer: List[Tuple[Dict[str, Any], bytes]] = []
+        self._first_at = 0.0
+        self._unsent: List[Dict[str, Any]] = []
+        self._retry_at = 0.0
+        self._polled_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, event: Dict[str, Any]) -> str:
+        leaf = leaf_hash(event)
+        with self._lock:
+            if not self._buffer:
+                self._first_at = time.monotonic()
+            self._buffer.append((event, leaf))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+        return leaf.hex()
+
+    def cut(self) -> Optional[Dict[str, Any]]:
+        """Close the buffered events into a batch and store its proofs. Returns the batch."""
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+        if not pending:
+            return None
+        events = [evt for evt, _ in pending]
+        leaves = [leaf for _, leaf in pending]
+        root, proofs = merkle_tree(leaves)
+        batch = {"id": uuid.uuid4().hex[:16], "root": root.hex(), "n": len(leaves), "status": "unsent"}
+        self.store.add_batch(batch, events, leaves, proofs)
+        return batch
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Cut a batch from the buffer and send it with any unsent ones. Returns the batches sent."""
+        with self._flush_lock:
+            batch = self.cut()
+            with self._lock:
+                if batch is not None:
+                    self._unsent.append(batch)
+                batches, self._unsent = self._unsent, []
+            if not batches:
+                return []
+            sent = self._submit(batches)
+            if len(sent) < len(batches):
+                with self._lock:
+                    self._unsent = [b for b in batches if b not in sent] + self._unsent
+                self._retry_at = time.monotonic() + self.interval
+            return sent
+
+    def _submit(self, batches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send every group it can; returns the batches now pending."""
+        by_id = {b["id"]: b for b in batches}
+        sent: List[Dict[str, Any]] = []
+        try:
+            client = self.client_factory()
+            params = client.suggested_params()
+            for group in anchor_groups(anchor_notes(batches), self.sender, params):
+                signed = [txn.sign(self.private_key) for txn in group]
+                client.send_transactions(signed)
+                txids = [txn.get_txid() for txn in group]
+                members = [by_id[ref["id"]] for txn in group for ref in parse_note(txn.note)]
+                for b in members:
+                    b.update(status="pending", txids=txids, last_valid=params.last)
+                    self.tracker.record(b)
+                self.tracker.track(txids, members, params.last)
+                sent.extend(members)
+        except Exception as e:
+            print(f"[ALG] Anchoring {len(batches) - len(sent)} batch(es) failed, will retry: {e}")
+        return sent
+
+    def resume(self) -> int:
+        """
+        Take over the batches the store holds as unsent, retrying or pending
+        (a previous run stopped before they settled): the first two are sent
+        with the next flush, pending groups are tracked again. Call it once,
+        before start(). Returns the number of batches picked up.
+        """
+        unsent: List[Dict[str, Any]] = []
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for b in self.store.batches().values():
+            if b.get("status") in ("unsent", "retrying"):
+                unsent.append(b)
+            elif b.get("status") == "pending" and b.get("txids"):
+                groups.setdefault(b["txids"][0], []).append(b)
+        with self._lock:
+            self._unsent.extend(unsent)
+        for members in groups.values():
+            self.tracker.track(members[0]["txids"], members, members[0]["last_valid"])
+        return len(unsent) + sum(map(len, groups.values()))
+
+    def _requeue(self, batches: List[Dict[str, Any]]):
+        # the resend must not reuse cached params (see clients.PooledAlgodClient)
+        invalidate = getattr(self.client_factory(), "invalidate_params", None)
+        if invalidate is not None:
+            invalidate()
+        with self._lock:
+            self._unsent.extend(batches)
+        self._retry_at = 0.0
+        self._wake.set()
+
+    def poll(self) -> Dict[str, int]:
+        """Check pending groups now (the background thread does this every poll_interval)."""
+        self._polled_at = time.monotonic()
+        try:
+            return self.tracker.poll()
+        except Exception as e:
+            print(f"[ALG] Confirmation poll failed: {e}")
+            return {}
+
+    # ---- background flushing ----
+    def start(self) -> "AnchorPipeline":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="anchor-pipeline")
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the thread after a last flush."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _due(self) -> bool:
+        with self._lock:
+            if len(self._buffer) >= self.batch_size:
+                return True
+            return bool(self._buffer) and time.monotonic() - self._first_at >= self.interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(min(self.interval, self.poll_interval, 1.0))
+            self._wake.clear()
+            if self._due() or (self._unsent and time.monotonic() >= self._retry_at):
+                self.flush()
+            if self.tracker.pending and time.monotonic() - self._polled_at >= self.poll_interval:
+                self.poll()
+        self.flush()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib import parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from algosdk import constants, error, transaction
+from algosdk.v2client import algod, indexer
+
+from .aio import AsyncNodeClient
+
+# ---- Config (env), read once ----
+ALGOD_URL = os.getenv("ALGO_ALGOD_URL") or os.getenv("ALGO_NODE_URL") or "https://testnet-api.algonode.cloud"
+INDEXER_URL = os.getenv("ALGO_INDEXER_URL", "https://testnet-idx.algonode.cloud")
+API_KEY = os.getenv("ALGO_API_KEY", "")  # keep hook for other providers
+HTTP_POOL = int(os.getenv("ALGO_HTTP_POOL", "32"))                   # keep-alive sockets per node
+PARAMS_ROUNDS = int(os.getenv("ALGO_PARAMS_CACHE_ROUNDS", "10"))     # reuse suggested_params this many rounds
+ROUND_SEC = float(os.getenv("ALGO_ROUND_SEC", "2.8"))                # average block time, to count rounds
+
+
+def _session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _url(base: str, requrl: str, params) -> str:
+    if requrl not in constants.unversioned_paths:
+        requrl = algod.api_version_path_prefix + requrl
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+    return base + requrl
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """
+    AlgodClient whose requests go through one keep-alive requests.Session
+    (algosdk opens a new connection per call), and whose suggested_params()
+    is reused for `params_rounds` rounds, estimated from the wall clock.
+    Responses and errors are the same as algosdk's.
+    """
+
+    def __init__(self, algod_token: str, algod_address: str, headers: Optional[Dict[str, str]] = None, *,
+                 params_rounds: int = PARAMS_ROUNDS, round_sec: float = ROUND_SEC,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(algod_token, algod_address, headers)
+        self.session = _session()
+        self.params_ttl = params_rounds * round_sec
+        self._clock = clock
+        self._params: Optional[transaction.SuggestedParams] = None
+        self._params_at = 0.0
+        self._params_lock = threading.Lock()
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None,
+                      response_format="json", timeout=30):
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        resp = self.session.request(method, _url(self.algod_address, requrl, params),
+                                    headers=header, data=data, timeout=timeout)
+        if resp.status_code >= 400:
+            j: Dict[str, Any] = {}
+            m: Any = resp.text
+            try:
+                j = resp.json()
+                m = j["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise error.AlgodHTTPError(m, resp.status_code, j.get("data") if isinstance(j, dict) else None)
+        if response_format != "json":
+            return resp.content
+        if not resp.content:
+            return {}
+        try:
+            return json.loads(resp.content)
+        except ValueError as e:
+            raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+
+    def suggested_params(self, **kwargs: Any) -> transaction.SuggestedParams:
+        """Cached copy of the node's params; refetched once they are `params_rounds` old."""
+        if kwargs or self.params_ttl <= 0:
+            return super().suggested_params(**kwargs)
+        with self._params_lock:
+            if self._params is None or self._clock() - self._params_at >= self.params_ttl:
+                self._params = super().suggested_params()
+                self._params_at = self._clock()
+            # callers tweak fee/flat_fee on the object they get
+            return copy.copy(self._params)
+
+    def invalidate_params(self):
+        """Forget cached params, e.g. after a send failed because they expired."""
+        with self._params_lock:
+            self._params = None
+
+
+class PooledIndexerClient(indexer.IndexerClient):
+    """IndexerClient over one keep-alive requests.Session."""
+
+    def __init__(self, indexer_token: str, indexer_address: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(indexer_token, indexer_address, headers)
+        self.session = _session()
+
+    def indexer_request(self, method, requrl, params=None, data=None, headers=None, timeout=30):
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth and self.indexer_token:
+            header.update({constants.indexer_auth_header: self.indexer_token})
+
+        resp = self.session.request(method, _url(self.indexer_address, requrl, params),
+                                    headers=header, data=data, timeout=timeout)
+        if resp.status_code >= 400:
+            m: Any = resp.text
+            try:
+                m = resp.json()["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise error.IndexerHTTPError(m)
+        return _sorted(json.loads(resp.content))
+
+
+def _sorted(d: Dict[str, Any]) -> Dict[str, Any]:
+    # algosdk's IndexerClient returns key-sorted dicts; keep that
+    return {k: _sorted(v) if isinstance(v, dict) else v for k, v in sorted(d.items())}
+
+
+# ---- Registry: one client per node per process ----
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _headers() -> Optional[Dict[str, str]]:
+    # some providers want the key as X-API-Key instead of the algod token header
+    return {"X-API-Key": API_KEY} if API_KEY else None
+
+
+def _get(name: str, factory: Callable[[], Any]):
+    c = _clients.get(name)
+    if c is None:
+        with _clients_lock:
+            c = _clients.get(name)
+            if c is None:
+                c = _clients[name] = factory()
+    return c
+
+
+def get_algod() -> PooledAlgodClient:
+    """The shared algod client (ALGO_ALGOD_URL, else ALGO_NODE_URL)."""
+    return _get("algod", lambda: PooledAlgodClient(API_KEY, ALGOD_URL, _headers()))
+
+
+def get_indexer() -> PooledIndexerClient:
+    """The shared indexer client (ALGO_INDEXER_URL)."""
+    return _get("indexer", lambda: PooledIndexerClient(API_KEY, INDEXER_URL, _headers()))
+
+
+def get_async_algod() -> AsyncNodeClient:
+    """The shared async algod client, for coroutine callers."""
+    return _get("async_algod", lambda: AsyncNodeClient(API_KEY, ALGOD_URL, headers=_headers()))
+
+
+def get_async_indexer() -> AsyncNodeClient:
+    return _get("async_indexer", lambda: AsyncNodeClient(API_KEY, INDEXER_URL, indexer=True,
+                                                              headers=_headers()))
+
+
+def reset():
+    """Drop every shared client; the next get_* builds fresh ones."""
+    with _clients_lock:
+        _clients.clear()
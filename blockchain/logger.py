@@ -1,62 +1,90 @@
-import json
+import atexit
 import os
+import threading
+import time
 from datetime import datetime, timezone
-from algosdk.v2client import algod
-from algosdk import mnemonic, transaction, account
-from algosdk.transaction import wait_for_confirmation
+from algosdk import mnemonic
+
+from eventlog.sink import get_sink
+from blockchain.anchor import AnchorPipeline
+from blockchain.clients import get_algod, get_indexer
 
 def _client():
-    node = os.getenv("ALGO_NODE_URL", "https://testnet-api.algonode.cloud")
-    key = os.getenv("ALGO_API_KEY", "")
-    headers = {"X-API-Key": key} if key else {}
-    return algod.AlgodClient(key, node, headers)
+    # shared pooled client; suggested_params is cached across events
+    return get_algod()
 
 
-def log_event_to_algorand(event):
-    """
-    Sends a small transaction with event summary to Algorand TestNet.
-    Returns the transaction hash (txid) if successful.
-    """
-    try:
-        mn = "Keen daughter jelly actress heart over child tongue mystery bag inflict setup convince path space naive forward economy desk lottery master engine marble above practice"
-        sk = mnemonic.to_private_key(mn)
-        addr = account.address_from_private_key(sk)
+MNEMONIC = os.getenv("ALGO_ANCHOR_MNEMONIC", "Keen daughter jelly actress heart over child tongue mystery bag inflict setup convince path space naive forward economy desk lottery master engine marble above practice")
 
-        client = _client()
-        params = client.suggested_params()
+EVENTS_PATH = os.path.join("logs", "events.jsonl")
+STOP_TIMEOUT = float(os.getenv("ALGO_ANCHOR_STOP_TIMEOUT_SEC", "10"))  # last flush at exit
 
-        note = json.dumps(event).encode()
-        txn = transaction.PaymentTxn(
-            sender=addr,
-            sp=params,
-            receiver=addr,
-            amt=0,
-            note=note,
-        )
+_pipeline = None
+_pipeline_lock = threading.Lock()
 
-        signed_txn = txn.sign(sk)
-        txid = client.send_transaction(signed_txn)
-        wait_for_confirmation(client, txid, 4)
 
-        print("✅ Transaction sent successfully!")
-        print(f"🔗 Transaction ID: {txid}")
+def _record_update(batch):
+    """An anchor batch changed state: log it next to the events it covers, with its txid."""
+    txids = batch.get("txids") or []
+    get_sink(EVENTS_PATH).emit({
+        "ts": str(datetime.now(timezone.utc)),
+        "domain": "afreeguard.ai",
+        "action": "anchor_update",
+        "anchor_batch": batch["id"],
+        "anchor_root": batch["root"],
+        "anchor_status": batch.get("status"),
+        "txid": txids[0] if txids else None,
+        "txids": txids,
+        "round": batch.get("round"),
+        "reason": batch.get("error", ""),
+    })
+
+
+def anchor_pipeline():
+    """
+    The process-wide anchoring pipeline, started on first use. It resumes
+    the batches an earlier run left unsettled and is stopped (with a last
+    flush) when the interpreter exits.
+    """
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                sk = mnemonic.to_private_key(MNEMONIC)
+                pipeline = AnchorPipeline(_client, sk, indexer_factory=get_indexer,
+                                          on_update=_record_update)
+                pipeline.resume()
+                # registered after eventlog.sink's close_all, so it runs first
+                atexit.register(pipeline.stop, STOP_TIMEOUT)
+                _pipeline = pipeline.start()
+    return _pipeline
+
+
+def log_event_to_algorand(event):
+    """
+    Queues the event for on-chain anchoring and records it locally right
+    away as "pending"; nothing waits for the network. Events are anchored in
+    Merkle batches (see blockchain.anchor) and a background tracker follows
+    confirmation, logging an "anchor_update" event (status, txid) for the
+    batch at each step; the batch an event went into is in its proof record.
+    The return value is the event's leaf hash, which finds its inclusion
+    proof and status later (anchor_pipeline().store).
+    """
+    try:
+        leaf = anchor_pipeline().add(event)
 
         # ✳️ Save event locally for AFREEGuard AI Dashboard
-        logs_dir = "logs"
-        os.makedirs(logs_dir, exist_ok=True)
-
-        with open(os.path.join(logs_dir, "events.jsonl"), "a") as f:
-            json.dump({
-                "ts": str(datetime.now(timezone.utc)),
-                "domain": "afreeguard.ai",
-                "action": event.get("action", "unknown"),
-                "txid": txid,
-                "blocked": event.get("blocked", False),
-                "reason": event.get("reason", "manual test")
-            }, f)
-            f.write("\n")
-
-        return txid
+        get_sink(EVENTS_PATH).emit({
+            "ts": str(datetime.now(timezone.utc)),
+            "domain": "afreeguard.ai",
+            "action": event.get("action", "unknown"),
+            "anchor": leaf,
+            "anchor_status": "pending",
+            "blocked": event.get("blocked", False),
+            "reason": event.get("reason", "manual test")
+        })
+
+        return leaf
 
     except Exception as e:
         print(f"[ALG] Logging error: {e}")
@@ -70,4 +98,13 @@ if __name__ == "__main__":
         "blocked": False,
         "reason": "manual test"
     }
-    log_event_to_algorand(test_event)
\ No newline at end of file
+    leaf = log_event_to_algorand(test_event)
+    pipeline = anchor_pipeline()
+    for batch in pipeline.flush():
+        print(f"✅ Sent batch {batch['id']} root {batch['root']}")
+        print(f"🔗 Transaction IDs: {', '.join(batch['txids'])}")
+    while pipeline.tracker.pending:
+        time.sleep(pipeline.poll_interval)
+        pipeline.poll()
+    print("Status:", pipeline.store.status(leaf))
+    print("Proof:", pipeline.store.proof(leaf))
\ No newline at end of file
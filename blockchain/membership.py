@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Optional, Tuple
+
+from algosdk.error import AlgodHTTPError, IndexerHTTPError
+
+# ---- Config (env) ----
+CACHE_SIZE = int(os.getenv("ALGO_MEMBERSHIP_CACHE_SIZE", "10000"))
+POSITIVE_TTL = float(os.getenv("ALGO_MEMBERSHIP_TTL_POS", "60"))   # seconds a "holds" answer is trusted
+NEGATIVE_TTL = float(os.getenv("ALGO_MEMBERSHIP_TTL_NEG", "10"))   # seconds a "does not hold" answer is trusted
+BACKEND = os.getenv("ALGO_MEMBERSHIP_BACKEND", "algod")             # algod | indexer | account_info
+
+SNAPSHOT_ENABLED = os.getenv("ALGO_HOLDER_SNAPSHOT", "0") == "1"                # bulk holder set for the NFT
+SNAPSHOT_INTERVAL = float(os.getenv("ALGO_HOLDER_SNAPSHOT_SEC", "60"))         # seconds between refreshes
+SNAPSHOT_MAX_AGE = float(os.getenv("ALGO_HOLDER_SNAPSHOT_MAX_AGE", "180"))     # older than this = stale, check live
+SNAPSHOT_PAGE = int(os.getenv("ALGO_HOLDER_SNAPSHOT_PAGE", "1000"))            # indexer page size
+
+BACKENDS = ("algod", "indexer", "account_info")
+
+
+class MembershipCache:
+    """
+    Bounded LRU of (address, asa_id) -> holds, with separate TTLs for positive
+    and negative answers. Only definite answers are stored: lookup errors are
+    never cached, so callers keep failing closed on them.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE, positive_ttl: float = POSITIVE_TTL,
+                 negative_ttl: float = NEGATIVE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._data: "OrderedDict[Tuple[str, int], Tuple[bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, address: str, asa_id: int) -> Optional[bool]:
+        """Cached answer, or None on a miss / expired entry."""
+        key = (address, asa_id)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, address: str, asa_id: int, held: bool):
+        ttl = self.positive_ttl if held else self.negative_ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        key = (address, asa_id)
+        with self._lock:
+            self._data[key] = (held, self._clock() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, address: Optional[str] = None, asa_id: Optional[int] = None) -> int:
+        """Drop entries matching address and/or asa_id (everything if both are None)."""
+        with self._lock:
+            if address is None and asa_id is None:
+                n = len(self._data)
+                self._data.clear()
+                return n
+            doomed = [k for k in self._data
+                      if (address is None or k[0] == address) and (asa_id is None or k[1] == asa_id)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls by key (threads): the first caller for a key runs
+    fn(), callers arriving while it is in flight wait and get the same result
+    or exception. Nothing is remembered once the call returns; that is the
+    cache's job.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0       # fn() actually run
+        self.coalesced = 0   # callers that shared someone else's call
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop. The shared call runs as its
+    own task, so a caller that is cancelled (client hung up) does not cancel
+    it for the others.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]"):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an error nobody awaited is not reported
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._tasks)}
+
+
+class HolderSnapshot:
+    """
+    Every holder of one ASA, fetched in pages from the indexer's
+    /v2/assets/{id}/balances and kept as a frozenset, so a membership check is
+    a local set lookup.
+
+    refresh() builds the new set off to the side and swaps it in with one
+    assignment of (version, holders, round, fetched_at), so readers never see
+    a half-built snapshot and need no lock. A failed refresh keeps the old
+    snapshot; once it is older than `max_age`, lookup() returns None and the
+    caller checks live instead.
+    """
+
+    def __init__(self, indexer_client, asa_id: int, *, interval: float = SNAPSHOT_INTERVAL,
+                 max_age: float = SNAPSHOT_MAX_AGE, page_size: int = SNAPSHOT_PAGE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.client = indexer_client
+        self.asa_id = asa_id
+        self.interval = interval
+        self.max_age = max_age
+        self.page_size = page_size
+        self._clock = clock
+        # (version, holders, indexer round, fetched_at); version 0 = never loaded
+        self._state: Tuple[int, FrozenSet[str], Optional[int], float] = (0, frozenset(), None, 0.0)
+        self.errors = 0
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def version(self) -> int:
+        return self._state[0]
+
+    def fresh(self) -> bool:
+        version, _, _, fetched_at = self._state
+        return version > 0 and self._clock() - fetched_at <= self.max_age
+
+    def lookup(self, address: str) -> Optional[bool]:
+        """True/False from a fresh snapshot, None if it is stale or not loaded yet."""
+        version, holders, _, fetched_at = self._state
+        if not version or self._clock() - fetched_at > self.max_age:
+            return None
+        return address in holders
+
+    def refresh(self) -> int:
+        """Fetch the full holder list and swap it in. Returns the new version; raises on RPC errors."""
+        with self._refresh_lock:
+            holders = set()
+            rnd, token = None, None
+            while True:
+                # min_balance=0: only accounts with amount > 0
+                page = self.client.asset_balances(self.asa_id, limit=self.page_size,
+                                                  next_page=token, min_balance=0)
+                if rnd is None:
+                    rnd = page.get("current-round")
+                balances = page.get("balances", [])
+                holders.update(b["address"] for b in balances
+                               if b.get("amount", 0) > 0 and not b.get("deleted"))
+                token = page.get("next-token")
+                if not token or not balances:
+                    break
+            self._state = (self._state[0] + 1, frozenset(holders), rnd, self._clock())
+            return self._state[0]
+
+    # ---- background refresh ----
+    def start(self) -> "HolderSnapshot":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name=f"holder-snapshot:{self.asa_id}")
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"Holder snapshot refresh failed (ASA {self.asa_id}):", e)
+            self._stop.wait(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        version, holders, rnd, fetched_at = self._state
+        return {"asa_id": self.asa_id, "version": version, "holders": len(holders), "round": rnd,
+                "age": self._clock() - fetched_at if version else None,
+                "fresh": self.fresh(), "errors": self.errors}
+
+
+# ---- Lookup backends ----
+# Each answers "does `address` hold > 0 units of `asa_id`?" and raises on RPC
+# errors (callers fail closed). "Not opted in" / "unknown account" is a
+# definite False, not an error. holds() takes algosdk clients; aholds() takes
+# the coroutine clients from blockchain.aio, which share their method names.
+
+class AlgodAssetBackend:
+    """One holding via algod GET /v2/accounts/{address}/assets/{asa_id}; 404 = not opted in."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def holds(self, address: str, asa_id: int) -> bool:
+        try:
+            return self._held(self.client.account_asset_info(address, asa_id))
+        except AlgodHTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+    async def aholds(self, address: str, asa_id: int) -> bool:
+        try:
+            return self._held(await self.client.account_asset_info(address, asa_id))
+        except AlgodHTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+    @staticmethod
+    def _held(info: Dict[str, Any]) -> bool:
+        return info.get("asset-holding", {}).get("amount", 0) > 0
+
+
+class IndexerAssetBackend:
+    """One holding via indexer GET /v2/accounts/{address}/assets?asset-id={asa_id}."""
+
+    def __init__(self, indexer_client):
+        self.client = indexer_client
+
+    def holds(self, address: str, asa_id: int) -> bool:
+        try:
+            return self._held(self.client.lookup_account_assets(address, asset_id=asa_id), asa_id)
+        except IndexerHTTPError as e:
+            if self._unknown(e):
+                return False
+            raise
+
+    async def aholds(self, address: str, asa_id: int) -> bool:
+        try:
+            return self._held(await self.client.lookup_account_assets(address, asset_id=asa_id), asa_id)
+        except IndexerHTTPError as e:
+            if self._unknown(e):
+                return False
+            raise
+
+    @staticmethod
+    def _held(resp: Dict[str, Any], asa_id: int) -> bool:
+        return any(a.get("asset-id") == asa_id and a.get("amount", 0) > 0
+                   for a in resp.get("assets", []))
+
+    @staticmethod
+    def _unknown(e: IndexerHTTPError) -> bool:
+        # IndexerHTTPError carries no status code, only the node's message
+        return "no accounts found" in str(e)
+
+
+class AccountInfoBackend:
+    """Legacy: fetch the whole account and scan every holding. Kept for nodes without the asset endpoint."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def holds(self, address: str, asa_id: int) -> bool:
+        return self._held(self.client.account_info(address), asa_id)
+
+    async def aholds(self, address: str, asa_id: int) -> bool:
+        return self._held(await self.client.account_info(address), asa_id)
+
+    @staticmethod
+    def _held(info: Dict[str, Any], asa_id: int) -> bool:
+        for asset in info.get("assets", []):
+            if asset.get("asset-id") == asa_id and asset.get("amount", 0) > 0:
+                return True
+        return False
+
+
+def make_backend(name: str, client=None, indexer_client=None):
+    """Backend by name ("algod", "indexer" or "account_info")."""
+    if name == "algod":
+        return AlgodAssetBackend(client)
+    if name == "indexer":
+        return IndexerAssetBackend(indexer_client)
+    if name == "account_info":
+        return AccountInfoBackend(client)
+    raise ValueError(f"membership backend must be one of {BACKENDS}, got {name!r}")
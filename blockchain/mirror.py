@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .anchor import NOTE_PREFIX, parse_note
+
+# ---- Config (env) ----
+MIRROR_DB = os.getenv("ALGO_MIRROR_DB", "")                     # SQLite path; empty = mirror off
+MIRROR_ADDRESSES = [a for a in os.getenv("ALGO_MIRROR_ADDRESSES", "").replace(" ", "").split(",") if a]
+MIRROR_INTERVAL = float(os.getenv("ALGO_MIRROR_INTERVAL", "10"))  # seconds between sync passes
+MIRROR_PAGE = int(os.getenv("ALGO_MIRROR_PAGE", "1000"))          # indexer page size
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS txns (
+    txid        TEXT PRIMARY KEY,
+    round       INTEGER NOT NULL,
+    intra       INTEGER NOT NULL DEFAULT 0,
+    round_time  INTEGER,
+    type        TEXT,
+    sender      TEXT,
+    receiver    TEXT,
+    amount      INTEGER,
+    fee         INTEGER,
+    grp         TEXT,
+    note_kind   TEXT,       -- 'event' (JSON guardrail event), 'anchor', 'text' or NULL
+    domain      TEXT,
+    action      TEXT,
+    blocked     INTEGER,
+    raw         TEXT NOT NULL   -- the indexer's transaction, as JSON
+);
+CREATE INDEX IF NOT EXISTS txns_round    ON txns(round, intra);
+CREATE INDEX IF NOT EXISTS txns_sender   ON txns(sender, round, intra);
+CREATE INDEX IF NOT EXISTS txns_receiver ON txns(receiver, round, intra);
+CREATE INDEX IF NOT EXISTS txns_domain   ON txns(domain, round, intra);
+CREATE INDEX IF NOT EXISTS txns_action   ON txns(action, round, intra);
+CREATE INDEX IF NOT EXISTS txns_blocked  ON txns(blocked, round, intra);
+
+CREATE TABLE IF NOT EXISTS anchor_refs (
+    batch_id TEXT NOT NULL,     -- AnchorPipeline batch ids are hex strings
+    root     TEXT NOT NULL,
+    n        INTEGER NOT NULL,
+    txid     TEXT NOT NULL,
+    PRIMARY KEY (batch_id, txid)
+);
+CREATE INDEX IF NOT EXISTS anchor_refs_root ON anchor_refs(root);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    address   TEXT PRIMARY KEY,
+    round     INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+def decode_note(note_b64: Optional[str]) -> Dict[str, Any]:
+    """
+    The searchable fields of a note: kind, plus domain/action/blocked for a
+    JSON guardrail event (what logger.py wrote before anchoring) and batch
+    references for an anchor note.
+    """
+    if not note_b64:
+        return {"kind": None}
+    try:
+        note = base64.b64decode(note_b64)
+    except (ValueError, TypeError):
+        return {"kind": None}
+    if note.startswith(NOTE_PREFIX):
+        try:
+            return {"kind": "anchor", "refs": parse_note(note)}
+        except (ValueError, KeyError, TypeError):
+            return {"kind": "text"}
+    try:
+        doc = json.loads(note)
+    except ValueError:
+        return {"kind": "text"}
+    if not isinstance(doc, dict):
+        return {"kind": "text"}
+    blocked = doc.get("blocked")
+    return {"kind": "event", "domain": doc.get("domain"), "action": doc.get("action"),
+            "blocked": None if blocked is None else int(bool(blocked))}
+
+
+def _row(txn: Dict[str, Any], note: Dict[str, Any]) -> tuple:
+    pay = txn.get("payment-transaction") or {}
+    axfer = txn.get("asset-transfer-transaction") or {}
+    return (txn["id"], txn.get("confirmed-round", 0), txn.get("intra-round-offset", 0),
+            txn.get("round-time"), txn.get("tx-type"), txn.get("sender"),
+            pay.get("receiver") or axfer.get("receiver"), pay.get("amount", axfer.get("amount")),
+            txn.get("fee"), txn.get("group"), note["kind"], note.get("domain"), note.get("action"),
+            note.get("blocked"), json.dumps(txn, separators=(",", ":")))
+
+
+class TransactionMirror:
+    """
+    Indexer transactions kept in a local SQLite file, indexed by round, txid,
+    sender/receiver and the decoded note fields, plus a per-address
+    checkpoint (the newest round fully synced) so a restarted sync resumes
+    where it stopped.
+
+    One writer connection behind a lock; each reading thread gets its own
+    connection, and WAL lets reads run while a sync writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._db = self._connect()
+        self._db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.row_factory = sqlite3.Row
+        return db
+
+    def _reader(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    # ---- writes ----
+    def add(self, txns: Iterable[Dict[str, Any]]) -> int:
+        """Insert indexer transactions; ones already mirrored are skipped. Returns how many were new."""
+        rows, refs = [], []
+        for txn in txns:
+            note = decode_note(txn.get("note"))
+            rows.append(_row(txn, note))
+            for ref in note.get("refs", []):
+                refs.append((ref["id"], ref["root"], ref["n"], txn["id"]))
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(f"INSERT OR IGNORE INTO txns VALUES ({','.join('?' * 15)})", rows)
+            added = self._db.total_changes - before
+            self._db.executemany("INSERT OR IGNORE INTO anchor_refs VALUES (?,?,?,?)", refs)
+        return added
+
+    def set_checkpoint(self, address: str, rnd: int):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?,?,?)", (address, rnd, time.time()))
+
+    # ---- reads ----
+    def checkpoint(self, address: str) -> Optional[int]:
+        row = self._reader().execute("SELECT round FROM checkpoints WHERE address = ?", (address,)).fetchone()
+        return None if row is None else row[0]
+
+    def transaction(self, txid: str) -> Optional[Dict[str, Any]]:
+        row = self._reader().execute("SELECT raw FROM txns WHERE txid = ?", (txid,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def transactions(self, address: Optional[str] = None, *, sender: Optional[str] = None,
+                     receiver: Optional[str] = None, domain: Optional[str] = None,
+                     action: Optional[str] = None, blocked: Optional[bool] = None,
+                     note_kind: Optional[str] = None, min_round: Optional[int] = None,
+                     max_round: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Matching transactions as indexer dicts, newest first."""
+        where, args = [], []
+        for col, val in (("sender", sender), ("receiver", receiver), ("domain", domain),
+                         ("action", action), ("note_kind", note_kind)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if blocked is not None:
+            where.append("blocked = ?")
+            args.append(int(blocked))
+        if min_round is not None:
+            where.append("round >= ?")
+            args.append(min_round)
+        if max_round is not None:
+            where.append("round <= ?")
+            args.append(max_round)
+        order = " ORDER BY round DESC, intra DESC LIMIT ?"
+        if address is None:
+            sql = "SELECT raw, round, intra FROM txns" + (" WHERE " + " AND ".join(where) if where else "") + order
+            params = args + [limit]
+        else:
+            # one index-ordered scan per side, each cut at `limit`, rather than an OR that sorts everything
+            side = "SELECT * FROM (SELECT raw, round, intra FROM txns WHERE {} = ?" + \
+                   "".join(" AND " + w for w in where) + order + ")"
+            sql = f"SELECT raw, round, intra FROM ({side.format('sender')} UNION {side.format('receiver')})" + order
+            params = [address, *args, limit, address, *args, limit, limit]
+        return [json.loads(r[0]) for r in self._reader().execute(sql, params)]
+
+    def anchor_txids(self, batch_id: str) -> List[str]:
+        """Transactions whose note references anchor batch `batch_id`."""
+        rows = self._reader().execute("SELECT txid FROM anchor_refs WHERE batch_id = ?", (batch_id,))
+        return [r[0] for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        db = self._reader()
+        return {"path": self.path, "transactions": db.execute("SELECT COUNT(*) FROM txns").fetchone()[0],
+                "checkpoints": {r[0]: r[1] for r in db.execute("SELECT address, round FROM checkpoints")}}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class MirrorSync:
+    """
+    Keeps a TransactionMirror up to date with the indexer for `addresses`.
+
+    A pass asks, per address, for every transaction from its checkpoint
+    round on (inclusive: rows already there are skipped), page by page, and
+    only then moves the checkpoint to the newest round seen. A pass cut
+    short by an error or a restart is simply repeated from the old
+    checkpoint.
+    """
+
+    def __init__(self, mirror: TransactionMirror, indexer_client, addresses: Sequence[str], *,
+                 interval: float = MIRROR_INTERVAL, page_size: int = MIRROR_PAGE):
+        self.mirror = mirror
+        self.client = indexer_client
+        self.addresses = list(addresses)
+        self.interval = interval
+        self.page_size = page_size
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync_address(self, address: str) -> int:
+        """One pass for `address`. Returns the number of new transactions; raises on RPC errors."""
+        start = self.mirror.checkpoint(address)
+        newest, token, added = start, None, 0
+        while True:
+            kwargs: Dict[str, Any] = {"limit": self.page_size, "next_page": token}
+            if start is not None:
+                kwargs["min_round"] = start
+            page = self.client.search_transactions_by_address(address, **kwargs)
+            txns = page.get("transactions", [])
+            added += self.mirror.add(txns)
+            rounds = [t.get("confirmed-round", 0) for t in txns]
+            if newest is None:
+                # an empty history still has a starting point: the indexer's round
+                newest = page.get("current-round", 0)
+            newest = max([newest, *rounds])
+            token = page.get("next-token")
+            if not token or not txns:
+                break
+        self.mirror.set_checkpoint(address, newest)
+        return added
+
+    def sync_once(self) -> int:
+        added = 0
+        for address in self.addresses:
+            try:
+                added += self.sync_address(address)
+            except Exception as e:
+                self.errors += 1
+                print(f"Mirror sync failed ({address}):", e)
+        return added
+
+    # ---- background sync ----
+    def start(self) -> "MirrorSync":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="tx-mirror")
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync_once()
+            self._stop.wait(self.interval)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """python -m blockchain.mirror [--db PATH] {sync ADDRESS... | query [filters]}"""
+    from .clients import get_indexer
+
+    ap = argparse.ArgumentParser(prog="python -m blockchain.mirror", description="Local Algorand transaction mirror")
+    ap.add_argument("--db", default=MIRROR_DB or os.path.join("logs", "algorand.db"))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("sync", help="sync addresses once")
+    s.add_argument("addresses", nargs="*", default=MIRROR_ADDRESSES)
+    q = sub.add_parser("query", help="print matching transactions as JSON lines, newest first")
+    q.add_argument("--address")
+    q.add_argument("--sender")
+    q.add_argument("--receiver")
+    q.add_argument("--domain")
+    q.add_argument("--action")
+    q.add_argument("--blocked", choices=["true", "false"])
+    q.add_argument("--kind", dest="note_kind", choices=["event", "anchor", "text"])
+    q.add_argument("--from-round", dest="min_round", type=int)
+    q.add_argument("--to-round", dest="max_round", type=int)
+    q.add_argument("--limit", type=int, default=100)
+    args = ap.parse_args(argv)
+
+    mirror = TransactionMirror(args.db)
+    if args.cmd == "sync":
+        added = MirrorSync(mirror, get_indexer(), args.addresses).sync_once()
+        print(f"{added} new transactions; checkpoints: {mirror.stats()['checkpoints']}")
+        return
+    filters = {k: getattr(args, k) for k in ("address", "sender", "receiver", "domain", "action",
+                                             "note_kind", "min_round", "max_round", "limit")}
+    if args.blocked is not None:
+        filters["blocked"] = args.blocked == "true"
+    for txn in mirror.transactions(**filters):
+        print(json.dumps(txn))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,36 @@ from __future__ import annotations
 import os
 from typing import Optional
 
-from algosdk.v2client import algod
 from algosdk import account, mnemonic
 
-# ---- Config: TestNet client (Algonode – no token needed) ----
-ALGO_ALGOD_URL = os.getenv("ALGO_ALGOD_URL", "https://testnet-api.algonode.cloud")
-ALGO_API_KEY = os.getenv("ALGO_API_KEY", "")  # keep hook for other providers
-client = algod.AlgodClient(ALGO_API_KEY, ALGO_ALGOD_URL)
+from . import clients
+from .membership import (BACKEND, AsyncSingleFlight, HolderSnapshot, MembershipCache,
+                         SingleFlight, make_backend)
+
+# ---- Clients: shared, configured from env in blockchain.clients ----
+client = clients.get_algod()
+indexer_client = clients.get_indexer()
+aclient = clients.get_async_algod()
+aindexer_client = clients.get_async_indexer()
+
+# How membership is looked up (ALGO_MEMBERSHIP_BACKEND): "algod" asks for the
+# one account-asset holding, "indexer" does the same against the indexer,
+# "account_info" is the old full-account scan.
+membership_backend = BACKEND
 
 # Default placeholder ASA (NFT) id for testing; replace later if you want
 DEFAULT_ASA_ID = 745467084
 
+# TTL + LRU cache of membership answers (sizes/TTLs from ALGO_MEMBERSHIP_* env)
+membership_cache = MembershipCache()
+
+# concurrent cache misses for the same (address, asa_id) share one RPC
+inflight = SingleFlight()
+ainflight = AsyncSingleFlight()
+
+# Optional bulk holder set for the configured ASA (see start_holder_snapshot)
+holder_snapshot: Optional[HolderSnapshot] = None
+
 
 def create_wallet():
     """Create a throwaway wallet keypair and print its info."""
@@ -23,21 +42,108 @@ def create_wallet():
     return private_key, address
 
 
+def _lookup_asa(address: str, asa_id: int) -> bool:
+    """Ask the configured backend whether `address` holds > 0 units of `asa_id`. Raises on RPC errors."""
+    backend = make_backend(membership_backend, client, indexer_client)
+    return backend.holds(address, asa_id)
+
+
+def _lookup_and_cache(address: str, asa_id: int) -> bool:
+    held = _lookup_asa(address, asa_id)
+    membership_cache.put(address, asa_id, held)
+    return held
+
+
+async def _alookup_and_cache(address: str, asa_id: int) -> bool:
+    backend = make_backend(membership_backend, aclient, aindexer_client)
+    held = await backend.aholds(address, asa_id)
+    membership_cache.put(address, asa_id, held)
+    return held
+
+
+def _known(address: str, asa_id: int) -> Optional[bool]:
+    """Answer from the holder snapshot or the cache, without any RPC."""
+    snap = holder_snapshot
+    if snap is not None and snap.asa_id == asa_id:
+        known = snap.lookup(address)
+        if known is not None:
+            return known
+        # stale / not loaded yet: fall through to the cache / a live check
+    return membership_cache.get(address, asa_id)
+
+
 def holds_asa(address: str, asa_id: int = DEFAULT_ASA_ID) -> bool:
     """Return True if `address` holds > 0 units of the given ASA id."""
     try:
         # Clean up address
         clean_addr = address.strip()
-        info = client.account_info(clean_addr)
+        known = _known(clean_addr, asa_id)
+        if known is not None:
+            return known
 
-        for asset in info.get("assets", []):
-            if asset.get("asset-id") == asa_id and asset.get("amount", 0) > 0:
-                return True
+        key = (clean_addr, asa_id)
+        return inflight.do(key, lambda: _lookup_and_cache(*key))
+    except Exception as e:
+        # not cached: the next call retries the RPC
+        print("Error checking ASA:", e)
         return False
+
+
+async def aholds_asa(address: str, asa_id: int = DEFAULT_ASA_ID) -> bool:
+    """holds_asa for async callers: the RPC goes through the pooled async client."""
+    try:
+        clean_addr = address.strip()
+        known = _known(clean_addr, asa_id)
+        if known is not None:
+            return known
+
+        key = (clean_addr, asa_id)
+        return await ainflight.do(key, lambda: _alookup_and_cache(*key))
     except Exception as e:
         print("Error checking ASA:", e)
         return False
 
+
+def start_holder_snapshot(asa_id: Optional[int] = None, **kwargs) -> HolderSnapshot:
+    """
+    Keep every holder of `asa_id` (default: env_asa_id() or DEFAULT_ASA_ID) in
+    memory, refreshed from the indexer in the background; holds_asa answers
+    from it while it is fresh. kwargs go to HolderSnapshot.
+    """
+    global holder_snapshot
+    stop_holder_snapshot()
+    asa = asa_id or env_asa_id() or DEFAULT_ASA_ID
+    holder_snapshot = HolderSnapshot(indexer_client, asa, **kwargs).start()
+    return holder_snapshot
+
+
+def stop_holder_snapshot():
+    global holder_snapshot
+    if holder_snapshot is not None:
+        holder_snapshot.stop()
+        holder_snapshot = None
+
+
+async def aclose_clients():
+    """Close the async clients' pooled connections on the running loop (they reopen on next use)."""
+    for client in {id(c): c for c in (aclient, aindexer_client) if hasattr(c, "aclose")}.values():
+        await client.aclose()
+
+
+def membership_stats() -> dict:
+    """Cache, request-coalescing and snapshot counters for the membership layer."""
+    sync, aio = inflight.stats(), ainflight.stats()
+    return {
+        "cache": membership_cache.stats(),
+        "lookups": {k: sync[k] + aio[k] for k in sync},
+        "snapshot": holder_snapshot.stats() if holder_snapshot is not None else None,
+    }
+
+
+def invalidate_membership(address: Optional[str] = None, asa_id: Optional[int] = None) -> int:
+    """Forget cached membership answers, e.g. after an NFT transfer."""
+    return membership_cache.invalidate(address.strip() if address else None, asa_id)
+
 def env_asa_id() -> Optional[int]:
     """
     Read the ASA/NFT id from environment variable ALGO_NFT_ASA_ID.
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# ---- Config (env) ----
+FEED_SIZE = int(os.getenv("ALGO_FEED_SIZE", "200"))          # transactions kept per address
+FEED_TTL = float(os.getenv("ALGO_FEED_TTL", "4"))             # seconds a fetch is served as fresh
+FEED_MAX_STALE = float(os.getenv("ALGO_FEED_MAX_STALE", "60"))  # past this, callers wait for a refetch
+
+
+class TransactionFeed:
+    """
+    Recent indexer transactions of one address, kept in a ring buffer and
+    shared by every caller.
+
+    - Within `ttl` of the last fetch, recent() answers from memory.
+    - Once stale, it still answers from memory immediately and starts one
+      background refresh (stale-while-revalidate); only data older than
+      `max_stale`, or a first call, waits for the indexer.
+    - A refresh asks only for what is new: min-round = the newest round
+      already held (inclusive, so already-seen txids are skipped), and
+      merges the result into the buffer.
+    - A failed refresh keeps the old data; the error shows up in stats().
+    """
+
+    def __init__(self, indexer_client, address: str, *, size: int = FEED_SIZE, ttl: float = FEED_TTL,
+                 max_stale: float = FEED_MAX_STALE, clock: Callable[[], float] = time.monotonic):
+        self.client = indexer_client
+        self.address = address
+        self.size = size
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._clock = clock
+        # newest first, like the indexer's account transactions
+        self._txns: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._ids: set = set()
+        self.last_round: Optional[int] = None
+        self.fetched_at: Optional[float] = None
+        self.fetches = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()          # guards the buffer
+        self._refresh_lock = threading.Lock()  # one fetch at a time
+        self._refreshing = False
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """The newest `limit` transactions (newest first). Raises if nothing could ever be fetched."""
+        age = None if self.fetched_at is None else self._clock() - self.fetched_at
+        if age is None or age >= self.max_stale:
+            self.refresh()
+        elif age >= self.ttl:
+            self._refresh_in_background()
+        with self._lock:
+            return list(self._txns)[:limit]
+
+    def refresh(self):
+        """Fetch what is new since last_round and merge it. Raises only if there is no data at all."""
+        with self._refresh_lock:
+            try:
+                self._fetch()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                if self.fetched_at is None:
+                    raise
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, daemon=True, name=f"tx-feed:{self.address[:8]}").start()
+
+    def _fetch(self):
+        kwargs: Dict[str, Any] = {"limit": self.size}
+        if self.last_round is not None:
+            kwargs["min_round"] = self.last_round
+        resp = self.client.search_transactions_by_address(self.address, **kwargs)
+        self.fetches += 1
+        new = [t for t in resp.get("transactions", []) if t.get("id") not in self._ids]
+        with self._lock:
+            # `new` is newest first; prepend oldest-first so the newest ends up at the front
+            for txn in reversed(new):
+                if len(self._txns) == self.size:
+                    self._ids.discard(self._txns[-1].get("id"))
+                self._txns.appendleft(txn)
+                self._ids.add(txn.get("id"))
+            if self._txns:
+                self.last_round = max(self.last_round or 0, self._txns[0].get("confirmed-round", 0))
+            elif self.last_round is None:
+                self.last_round = resp.get("current-round")
+            self.fetched_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"address": self.address, "size": len(self._txns), "last_round": self.last_round,
+                "age": None if self.fetched_at is None else self._clock() - self.fetched_at,
+                "fetches": self.fetches, "errors": self.errors, "last_error": self.last_error}
+
+
+_feeds: Dict[str, TransactionFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed(indexer_client, address: str, **kwargs) -> TransactionFeed:
+    """The process-wide feed for `address`, created on first use."""
+    feed = _feeds.get(address)
+    if feed is None:
+        with _feeds_lock:
+            feed = _feeds.get(address)
+            if feed is None:
+                feed = _feeds[address] = TransactionFeed(indexer_client, address, **kwargs)
+    return feed
@@ -1,19 +1,21 @@
 # dashboard/app.py — AFREEGuard AI Premium Light Dashboard (with Logo in Header)
 
 import os
-import time
+import sys
 import json
 import socket
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 import requests
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 from dotenv import load_dotenv
 from PIL import Image
 import base64
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard.feed import EventFeed, FeedView, SharedFeed, daily_counts, history_frame
+from dashboard.view import chart_png, table_html
+
 # ===== Load environment =====
 load_dotenv()
 
@@ -24,6 +26,8 @@ def get_backend_url() -> str:
     return os.getenv("AFREEGUARD_API_URL", default_backend)
 
 API_URL = get_backend_url()
+# the log whose compacted Parquet copy (python -m eventlog.columnar) backs the History section
+HISTORY_LOG = os.getenv("AFREEGUARD_HISTORY_LOG", os.path.join("logs", "events.jsonl"))
 
 # ===== Page Config =====
 st.set_page_config(
@@ -130,191 +134,133 @@ if st.sidebar.button("🧹 Reset Logs"):
     except Exception as e:
         st.sidebar.error(f"Error resetting logs: {e}")
 
-# ===== Backend Check =====
-status_placeholder = st.empty()
+# ===== Shared feed: one poller per dashboard process, read by every session =====
+@st.cache_resource
+def shared_feed(api_url: str) -> SharedFeed:
+    # one request per poll, which is also the health check
+    return SharedFeed(EventFeed(api_url, max_events=2000)).start()
+
+
+STATUS_HTML = {
+    "ok": "<div style='text-align:right; color:#00C851; font-weight:bold;'>🟢 Backend Connected</div>",
+    "http": "<div style='text-align:right; color:#FFBB33; font-weight:bold;'>🟡 Status {}</div>",
+    "error": "<div style='text-align:right; color:#FFBB33; font-weight:bold;'>🟡 {}</div>",
+    "down": "<div style='text-align:right; color:#FF4444; font-weight:bold;'>🔴 Backend not reachable</div>",
+}
+
+# === HEADER with logo ===
+if logo_base64:
+    st.markdown(f"""
+    <div class="afg-header">
+        <img src="data:image/png;base64,{logo_base64}" alt="AFREEGuard Logo">
+        <div class="afg-header-text">
+            <h1>AFREEGuard AI</h1>
+            <p>Real-time Blockchain Security Monitoring • Algorand TestNet</p>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+else:
+    st.markdown("""
+    <div class="afg-header-text">
+        <h1>AFREEGuard AI</h1>
+        <p>Real-time Blockchain Security Monitoring • Algorand TestNet</p>
+    </div>
+    """, unsafe_allow_html=True)
 
-def check_backend():
-    try:
-        res = requests.get(f"{API_URL}/api/logs", timeout=5)
-        if res.status_code == 200:
-            status_placeholder.markdown(
-                "<div style='text-align:right; color:#00C851; font-weight:bold;'>🟢 Backend Connected</div>",
-                unsafe_allow_html=True
-            )
-        else:
-            status_placeholder.markdown(
-                f"<div style='text-align:right; color:#FFBB33; font-weight:bold;'>🟡 Status {res.status_code}</div>",
-                unsafe_allow_html=True
-            )
-    except Exception:
-        status_placeholder.markdown(
-            "<div style='text-align:right; color:#FF4444; font-weight:bold;'>🔴 Backend not reachable</div>",
-            unsafe_allow_html=True
-        )
-
-# ===== Fetch Logs =====
-def fetch_events(limit: int = 2000):
-    try:
-        resp = requests.get(f"{API_URL}/api/logs", timeout=10)
-        if resp.status_code != 200:
-            st.warning(f"⚠️ API returned status {resp.status_code}")
-            return []
-        data = resp.json()
-        return data.get("events", [])[-limit:]
-    except Exception as e:
-        st.error(f"⚠️ Error fetching events: {e}")
-        return []
 
-# ===== Helpers =====
-def is_blocked(row: dict) -> bool:
-    if "blocked" in row:
-        return bool(row.get("blocked"))
-    try:
-        return not bool(row["decision"]["allow"])
-    except Exception:
-        return False
-
-def summarize_row(row: dict) -> dict:
-    ts = row.get("ts") or row.get("timestamp") or ""
-    if isinstance(ts, str):
-        ts_str = ts.replace("T", " ").split(".")[0]
+@st.cache_data(max_entries=4, show_spinner=False)
+def rendered_table(version: int, _view: FeedView):
+    """The table for one feed version, built once for all sessions."""
+    return table_html(_view.frame) if _view.total else None
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def rendered_chart(domains):
+    """The chart for one set of counts, built once for all sessions."""
+    return chart_png(domains) if domains else None
+
+
+# ===== Main Dashboard: only this fragment reruns on the timer =====
+@st.fragment(run_every=refresh_sec)
+def live_panel():
+    feed = shared_feed(API_URL).view()  # memory only; the shared poller does the I/O
+    state, detail = feed.status
+    st.markdown(STATUS_HTML[state].format(detail), unsafe_allow_html=True)
+    if state == "error":
+        st.warning(f"⚠️ API error: {detail}")
+
+    counts = feed.counts()  # all-time from /api/stats, else the rows below
+    chart, table = rendered_chart(counts.domains), rendered_table(feed.version, feed)
+    latest_hash = feed.latest_txid
+
+    # === METRICS ===
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        st.metric("✅ Allowed", counts.allowed)
+    with c2:
+        st.metric("🚫 Blocked", counts.blocked)
+    with c3:
+        st.metric("🔗 Total Events", counts.total)
+    with c4:
+        short_hash = latest_hash[:10] + "..." if latest_hash != "N/A" else "N/A"
+        st.metric("🧱 Latest Block", short_hash)
+
+    if feed.stats is None and feed.total:
+        st.caption(f"Counts cover the latest {feed.total} events (this backend has no /api/stats).")
+
+    st.markdown("---")
+
+    # === CHART ===
+    st.subheader("📊 Activity Overview")
+    if chart is not None:
+        st.image(chart)
     else:
-        ts_str = str(ts)
-    return {
-        "ts": ts_str,
-        "action": row.get("action") or row.get("type", "unknown"),
-        "blocked": is_blocked(row),
-        "reason": row.get("reason", ""),
-        "txid": row.get("txid", "N/A"),
-        "params": row.get("params", {}),
-    }
-
-# ===== Main Dashboard =====
-main_placeholder = st.empty()
-
-while True:
-    check_backend()
-    raw_events = fetch_events()
-    rows = [summarize_row(r) for r in raw_events]
-
-    blocked_rows = [r for r in rows if r["blocked"]]
-    allowed_rows = [r for r in rows if not r["blocked"]]
-    total = len(rows)
-    latest_hash = rows[-1]["txid"] if rows else "N/A"
-
-    with main_placeholder.container():
-        # === HEADER with logo ===
-        if logo_base64:
-            st.markdown(f"""
-            <div class="afg-header">
-                <img src="data:image/png;base64,{logo_base64}" alt="AFREEGuard Logo">
-                <div class="afg-header-text">
-                    <h1>AFREEGuard AI</h1>
-                    <p>Real-time Blockchain Security Monitoring • Algorand TestNet</p>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown("""
-            <div class="afg-header-text">
-                <h1>AFREEGuard AI</h1>
-                <p>Real-time Blockchain Security Monitoring • Algorand TestNet</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-        # === METRICS ===
-        c1, c2, c3, c4 = st.columns(4)
-        with c1:
-            st.metric("✅ Allowed", len(allowed_rows))
-        with c2:
-            st.metric("🚫 Blocked", len(blocked_rows))
-        with c3:
-            st.metric("🔗 Total Events", total)
-        with c4:
-            short_hash = latest_hash[:10] + "..." if latest_hash != "N/A" else "N/A"
-            st.metric("🧱 Latest Block", short_hash)
-
-        st.markdown("---")
-
-        # === CHART ===
-        st.subheader("📊 Activity Overview")
-        if total > 0:
-            fig, ax = plt.subplots(figsize=(5, 2.5))
-            labels = ["Allowed", "Blocked"]
-            values = [len(allowed_rows), len(blocked_rows)]
-            bar_colors = ["#0055AA", "#FFD700"]
-            ax.bar(labels, values, color=bar_colors, edgecolor="#003366")
-            ax.set_facecolor("#FFFFFF")
-            fig.patch.set_facecolor("#FFFFFF")
-            ax.tick_params(colors="#1A1A1A")
-            ax.spines["bottom"].set_color("#E0E0E0")
-            ax.spines["left"].set_color("#E0E0E0")
-            ax.set_title("Events by Decision", color="#003366", fontsize=12, fontweight="bold")
-            st.pyplot(fig)
-            plt.close(fig)
-        else:
-            st.info("No blockchain events yet. Trigger a transaction to see activity.")
-
-        # === TABLE ===
-        st.subheader("🧱 Recent Events")
-        if total > 0:
-            df = pd.DataFrame(rows[::-1])
-            df.rename(columns={
-                "ts": "Time",
-                "action": "Action",
-                "blocked": "Blocked",
-                "reason": "Reason",
-                "txid": "Block Hash",
-                "params": "Params"
-            }, inplace=True)
-
-            def fmt_hash(h):
-                if not h or h == "N/A":
-                    return "N/A"
-                url = f"https://testnet.explorer.perawallet.app/tx/{h}"
-                return f'<a href="{url}" target="_blank">{h[:12]}…</a>'
-
-            df["Block Hash"] = df["Block Hash"].apply(fmt_hash)
-
-            def highlight_row(row):
-                return [
-                    "background-color: #F6FFF6; color:#1A1A1A;" if not row["Blocked"]
-                    else "background-color: #FFF0F0; color:#1A1A1A;"
-                ] * len(row)
-
-            styled = (
-                df.style.apply(highlight_row, axis=1)
-                .set_table_styles([
-                    {"selector": "thead th", "props": [
-                        ("background-color", "#F5F7FA"),
-                        ("color", "#003366"),
-                        ("font-weight", "600"),
-                        ("border-bottom", "1px solid #E0E0E0")
-                    ]},
-                    {"selector": "tbody td", "props": [
-                        ("border", "1px solid #E0E0E0"),
-                        ("padding", "6px 8px")
-                    ]}
-                ])
-            )
-
-            st.markdown("<div class='block-table'>", unsafe_allow_html=True)
-            st.markdown(styled.to_html(), unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-        else:
-            st.info("No blockchain logs yet.")
-
-        # === FOOTER ===
-        st.markdown("---")
-        st.markdown("""
-        <div style="text-align:center; color:#777777; font-size:0.8rem; padding:10px 0;">
-            Powered by <span style="color:#FFD700;">AFREE Labs</span> | 
-            Built on <span style="color:#0055AA;">Algorand TestNet</span> | 
-            © 2025 WOW GLOBAL SOLUTIONS LTD. Member of Fintech Scotland, UK.<br>
-            <a href="https://testnet.explorer.perawallet.app/" target="_blank">🔗 View on Algorand Pera Explorer</a>
-        </div>
-        """, unsafe_allow_html=True)
+        st.info("No blockchain events yet. Trigger a transaction to see activity.")
+
+    # === TABLE ===
+    st.subheader("🧱 Recent Events")
+    if table is not None:
+        st.markdown("<div class='block-table'>", unsafe_allow_html=True)
+        st.markdown(table, unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+    else:
+        st.info("No blockchain logs yet.")
+
 
-    # === REFRESH LOOP ===
-    time.sleep(refresh_sec)
-    st.rerun()
\ No newline at end of file
+live_panel()
+
+
+# ===== History: compacted Parquet, read memory-mapped, only when asked for =====
+@st.cache_data(ttl=300, show_spinner=False)
+def history(start, end, domain):
+    since = datetime.combine(start, datetime.min.time(), timezone.utc).timestamp()
+    until = datetime.combine(end, datetime.max.time(), timezone.utc).timestamp()
+    frame = history_frame(HISTORY_LOG, since=since, until=until, domain=domain or None)
+    return daily_counts(frame), table_html(frame.tail(500)) if len(frame) else None
+
+
+with st.expander("📚 History (compacted)"):
+    today = datetime.now(timezone.utc).date()
+    h1, h2 = st.columns([2, 1])
+    with h1:
+        picked = st.date_input("Days (UTC)", (today - timedelta(days=30), today))
+    with h2:
+        h_domain = st.text_input("Domain", "")
+    if isinstance(picked, (tuple, list)) and len(picked) == 2:
+        counts, h_table = history(picked[0], picked[1], h_domain.strip())
+        if h_table is None:
+            st.info("No compacted events in that range (run `python -m eventlog.columnar`).")
+        else:
+            st.bar_chart(counts)
+            st.markdown(h_table, unsafe_allow_html=True)
+
+# === FOOTER ===
+st.markdown("---")
+st.markdown("""
+<div style="text-align:center; color:#777777; font-size:0.8rem; padding:10px 0;">
+    Powered by <span style="color:#FFD700;">AFREE Labs</span> | 
+    Built on <span style="color:#0055AA;">Algorand TestNet</span> | 
+    © 2025 WOW GLOBAL SOLUTIONS LTD. Member of Fintech Scotland, UK.<br>
+    <a href="https://testnet.explorer.perawallet.app/" target="_blank">🔗 View on Algorand Pera Explorer</a>
+</div>
+""", unsafe_allow_html=True)
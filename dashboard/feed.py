@@ -0,0 +1,360 @@
+# dashboard/feed.py
+"""
+Dashboard data path without Streamlit: a buffer of summarized events that
+is extended from the backend's cursor instead of refetched.
+
+One poll is one HTTP call. The first asks /api/logs for the newest
+`max_events` and keeps its cursor; later ones ask /api/logs/stream for what
+was appended after the cursor, which on an idle backend is an empty page.
+Pages are asked for as MessagePack when msgpack is installed (JSON
+otherwise; see eventlog.wire). The call's outcome doubles as the backend
+health check. New events are summarized a batch at a time into typed
+columns (summarize_frame); `version` only moves when rows change, so the
+app can rebuild its chart and table just then.
+
+Backends without cursors (server.py's /api/logs) are polled as snapshots:
+the buffer is replaced only when the returned events differ.
+
+The Allowed / Blocked / Total tiles and the per-domain chart come from the
+agent's all-time counters (GET /api/stats, see eventlog.store), fetched
+again only when new rows arrived (poll_stats). Backends without /api/stats
+(server.py) fall back to counting the rows of the window.
+
+Older history is read from the compacted Parquet copy of the log
+(eventlog.columnar, memory-mapped) by history_frame(), in the same columns.
+
+SharedFeed runs one EventFeed per dashboard process on a background thread
+and publishes immutable FeedViews, so every browser session reads the same
+rows from memory and the backend sees one poller however many tabs are open.
+"""
+import os
+import threading
+import time
+import warnings
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+from eventlog import columnar, wire
+
+POLL_INTERVAL = float(os.getenv("AFREEGUARD_DASH_POLL_SEC", "2"))  # shared poller period
+
+# (state, detail): ("ok", None) / ("http", status code) / ("error", message) / ("down", message)
+Status = Tuple[str, Any]
+
+
+# summarize_frame() columns, in table order
+COLUMNS = ["ts", "action", "blocked", "reason", "txid", "params"]
+
+
+def summarize_frame(events: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    One dashboard row per event, for a whole list at once, as typed columns: ts as UTC
+    datetime64 (epoch numbers and ISO strings alike; NaT if unreadable),
+    blocked as bool from either "blocked" or the engine's decision.allow,
+    action / reason as categoricals. Each source field is pulled out with
+    one list comprehension; everything after that works on whole columns.
+    """
+    fields = ("ts", "timestamp", "action", "type", "blocked", "reason", "txid", "params")
+    cols = {f: _objects([e.get(f) for e in events]) for f in fields}
+
+    ts = cols["ts"].where(cols["ts"].notna() & (cols["ts"] != ""), cols["timestamp"])
+    blocked = cols["blocked"]
+    if blocked.isna().any():
+        allow = _objects([d.get("allow") if d.__class__ is dict else None
+                          for d in (e.get("decision") for e in events)])
+    else:
+        allow = blocked
+    blocked = blocked.where(blocked.notna(), ~allow.fillna(True).astype(bool)).astype(bool)
+    action = cols["action"].where(cols["action"].notna() & (cols["action"] != ""), cols["type"])
+    params = cols["params"]
+    if params.isna().any():
+        params = params.where(params.notna(), _objects([{}] * len(params)))
+    return pd.DataFrame({
+        "ts": _parse_times(ts),
+        "action": pd.Categorical(action.fillna("unknown")),
+        "blocked": blocked.to_numpy(dtype=bool),
+        "reason": pd.Categorical(cols["reason"].fillna("")),
+        "txid": cols["txid"].fillna("N/A").astype(str),
+        "params": params,
+    }, columns=COLUMNS)
+
+
+def history_frame(log_path, *, since: Optional[float] = None, until: Optional[float] = None,
+                  domain: Optional[str] = None, limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    Compacted events (columnar.load; partitions pruned, files memory-mapped)
+    in summarize_frame()'s columns, oldest first; the newest `limit` if set.
+    Empty when pyarrow is missing or nothing has been compacted yet.
+    """
+    if columnar.pa is None or not os.path.isdir(columnar.dataset_dir(log_path)):
+        return summarize_frame([])
+    table = columnar.load(log_path, since=since, until=until, domain=domain,
+                          columns=["seq", "ts", "action", "blocked", "reason", "txid", "params"])
+    if limit is not None and table.num_rows > limit:
+        table = table.slice(table.num_rows - limit)
+    df = table.to_pandas()
+    return pd.DataFrame({
+        "ts": df["ts"].astype("datetime64[us, UTC]"),
+        "action": pd.Categorical(df["action"].fillna("unknown")),
+        "blocked": df["blocked"].fillna(False).to_numpy(dtype=bool),
+        "reason": pd.Categorical(df["reason"].fillna("")),
+        "txid": df["txid"].fillna("N/A").astype(str),
+        "params": df["params"].fillna("{}"),  # JSON text, as compacted
+    }, columns=COLUMNS)
+
+
+def daily_counts(frame: pd.DataFrame) -> pd.DataFrame:
+    """Allowed / blocked per UTC day of a summarize_frame()-shaped frame."""
+    days = frame["ts"].dt.strftime("%Y-%m-%d")
+    counts = pd.crosstab(days, frame["blocked"]).reindex(columns=[False, True], fill_value=0)
+    counts.columns = ["Allowed", "Blocked"]
+    counts.index.name = "date"
+    return counts
+
+
+def _objects(values) -> pd.Series:
+    return pd.Series(values, dtype=object)
+
+
+def _parse_times(ts: pd.Series) -> pd.Series:
+    """Epoch seconds / ISO-8601 strings (naive = UTC) -> datetime64[us, UTC]."""
+    kinds = ts.map(type)
+    out = np.full(len(ts), np.datetime64("NaT"), dtype="datetime64[us]")
+    num = kinds.isin((int, float)).to_numpy()
+    if num.any():
+        secs = ts[num].to_numpy(dtype=float)
+        us = np.where(np.isnan(secs), np.iinfo("int64").min, secs * 1e6).astype("int64")
+        out[num] = us.view("datetime64[us]")
+    text = (kinds == str).to_numpy()
+    if text.any():
+        strings = ts[text]
+        try:
+            # numpy's parser is several times faster than pandas' ISO8601 path,
+            # but knows no offsets: it warns on them, and then pandas does the job
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                out[text] = np.array([v[:-1] if v[-1:] == "Z" else v for v in strings], dtype="datetime64[us]")
+        except (ValueError, Warning):
+            parsed = pd.to_datetime(strings, utc=True, format="ISO8601", errors="coerce")
+            out[text] = parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+    return pd.Series(out).dt.tz_localize("UTC")
+
+
+class EventFeed:
+    """
+    The newest `max_events` summarized events (oldest first) as a
+    summarize_frame() DataFrame, plus allowed / blocked counts over them.
+    Each change builds a new frame rather than editing the old one, so a
+    frame handed out earlier never changes under its reader.
+    """
+
+    def __init__(self, api_url: str, *, max_events: int = 2000, timeout: float = 10,
+                 session: Optional[requests.Session] = None):
+        self.api_url = api_url.rstrip("/")
+        self.max_events = max_events
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.frame: pd.DataFrame = summarize_frame([])
+        self.allowed = 0
+        self.blocked = 0
+        self.cursor: Optional[int] = None
+        self.incremental = True
+        self.version = 0
+        self.status: Status = ("down", "not polled yet")
+        self._snapshot: Optional[List[Dict[str, Any]]] = None
+        self.stats: Optional[Stats] = None  # None: the backend has no /api/stats (yet)
+        self.has_stats = True  # until it answers 404
+        self._stats_version = -1  # feed version the stats were fetched at
+
+    @property
+    def total(self) -> int:
+        return len(self.frame)
+
+    @property
+    def latest_txid(self) -> str:
+        return self.frame["txid"].iat[-1] if len(self.frame) else "N/A"
+
+    def poll_stats(self) -> bool:
+        """
+        Refresh `stats` from /api/stats if rows changed since the last fetch.
+        Returns whether stats are available; never raises.
+        """
+        if not self.has_stats or self._stats_version == self.version:
+            return self.stats is not None
+        try:
+            resp = self.session.get(f"{self.api_url}/api/stats", params={"res": "hour"},
+                                    timeout=self.timeout, headers={"Accept": wire.JSON})
+        except requests.RequestException:
+            return self.stats is not None  # the event poll reports the outage
+        if resp.status_code == 404:
+            self.has_stats, self.stats = False, None
+            return False
+        try:
+            data = wire.decode(resp.content, resp.headers.get("Content-Type"))
+        except ValueError:
+            data = None
+        if resp.status_code != 200 or not isinstance(data, dict) or data.get("ok") is False:
+            return self.stats is not None  # transient; keep the last counts
+        if not isinstance(data.get("total"), int) or not isinstance(data.get("keys"), list):
+            self.has_stats, self.stats = False, None  # something else answers on that path
+            return False
+        domains: Dict[str, List[int]] = {}
+        for key in data["keys"]:
+            if isinstance(key, dict) and key.get("blocked") is not None:
+                counts = domains.setdefault(key.get("domain") or "(none)", [0, 0])
+                counts[bool(key["blocked"])] += key.get("n", 0)
+        self.stats = Stats(data["total"], data.get("allowed", 0), data.get("blocked", 0),
+                           tuple(sorted((d, a, b) for d, (a, b) in domains.items())))
+        self._stats_version = self.version
+        return True
+
+    def poll(self) -> int:
+        """One request for new events. Returns how many rows were added; never raises."""
+        if self.cursor is None:
+            url, params = f"{self.api_url}/api/logs", {"limit": self.max_events}
+        else:
+            url, params = f"{self.api_url}/api/logs/stream", {"offset": self.cursor, "limit": self.max_events}
+        try:
+            resp = self.session.get(url, params=params, timeout=self.timeout,
+                                    headers={"Accept": wire.accept_header()})
+        except requests.RequestException as e:
+            self.status = ("down", str(e))
+            return 0
+        if resp.status_code != 200:
+            self.status = ("http", resp.status_code)
+            return 0
+        try:
+            data = wire.decode(resp.content, resp.headers.get("Content-Type"))
+        except ValueError as e:  # msgpack's errors are ValueErrors too
+            self.status = ("error", f"bad response: {e}")
+            return 0
+        if not isinstance(data, dict):
+            self.status = ("error", f"bad response: {type(data).__name__} body")
+            return 0
+        if data.get("ok") is False:
+            self.status = ("error", data.get("error"))
+            return 0
+        events = data.get("events", [])
+        if not isinstance(events, list) or not all(isinstance(e, dict) for e in events):
+            self.status = ("error", "bad response: events is not a list of objects")
+            return 0
+        self.status = ("ok", None)
+
+        if "cursor" not in data:
+            # no cursor support: snapshot polling
+            self.incremental = False
+            if events == self._snapshot:
+                return 0
+            self._snapshot = events
+            self._clear()
+            return self._extend(events)
+        self.cursor = data["cursor"]
+        return self._extend(events)
+
+    def _clear(self):
+        self.frame = summarize_frame([])
+        self.allowed = self.blocked = 0
+
+    def _extend(self, events: List[Dict[str, Any]]) -> int:
+        if not events:
+            return 0
+        new = summarize_frame(events[-self.max_events:])
+        if len(self.frame):
+            frame = pd.concat([self.frame, new], ignore_index=True).tail(self.max_events)
+            # concat of categoricals with different categories gives objects
+            for name in ("action", "reason"):
+                frame[name] = frame[name].astype("category")
+            new = frame.reset_index(drop=True)
+        self.frame = new
+        self.blocked = int(new["blocked"].sum())
+        self.allowed = len(new) - self.blocked
+        self.version += 1
+        return len(events)
+
+
+class Stats(NamedTuple):
+    """All-time decision counts from /api/stats."""
+    total: int
+    allowed: int
+    blocked: int
+    domains: Tuple[Tuple[str, int, int], ...]  # (domain, allowed, blocked), by domain
+
+
+class FeedView(NamedTuple):
+    """One published state of a feed; never mutated, so sessions share it without locks."""
+    version: int
+    frame: pd.DataFrame
+    allowed: int  # in the window
+    blocked: int
+    status: Status
+    polled_at: float
+    stats: Optional[Stats] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.frame)
+
+    def counts(self) -> Stats:
+        """What the tiles and the chart show: all-time stats, else the window's own counts."""
+        if self.stats is not None:
+            return self.stats
+        return Stats(self.total, self.allowed, self.blocked,
+                     (("last events", self.allowed, self.blocked),) if self.total else ())
+
+    @property
+    def latest_txid(self) -> str:
+        return self.frame["txid"].iat[-1] if len(self.frame) else "N/A"
+
+
+class SharedFeed:
+    """
+    A process-wide poller: refresh() polls the wrapped EventFeed and swaps in
+    a new FeedView with one assignment; view() just returns the current one.
+    """
+
+    def __init__(self, feed: EventFeed, *, interval: float = POLL_INTERVAL):
+        self.feed = feed
+        self.interval = interval
+        self._view = FeedView(0, feed.frame, 0, 0, feed.status, 0.0)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def view(self) -> FeedView:
+        return self._view
+
+    def refresh(self) -> FeedView:
+        feed = self.feed
+        feed.poll()
+        if feed.status[0] == "ok":
+            feed.poll_stats()  # a request only when rows changed
+        self._view = FeedView(feed.version, feed.frame, feed.allowed, feed.blocked, feed.status,
+                              time.time(), feed.stats)
+        return self._view
+
+    # ---- background polling ----
+    def start(self) -> "SharedFeed":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="dashboard-feed")
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                # keep the last rows; sessions see the error in the status
+                print("Dashboard feed refresh failed:", e)
+                self._view = self._view._replace(status=("error", f"{type(e).__name__}: {e}"),
+                                                 polled_at=time.time())
+            self._stop.wait(self.interval)
@@ -0,0 +1,80 @@
+# dashboard/view.py
+"""
+The dashboard's heavy renders, as plain functions of the summarized events
+(dashboard.feed.summarize_frame) so the app can build them once per new
+batch of events and reuse the output.
+"""
+import io
+from typing import Sequence, Tuple
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+
+def fmt_hash(h):
+    if not h or h == "N/A":
+        return "N/A"
+    url = f"https://testnet.explorer.perawallet.app/tx/{h}"
+    return f'<a href="{url}" target="_blank">{h[:12]}…</a>'
+
+
+def highlight_row(row):
+    return [
+        "background-color: #F6FFF6; color:#1A1A1A;" if not row["Blocked"]
+        else "background-color: #FFF0F0; color:#1A1A1A;"
+    ] * len(row)
+
+
+def chart_png(domains: Sequence[Tuple[str, int, int]]) -> bytes:
+    """The "Events by Decision" bar chart, allowed / blocked side by side per domain, as PNG bytes."""
+    fig, ax = plt.subplots(figsize=(max(5, 1.2 * len(domains)), 2.5))
+    x = np.arange(len(domains))
+    ax.bar(x - 0.2, [a for _, a, _ in domains], 0.4, label="Allowed", color="#0055AA", edgecolor="#003366")
+    ax.bar(x + 0.2, [b for _, _, b in domains], 0.4, label="Blocked", color="#FFD700", edgecolor="#003366")
+    ax.set_xticks(x, [d for d, _, _ in domains])
+    ax.legend(frameon=False, fontsize=8)
+    ax.set_facecolor("#FFFFFF")
+    fig.patch.set_facecolor("#FFFFFF")
+    ax.tick_params(colors="#1A1A1A")
+    ax.spines["bottom"].set_color("#E0E0E0")
+    ax.spines["left"].set_color("#E0E0E0")
+    ax.set_title("Events by Decision", color="#003366", fontsize=12, fontweight="bold")
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def table_html(frame: pd.DataFrame) -> str:
+    """The "Recent Events" table (newest first) as styled HTML."""
+    df = frame.iloc[::-1].copy()
+    df["ts"] = df["ts"].dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
+    df.rename(columns={
+        "ts": "Time",
+        "action": "Action",
+        "blocked": "Blocked",
+        "reason": "Reason",
+        "txid": "Block Hash",
+        "params": "Params"
+    }, inplace=True)
+    df["Block Hash"] = df["Block Hash"].apply(fmt_hash)
+
+    styled = (
+        df.style.apply(highlight_row, axis=1)
+        .set_table_styles([
+            {"selector": "thead th", "props": [
+                ("background-color", "#F5F7FA"),
+                ("color", "#003366"),
+                ("font-weight", "600"),
+                ("border-bottom", "1px solid #E0E0E0")
+            ]},
+            {"selector": "tbody td", "props": [
+                ("border", "1px solid #E0E0E0"),
+                ("padding", "6px 8px")
+            ]}
+        ])
+    )
+    return styled.to_html()
@@ -0,0 +1,193 @@
+# eventlog/columnar.py
+"""
+Compaction of closed event-log segments into Parquet, partitioned by date
+and domain, for bulk analysis (pandas / pyarrow) without json.loads per row.
+
+    logs/events-000001.jsonl.gz                          closed segment
+    logs/events.parquet/date=2025-01-01/domain=finance/part-000001.parquet
+    logs/events.parquet/_compacted.json                  {"segments": [1, ...]}
+
+A segment is converted once, into one file per (date, domain) it touches,
+named after the segment so a re-run overwrites rather than duplicates; it is
+recorded as compacted only after all its files are in place. The active
+file is never read: it is still being written.
+
+Every file has the same schema (_schema()); date and domain come from the
+directory names. `params` is kept as a JSON string, since its keys differ per
+action. Requires pyarrow (optional dependency).
+"""
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from . import segments
+from .schema import event_blocked, event_reason, event_time
+
+try:  # optional; only this module needs it
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _require():
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow; pip install pyarrow")
+
+
+def _schema() -> "pa.Schema":
+    return pa.schema([("seq", pa.int64()), ("ts", pa.timestamp("us", tz="UTC")),
+                      ("action", pa.string()), ("blocked", pa.bool_()), ("reason", pa.string()),
+                      ("user_input", pa.string()), ("txid", pa.string()), ("params", pa.string())])
+
+
+def _partitioning() -> "ds.Partitioning":
+    return ds.partitioning(pa.schema([("date", pa.string()), ("domain", pa.string())]), flavor="hive")
+
+
+def dataset_dir(path) -> str:
+    """logs/events.jsonl -> logs/events.parquet"""
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), segments._stem(path) + ".parquet")
+
+
+def to_row(event: Dict[str, Any]) -> Tuple[Tuple[str, str], Dict[str, Any]]:
+    """((date, domain) partition, row) for one event; missing values become NULL_PARTITION / None."""
+    t = event_time(event)
+    when = datetime.fromtimestamp(t, timezone.utc) if t is not None else None
+    domain = event.get("domain")
+    params = event.get("params")
+    row = {
+        "seq": event.get("seq") if isinstance(event.get("seq"), int) else None,
+        "ts": when,
+        "action": _str(event.get("action")),
+        "blocked": event_blocked(event),
+        "reason": event_reason(event),
+        "user_input": _str(event.get("user_input")),
+        "txid": _str(event.get("txid")),
+        "params": None if params is None else json.dumps(params, sort_keys=True, default=str),
+    }
+    key = (when.date().isoformat() if when else NULL_PARTITION,
+           quote(str(domain), safe="") if domain not in (None, "") else NULL_PARTITION)
+    return key, row
+
+
+def _str(value: Any) -> Optional[str]:
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def partition(events: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    out: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for event in events:
+        key, row = to_row(event)
+        out.setdefault(key, []).append(row)
+    return out
+
+
+# ---- compaction ----
+def _state_path(root: str) -> str:
+    return os.path.join(root, "_compacted.json")
+
+
+def compacted(path) -> List[int]:
+    """Seq numbers of the segments already converted."""
+    try:
+        with open(_state_path(dataset_dir(path)), "r", encoding="utf-8") as f:
+            return json.load(f)["segments"]
+    except FileNotFoundError:
+        return []
+
+
+def _save_state(root: str, done: List[int]):
+    tmp = _state_path(root) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"segments": sorted(done)}, f)
+    os.replace(tmp, _state_path(root))
+
+
+def compact_segment(path, seg: Dict[str, Any]) -> int:
+    """Write one closed segment's partitions. Returns the number of files written."""
+    _require()
+    root = dataset_dir(path)
+    with segments.open_segment(path, seg) as f:
+        parts = partition(segments._iter_lines(f))
+    schema = _schema()
+    for (date, domain), rows in parts.items():
+        target_dir = os.path.join(root, f"date={date}", f"domain={domain}")
+        os.makedirs(target_dir, exist_ok=True)
+        name = f"part-{seg['seq']:06d}.parquet"
+        tmp = os.path.join(target_dir, "." + name)  # dot files are skipped by readers
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), tmp, compression="zstd")
+        os.replace(tmp, os.path.join(target_dir, name))
+    return len(parts)
+
+
+def compact(path) -> Dict[str, int]:
+    """Convert every closed segment of the log at `path` not converted yet."""
+    _require()
+    root = dataset_dir(path)
+    os.makedirs(root, exist_ok=True)
+    done = compacted(path)
+    stats = {"segments": 0, "files": 0}
+    for seg in segments.load_manifest(path)["segments"]:
+        if seg["seq"] in done:
+            continue
+        stats["files"] += compact_segment(path, seg)
+        stats["segments"] += 1
+        done.append(seg["seq"])
+        _save_state(root, done)
+    return stats
+
+
+# ---- reading ----
+def dataset(path) -> "ds.Dataset":
+    """The compacted log as a pyarrow dataset; files are memory-mapped when read."""
+    _require()
+    return ds.dataset(dataset_dir(path), format="parquet", partitioning=_partitioning(),
+                      filesystem=fs.LocalFileSystem(use_mmap=True))
+
+
+def load(path, *, since: Optional[float] = None, until: Optional[float] = None,
+         domain: Optional[str] = None, columns: Optional[List[str]] = None) -> "pa.Table":
+    """
+    Compacted events as an Arrow table, sorted by seq. `since`/`until` (epoch
+    seconds, inclusive) and `domain` prune partitions before any file is read.
+    """
+    d = dataset(path)
+    cond = None
+
+    def both(c):
+        return c if cond is None else cond & c
+
+    if domain is not None:
+        cond = both(ds.field("domain") == domain)  # directory names are URI-decoded on read
+    if since is not None:
+        start = datetime.fromtimestamp(since, timezone.utc)
+        cond = both(ds.field("date") >= start.date().isoformat())
+        cond = cond & (ds.field("ts") >= pa.scalar(start, pa.timestamp("us", tz="UTC")))
+    if until is not None:
+        end = datetime.fromtimestamp(until, timezone.utc)
+        cond = both(ds.field("date") <= end.date().isoformat())
+        cond = cond & (ds.field("ts") <= pa.scalar(end, pa.timestamp("us", tz="UTC")))
+    table = d.to_table(columns=columns, filter=cond)
+    if columns is None or "seq" in columns:
+        table = table.sort_by("seq")
+    return table
+
+
+def load_frame(path, **kwargs):
+    """load() as a pandas DataFrame."""
+    return load(path, **kwargs).to_pandas()
+
+
+if __name__ == "__main__":
+    import sys
+
+    log = sys.argv[1] if len(sys.argv) > 1 else os.path.join("logs", "events.jsonl")
+    print(compact(log))
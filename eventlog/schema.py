@@ -0,0 +1,50 @@
+# eventlog/schema.py
+"""
+Helpers that read fields off events regardless of which writer produced them:
+the engine writes {"ts": <epoch float>, "decision": {"allow": ...}}, the agent
+{"ts": "<iso>Z", "blocked": ...}, blockchain.logger {"ts": str(datetime), ...}
+and the simulators {"timestamp": "<iso>"}.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+
+def parse_ts(value: Any) -> Optional[float]:
+    """Epoch seconds from an epoch number or an ISO-8601 string (naive = UTC)."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+def event_time(event: Dict[str, Any]) -> Optional[float]:
+    ts = event.get("ts")
+    if ts is None:
+        ts = event.get("timestamp")
+    return parse_ts(ts)
+
+
+def event_blocked(event: Dict[str, Any]) -> Optional[bool]:
+    """The agent's "blocked", else the engine's inverted decision.allow; None if neither is there."""
+    if "blocked" in event:
+        return bool(event["blocked"])
+    decision = event.get("decision")
+    if isinstance(decision, dict) and "allow" in decision:
+        return not decision["allow"]
+    return None
+
+
+def event_reason(event: Dict[str, Any]) -> Optional[str]:
+    reason = event.get("reason")
+    if reason is None and isinstance(event.get("decision"), dict):
+        reason = event["decision"].get("reason")
+    return reason if reason is None or isinstance(reason, str) else str(reason)
@@ -0,0 +1,424 @@
+# eventlog/segments.py
+"""
+Size/age based rotation of a JSONL event log into compressed segments.
+
+    logs/events.jsonl                 active segment (appended by the sink)
+    logs/events-000001.jsonl.gz       closed segments
+    logs/events.manifest.json         {"active_offset": int, "segments": [...]}
+    logs/events.lock                  writers' flock; holds the last seq number
+
+Each manifest entry records the segment's file, codec, event count, first/last
+event time and seq, and its byte range in the logical (uncompressed, concatenated) log:
+`offset` is where it starts and `bytes` its uncompressed size, so a position
+in the log stays valid across rotations. Time-bounded reads only open the
+segments whose time range overlaps the request.
+
+Rotation only moves the active file (events-000001.jsonl) and lists it as
+"pending"; it is compressed afterwards, off the writers' lock, and its entry
+switched to the compressed file once that is complete. A pending segment is
+readable as is, and one left by a crash is compressed by the next writer.
+"""
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .schema import event_time
+
+try:  # POSIX; without it only one process may write a log
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:  # optional, better ratio/speed than gzip
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ("gzip", "zstd", "none")
+SUFFIX = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+DEFAULT_ROTATE_BYTES = int(float(os.getenv("AFREEGUARD_LOG_ROTATE_MB", "64")) * 1024 * 1024)
+DEFAULT_ROTATE_AGE = float(os.getenv("AFREEGUARD_LOG_ROTATE_HOURS", "24")) * 3600
+DEFAULT_COMPRESSION = os.getenv("AFREEGUARD_LOG_COMPRESSION", "gzip")
+
+
+# ---- manifest ----
+def _stem(path: str) -> str:
+    base = os.path.basename(path)
+    return base[:-len(".jsonl")] if base.endswith(".jsonl") else base
+
+
+def manifest_path(path) -> str:
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), _stem(path) + ".manifest.json")
+
+
+def load_manifest(path) -> Dict[str, Any]:
+    try:
+        with open(manifest_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"active_offset": 0, "segments": []}
+
+
+def _save_manifest(path, manifest: Dict[str, Any]):
+    target = manifest_path(path)
+    tmp = target + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, target)
+
+
+# ---- reading ----
+def open_segment(path, seg: Dict[str, Any]) -> io.TextIOBase:
+    """Open a closed segment (listed in the manifest of `path`) for text reading."""
+    full = os.path.join(os.path.dirname(os.path.abspath(path)), seg["file"])
+    if not os.path.exists(full):
+        # compressed since the caller read the manifest: same events, new file
+        fresh = next((s for s in load_manifest(path)["segments"] if s["seq"] == seg["seq"]), seg)
+        full, seg = os.path.join(os.path.dirname(full), fresh["file"]), fresh
+    codec = seg.get("codec", "none")
+    if codec == "gzip":
+        return gzip.open(full, "rt", encoding="utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("segment is zstd-compressed; pip install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(full, "rb"), closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return open(full, "r", encoding="utf-8")
+
+
+def segments_between(path, since: Optional[float] = None,
+                     until: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Closed segments whose [first_ts, last_ts] overlaps [since, until]."""
+    out = []
+    for seg in load_manifest(path)["segments"]:
+        first, last = seg.get("first_ts"), seg.get("last_ts")
+        if since is not None and last is not None and last < since:
+            continue
+        if until is not None and first is not None and first > until:
+            continue
+        out.append(seg)
+    return out
+
+
+def _iter_lines(f) -> Iterator[Dict[str, Any]]:
+    for line in f:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def read_events(path, since: Optional[float] = None,
+                until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Events (oldest first) with since <= ts <= until, opening only the
+    segments that can contain them plus the active file. With no bounds,
+    every event is returned, including ones without a readable ts.
+    """
+    bounded = since is not None or until is not None
+
+    def keep(evt):
+        if not bounded:
+            return True
+        t = event_time(evt)
+        return t is not None and (since is None or t >= since) and (until is None or t <= until)
+
+    for seg in segments_between(path, since, until):
+        with open_segment(path, seg) as f:
+            yield from filter(keep, _iter_lines(f))
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from filter(keep, _iter_lines(f))
+
+
+# ---- writing ----
+def lock_path(path) -> str:
+    path = os.path.abspath(path)
+    return os.path.join(os.path.dirname(path), _stem(path) + ".lock")
+
+
+class LogLock:
+    """
+    Exclusive lock for everything that writes one log, across threads and
+    processes (flock on the sidecar file, plus a thread lock since flock is
+    per open file). The file also stores the last seq number handed out, so
+    writers in different processes continue one sequence.
+    """
+
+    def __init__(self, path):
+        self.path = lock_path(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "LogLock":
+        self._lock.acquire()
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._lock.release()
+                raise
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def read_seq(self) -> Optional[int]:
+        raw = os.pread(self._fd, 32, 0).strip()
+        return int(raw) if raw.isdigit() else None
+
+    def write_seq(self, seq: int):
+        os.pwrite(self._fd, b"%20d\n" % seq, 0)  # fixed width: no truncate needed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class SegmentedWriter:
+    """
+    Appends to the active file and rotates it once it is larger than
+    `max_bytes` or older than `max_age` seconds (0 disables either).
+
+    Several processes may append to one log (the agent and its workers,
+    blockchain/logger.py, simulators): append() and rotate() must run under
+    `lock`, and refresh() there re-reads the manifest and the active file's
+    size that another process may have changed. rotate() only moves the file;
+    compression, which is also where the segment's count and time range are
+    collected, runs on a helper thread (compress_pending()).
+    """
+
+    def __init__(self, path, *, max_bytes: int = DEFAULT_ROTATE_BYTES,
+                 max_age: float = DEFAULT_ROTATE_AGE, compression: str = DEFAULT_COMPRESSION):
+        if compression not in CODECS:
+            raise ValueError(f"compression must be one of {CODECS}, got {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            print("[LOG] zstandard not installed; compressing segments with gzip")
+            compression = "gzip"
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+        self.lock = LogLock(self.path)
+        self.manifest = {"active_offset": 0, "segments": []}
+        self._manifest_sig: Optional[Tuple[int, int, int]] = None
+        self._active_ino: Optional[int] = None
+        self.size = 0
+        self.opened = time.time()
+        self._compressor: Optional[threading.Thread] = None
+        self._bg_lock = threading.Lock()
+        self._more = False
+        with self.lock:
+            self.refresh()
+        if any(seg.get("pending") for seg in self.manifest["segments"]):
+            self.compress_in_background()  # left by a crash
+
+    def refresh(self):
+        """Re-read what other writers may have changed: the manifest and the active file. Under `lock`."""
+        try:
+            st = os.stat(manifest_path(self.path))
+            sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            sig = None
+        if sig != self._manifest_sig:
+            self.manifest = load_manifest(self.path)
+            self._manifest_sig = sig
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.size, self._active_ino = 0, None
+            return
+        self.size = st.st_size
+        if st.st_ino != self._active_ino:
+            self._active_ino = st.st_ino
+            self._recover_active()
+
+    def _recover_active(self):
+        """Age of an active file someone else started (or a previous run left)."""
+        self.opened = time.time()
+        if self.size:
+            with open(self.path, "r", encoding="utf-8") as f:
+                first = next(_iter_lines(f), None)
+            t = event_time(first) if first else None
+            self.opened = t if t is not None else os.path.getmtime(self.path)
+
+    def _save(self):
+        _save_manifest(self.path, self.manifest)
+        st = os.stat(manifest_path(self.path))
+        self._manifest_sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @property
+    def end_offset(self) -> int:
+        """Logical offset just past the last byte written."""
+        return self.manifest["active_offset"] + self.size
+
+    def should_rotate(self, incoming: int = 0) -> bool:
+        if not self.size:
+            return False
+        if self.max_bytes and self.size + incoming > self.max_bytes:
+            return True
+        return bool(self.max_age) and time.time() - self.opened >= self.max_age
+
+    def append(self, text: str):
+        """Append whole lines. Under `lock`, after refresh()."""
+        data = text.encode("utf-8")
+        if self.should_rotate(len(data)):
+            self.rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            st = os.fstat(f.fileno())
+        if not self.size or st.st_ino != self._active_ino:
+            self.opened = time.time()
+        self.size, self._active_ino = st.st_size, st.st_ino
+
+    def rotate(self):
+        """
+        Close the active file: move it to its segment name and list it as
+        pending (uncompressed) in the manifest. Under `lock`; cheap, the
+        compression happens later on a helper thread.
+        """
+        if not self.size:
+            return
+        segments = self.manifest["segments"]
+        seq = segments[-1]["seq"] + 1 if segments else 1
+        name = f"{_stem(self.path)}-{seq:06d}.jsonl"
+        target = os.path.join(os.path.dirname(self.path), name)
+        if os.path.exists(target):
+            os.remove(target)  # left by a crash before the manifest listed it
+        # a second name for the file, not a copy; readers keep finding the
+        # events in the active file until the manifest lists the segment
+        os.link(self.path, target)
+        size = os.path.getsize(target)
+        segments.append({
+            "seq": seq,
+            "file": name,
+            "codec": "none",
+            "pending": self.compression,
+            "count": None,
+            "first_ts": None,
+            "last_ts": None,
+            "offset": self.manifest["active_offset"],
+            "bytes": size,
+            "closed_at": time.time(),
+        })
+        self.manifest["active_offset"] += size
+        self._save()
+        os.remove(self.path)
+        self.size, self._active_ino = 0, None
+        self.opened = time.time()
+        self.compress_in_background()
+
+    # ---- compression (off the lock) ----
+    def compress_in_background(self):
+        with self._bg_lock:
+            self._more = True
+            if self._compressor is None:
+                self._compressor = threading.Thread(target=self._compress_loop, daemon=True,
+                                                    name=f"log-compress:{os.path.basename(self.path)}")
+                self._compressor.start()
+
+    def _compress_loop(self):
+        # runs until no rotation asked for more, deciding that under the lock
+        while True:
+            with self._bg_lock:
+                if not self._more:
+                    self._compressor = None
+                    return
+                self._more = False
+            self.compress_pending()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for the helper thread (e.g. before exit, so segments end up compressed)."""
+        compressor = self._compressor
+        if compressor is not None:
+            compressor.join(timeout)
+
+    def compress_pending(self) -> int:
+        """
+        Compress the pending segments and collect their count / time range.
+        The lock is only held to read and to update the manifest, so writers
+        keep appending meanwhile. Returns how many segments were finished.
+        """
+        with self.lock:
+            self.refresh()
+            todo = [dict(seg) for seg in self.manifest["segments"] if seg.get("pending")]
+        done = 0
+        folder = os.path.dirname(self.path)
+        for seg in todo:
+            codec = seg["pending"]
+            name = seg["file"] + SUFFIX[codec]
+            tmp = os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+            stats = {"count": 0, "first_ts": None, "last_ts": None, "first_seq": None,
+                     "last_seq": None, "bytes": 0}
+            try:
+                with open(os.path.join(folder, seg["file"]), "rb") as src, \
+                        (_compressor(tmp, codec) if codec != "none" else nullcontext()) as dst:
+                    for line in src:
+                        if dst is not None:
+                            dst.write(line)
+                        _observe(stats, line)
+            except FileNotFoundError:
+                continue  # another process finished it
+            except OSError as e:
+                print(f"[LOG] Segment compression failed ({seg['file']}): {e}")
+                continue
+            with self.lock:
+                self.refresh()
+                entry = next((s for s in self.manifest["segments"] if s["seq"] == seg["seq"]), None)
+                if entry is None or not entry.get("pending"):
+                    if codec != "none":
+                        os.remove(tmp)
+                    continue
+                if codec != "none":
+                    os.replace(tmp, os.path.join(folder, name))
+                entry.pop("pending")
+                entry.update(file=name, codec=codec, count=stats["count"],
+                             first_ts=stats["first_ts"], last_ts=stats["last_ts"],
+                             first_seq=stats["first_seq"], last_seq=stats["last_seq"])
+                self._save()
+            if codec != "none":
+                os.remove(os.path.join(folder, seg["file"]))  # readers now open `name`
+            done += 1
+        return done
+
+    def close(self, timeout: Optional[float] = None):
+        self.wait(timeout)
+        self.lock.close()
+
+
+def _compressor(target: str, codec: str):
+    if codec == "gzip":
+        return gzip.open(target, "wb")
+    if codec == "zstd":
+        return zstandard.ZstdCompressor().stream_writer(open(target, "wb"), closefd=True)
+    return open(target, "wb")
+
+
+def _observe(stats: Dict[str, Any], line: bytes):
+    stats["bytes"] += len(line)
+    if not line.strip():
+        return
+    stats["count"] += 1
+    try:
+        evt = json.loads(line)
+        t = event_time(evt)
+    except (ValueError, AttributeError):
+        return
+    seq = evt.get("seq")
+    if isinstance(seq, int):
+        stats["first_seq"] = seq if stats["first_seq"] is None else min(stats["first_seq"], seq)
+        stats["last_seq"] = seq if stats["last_seq"] is None else max(stats["last_seq"], seq)
+    if t is not None:
+        stats["first_ts"] = t if stats["first_ts"] is None else min(stats["first_ts"], t)
+        stats["last_ts"] = t if stats["last_ts"] is None else max(stats["last_ts"], t)
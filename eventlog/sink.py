@@ -0,0 +1,332 @@
+# eventlog/sink.py
+"""
+Shared, buffered writer for newline-delimited JSON event logs.
+
+Callers serialize the event and enqueue it; one background thread per log
+file drains the queue and appends whole batches with a single write (group
+commit), so request threads never wait on the file and lines never interleave.
+"""
+import asyncio
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import tail
+from .segments import (DEFAULT_COMPRESSION, DEFAULT_ROTATE_AGE, DEFAULT_ROTATE_BYTES,
+                       SegmentedWriter)
+from .store import EventStore, store_path
+
+# what emit() does when the queue is full
+ON_FULL = ("block", "drop", "spill")
+
+DEFAULT_MAX_QUEUE = int(os.getenv("AFREEGUARD_LOG_QUEUE", "10000"))
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("AFREEGUARD_LOG_FLUSH_MS", "50")) / 1000
+DEFAULT_FLUSH_SIZE = int(os.getenv("AFREEGUARD_LOG_FLUSH_SIZE", "256"))
+DEFAULT_ON_FULL = os.getenv("AFREEGUARD_LOG_ON_FULL", "block")
+# logs (by file name) that get an indexed SQLite copy, see eventlog.store
+INDEXED_LOGS = set(filter(None, os.getenv("AFREEGUARD_LOG_INDEX", "events.jsonl").split(",")))
+
+_STOP = object()
+
+
+class EventSink:
+    """
+    Background writer for one JSONL file.
+
+    - emit()/emit_many() serialize on the caller's thread and enqueue.
+    - The writer thread waits for the first queued item, then keeps collecting
+      for up to `flush_interval` seconds or `flush_size` lines and appends
+      them all with one write.
+    - When the bounded queue is full, `on_full` decides: "block" waits for
+      room, "drop" discards the event and counts it, "spill" appends the line
+      synchronously on the caller's thread (under the writer's lock, so lines
+      stay whole; it may land ahead of older queued events).
+    - aemit()/aemit_many() are the same for coroutines: the common case is a
+      non-blocking enqueue on the loop; only a full queue hands the on_full
+      policy (which may wait or write) to a worker thread.
+    - flush() waits until everything emitted so far is on disk; close() also
+      stops the thread. Open sinks are closed at interpreter exit.
+    - The file is rotated into compressed segments by size/age (see
+      eventlog.segments); `rotate_bytes` / `rotate_age` of 0 disable that.
+    - Every line is stamped with a "seq" number as it is written, so file
+      order and seq order agree. Processes appending to the same log (agent
+      workers, blockchain/logger.py, simulators) write under one file lock
+      and share the numbering through it (see segments.LogLock).
+    - With `index` (default: the file name is in AFREEGUARD_LOG_INDEX), each
+      written batch is also inserted into an EventStore next to the log
+      (events.jsonl -> events.db) for filtered queries. A failed insert, or
+      a seq the store already has, is counted in index_errors; the log line
+      is kept either way. Events written before the sink opened that the
+      store lacks are indexed on a background thread (caught_up() waits).
+    """
+
+    def __init__(self, path, *, max_queue: int = DEFAULT_MAX_QUEUE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_size: int = DEFAULT_FLUSH_SIZE, on_full: str = DEFAULT_ON_FULL,
+                 rotate_bytes: int = DEFAULT_ROTATE_BYTES, rotate_age: float = DEFAULT_ROTATE_AGE,
+                 compression: str = DEFAULT_COMPRESSION, index: Optional[bool] = None):
+        if on_full not in ON_FULL:
+            raise ValueError(f"on_full must be one of {ON_FULL}, got {on_full!r}")
+        self.path = os.path.abspath(path)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.on_full = on_full
+
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.errors = 0
+        self.index_errors = 0
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._file_lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        self._closed = False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.log = SegmentedWriter(self.path, max_bytes=rotate_bytes, max_age=rotate_age,
+                                   compression=compression)
+        with self.log.lock:
+            # the lock file carries the sequence across processes; logs from
+            # before it existed continue from their last event
+            self.seq = max(self.log.lock.read_seq() or 0, _last_seq(self.path))
+            self.log.lock.write_seq(self.seq)
+        if index is None:
+            index = os.path.basename(self.path) in INDEXED_LOGS
+        self.store: Optional[EventStore] = None
+        self._catch_up: Optional[threading.Thread] = None
+        self._stop_catch_up = threading.Event()
+        if index:
+            self.store = EventStore(store_path(self.path))
+            if self.store.caught_up() < self.seq:
+                # off the caller's path: a large log takes a while, and queries
+                # meanwhile see what is indexed so far
+                self._catch_up = threading.Thread(target=self._run_catch_up, args=(self.seq,), daemon=True,
+                                                  name=f"event-index:{os.path.basename(self.path)}")
+                self._catch_up.start()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"event-sink:{os.path.basename(self.path)}")
+        self._thread.start()
+
+    # ---- producer side ----
+    def emit(self, record: Dict[str, Any]) -> bool:
+        """Queue one event. Returns False if it was dropped."""
+        return self._put([_dumps(record)])
+
+    def emit_many(self, records: Iterable[Dict[str, Any]]) -> bool:
+        """Queue several events as one item (they are written together)."""
+        lines = [_dumps(rec) for rec in records]
+        if not lines:
+            return True
+        return self._put(lines)
+
+    def _put(self, lines: List[str]) -> bool:
+        if self._closed:
+            raise RuntimeError(f"event sink for {self.path} is closed")
+        item = lines
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        if self.on_full == "block":
+            self._queue.put(item)
+            return True
+        if self.on_full == "drop":
+            with self._count_lock:
+                self.dropped += len(lines)
+            return False
+        self._append([item])
+        with self._count_lock:
+            self.spilled += len(lines)
+        return True
+
+    async def aemit(self, record: Dict[str, Any]) -> bool:
+        return await self._aput([_dumps(record)])
+
+    async def aemit_many(self, records: Iterable[Dict[str, Any]]) -> bool:
+        lines = [_dumps(rec) for rec in records]
+        if not lines:
+            return True
+        return await self._aput(lines)
+
+    async def _aput(self, lines: List[str]) -> bool:
+        if self._closed:
+            raise RuntimeError(f"event sink for {self.path} is closed")
+        try:
+            self._queue.put_nowait(lines)
+            return True
+        except queue.Full:
+            return await asyncio.to_thread(self._put, lines)
+
+    def _run_catch_up(self, upto: int):
+        try:
+            n = self.store.catch_up(self.path, upto, self._stop_catch_up)
+            if n:
+                print(f"[LOG] Indexed {n} events from {self.path}")
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"[LOG] Event index catch-up failed ({self.store.path}): {e}")
+
+    def caught_up(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the index to hold every event written before this sink opened."""
+        if self._catch_up is not None:
+            self._catch_up.join(timeout)
+            return not self._catch_up.is_alive()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every event emitted before this call has been written."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._stop_catch_up.set()  # resumes from its checkpoint next time
+        if not self._thread.is_alive() and self.caught_up(timeout):
+            self.log.close(timeout)  # lets a running segment compression finish
+            if self.store is not None:
+                self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "seq": self.seq,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "errors": self.errors,
+            "index_errors": self.index_errors,
+            "catching_up": self._catch_up is not None and self._catch_up.is_alive(),
+        }
+
+    # ---- writer thread ----
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # group commit: collect until size/interval, or a flush/stop marker
+            while isinstance(batch[-1], list) and len(batch) < self.flush_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [it for it in batch if isinstance(it, list)]
+            if items:
+                self._append(items)
+            for it in batch:
+                if isinstance(it, threading.Event):
+                    it.set()
+            if batch[-1] is _STOP:
+                return
+
+    def _append(self, items):
+        n = sum(map(len, items))
+        try:
+            with self._file_lock, self.log.lock:
+                # other processes may have appended or rotated since our last batch
+                self.log.refresh()
+                self.seq = max(self.seq, self.log.lock.read_seq() or 0)
+                out, first = [], self.seq + 1
+                for lines in items:
+                    for line in lines:
+                        self.seq += 1
+                        out.append(_stamp(line, self.seq))
+                # a crash after this leaves a gap in the numbering, never a repeat
+                self.log.lock.write_seq(self.seq)
+                self.log.append("".join(out))
+            with self._count_lock:
+                self.written += n
+        except OSError as e:
+            with self._count_lock:
+                self.errors += n
+            print(f"[LOG] Event sink write error ({self.path}): {e}")
+            return
+        if self.store is not None:
+            self._index(first, out)
+
+    def _index(self, first: int, lines: List[str]):
+        try:
+            rows = [(seq, evt) for seq, evt in enumerate(map(json.loads, lines), first) if isinstance(evt, dict)]
+            collisions = len(rows) - self.store.add(rows)
+            if collisions:
+                # seqs are unique across writers, so this is a store out of step with its log
+                with self._count_lock:
+                    self.index_errors += collisions
+                print(f"[LOG] {collisions} events not indexed: seq already in {self.store.path}")
+        except (sqlite3.Error, ValueError) as e:
+            with self._count_lock:
+                self.index_errors += len(lines)
+            print(f"[LOG] Event index write error ({self.store.path}): {e}")
+
+
+def _dumps(record: Dict[str, Any]) -> str:
+    # the sink numbers events; a "seq" already in the record (one re-emitted
+    # from the log) would follow the new one and win in json.loads
+    if "seq" in record:
+        record = {k: v for k, v in record.items() if k != "seq"}
+    return json.dumps(record)
+
+
+def _stamp(line: str, seq: int) -> str:
+    """Prefix a serialized JSON object with its seq number."""
+    if not line.startswith("{"):
+        return line + "\n"
+    if line == "{}":
+        return '{"seq": %d}\n' % seq
+    return '{"seq": %d, %s\n' % (seq, line[1:])
+
+
+def _last_seq(path: str) -> int:
+    for _, _, evt in tail.read_before(path, limit=1):
+        if isinstance(evt.get("seq"), int):
+            return evt["seq"]
+    return 0
+
+
+_sinks: Dict[str, EventSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_sink(path, **kwargs) -> EventSink:
+    """Return the process-wide sink for `path`, creating it on first use."""
+    key = os.path.abspath(path)
+    sink = _sinks.get(key)
+    if sink is None:
+        with _sinks_lock:
+            sink = _sinks.get(key)
+            if sink is None:
+                sink = _sinks[key] = EventSink(key, **kwargs)
+    return sink
+
+
+def flush_all(timeout: Optional[float] = None):
+    for sink in list(_sinks.values()):
+        sink.flush(timeout)
+
+
+def close_all(timeout: Optional[float] = None):
+    """Flush and stop every sink; later get_sink() calls start fresh ones."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.close(timeout)
+
+
+atexit.register(close_all)
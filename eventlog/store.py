@@ -0,0 +1,297 @@
+# eventlog/store.py
+"""
+Indexed copy of a JSONL event log in SQLite (WAL), so filtered reads do not
+scan the log.
+
+    logs/events.jsonl    the log (source of truth, appended by the sink)
+    logs/events.db       this store: one row per event, keyed by seq
+
+The sink inserts each batch right after appending it to the log. Rows carry
+the fields queries filter on, normalised across writers (see
+eventlog.schema): ts as epoch seconds, domain, action, blocked and reason,
+plus the event itself. A store that is behind its log (new store, or a crash
+between the two writes) catches up from the log on a background thread of
+the sink, or ahead of time with `python -m eventlog.store logs/events.jsonl`;
+events written before seq numbering existed are not indexed.
+
+A trigger on insert keeps running counts in the same transaction, so they
+match the rows exactly and survive restarts:
+
+    totals    per (domain, action, blocked, reason), all time
+    rollups   the same per minute and per hour bucket (res = 60 / 3600)
+
+Missing values are counted under '' (blocked: -1). Minute buckets older than
+ROLLUP_MINUTE_DAYS are pruned; hour buckets are kept.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import tail
+from .schema import event_blocked, event_reason, event_time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq     INTEGER PRIMARY KEY,
+    ts      REAL,
+    domain  TEXT,
+    action  TEXT,
+    blocked INTEGER,
+    reason  TEXT,
+    event   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_ts      ON events(ts);
+CREATE INDEX IF NOT EXISTS events_domain  ON events(domain, ts);
+CREATE INDEX IF NOT EXISTS events_action  ON events(action, ts);
+CREATE INDEX IF NOT EXISTS events_blocked ON events(blocked, ts);
+CREATE INDEX IF NOT EXISTS events_reason  ON events(reason, ts);
+
+CREATE TABLE IF NOT EXISTS totals (
+    domain  TEXT NOT NULL,
+    action  TEXT NOT NULL,
+    blocked INTEGER NOT NULL,
+    reason  TEXT NOT NULL,
+    n       INTEGER NOT NULL,
+    PRIMARY KEY (domain, action, blocked, reason)
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    res     INTEGER NOT NULL,
+    bucket  INTEGER NOT NULL,
+    domain  TEXT NOT NULL,
+    action  TEXT NOT NULL,
+    blocked INTEGER NOT NULL,
+    reason  TEXT NOT NULL,
+    n       INTEGER NOT NULL,
+    PRIMARY KEY (res, bucket, domain, action, blocked, reason)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value
+);
+CREATE TRIGGER IF NOT EXISTS events_count AFTER INSERT ON events BEGIN
+    INSERT INTO totals
+        VALUES (COALESCE(NEW.domain, ''), COALESCE(NEW.action, ''), COALESCE(NEW.blocked, -1),
+                COALESCE(NEW.reason, ''), 1)
+        ON CONFLICT DO UPDATE SET n = n + 1;
+    INSERT INTO rollups
+        SELECT res, CAST(NEW.ts / res AS INTEGER) * res, COALESCE(NEW.domain, ''),
+               COALESCE(NEW.action, ''), COALESCE(NEW.blocked, -1), COALESCE(NEW.reason, ''), 1
+        FROM (SELECT 60 AS res UNION ALL SELECT 3600) WHERE NEW.ts IS NOT NULL
+        ON CONFLICT DO UPDATE SET n = n + 1;
+END;
+"""
+
+# rebuilds the counts of a store created before the trigger existed
+REBUILD = """
+BEGIN;
+INSERT INTO totals
+    SELECT COALESCE(domain, ''), COALESCE(action, ''), COALESCE(blocked, -1), COALESCE(reason, ''), COUNT(*)
+    FROM events GROUP BY 1, 2, 3, 4;
+INSERT INTO rollups
+    SELECT res, CAST(ts / res AS INTEGER) * res, COALESCE(domain, ''), COALESCE(action, ''),
+           COALESCE(blocked, -1), COALESCE(reason, ''), COUNT(*)
+    FROM events, (SELECT 60 AS res UNION ALL SELECT 3600) WHERE ts IS NOT NULL GROUP BY 1, 2, 3, 4, 5, 6;
+COMMIT;
+"""
+
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+ROLLUP_MINUTE_DAYS = float(os.getenv("AFREEGUARD_ROLLUP_MINUTE_DAYS", "7"))
+CATCH_UP_PAGE = 2000
+
+
+def store_path(log_path) -> str:
+    """logs/events.jsonl -> logs/events.db"""
+    base, ext = os.path.splitext(os.path.abspath(log_path))
+    return base + ".db"
+
+
+def _row(seq: int, event: Dict[str, Any]) -> Tuple:
+    blocked = event_blocked(event)
+    return (seq, event_time(event), event.get("domain"), event.get("action"),
+            None if blocked is None else int(blocked), event_reason(event),
+            json.dumps(event, separators=(",", ":")))
+
+
+class EventStore:
+    """
+    One writer connection behind a lock (the sink's writer thread, or a
+    spilling caller); each reading thread gets its own connection, which
+    under WAL never waits for the writer.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._db = self._connect()
+        self._db.executescript(SCHEMA)
+        if not self._db.execute("SELECT 1 FROM totals LIMIT 1").fetchone():
+            self._db.executescript(REBUILD)
+        # stores from before the checkpoint existed were caught up before any live insert
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO meta SELECT 'caught_up', COALESCE(MAX(seq), 0) FROM events")
+        self._pruned = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _reader(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    # ---- writes ----
+    def add(self, events: Iterable[Tuple[int, Dict[str, Any]]]) -> int:
+        """Insert (seq, event) pairs; seqs already stored are skipped. Returns how many were new."""
+        rows = [_row(seq, evt) for seq, evt in events]
+        if not rows:
+            return 0
+        with self._lock, self._db:
+            # rowcount leaves out the trigger's writes and the ignored duplicates
+            added = self._db.executemany("INSERT OR IGNORE INTO events VALUES (?,?,?,?,?,?,?)", rows).rowcount
+            if time.time() - self._pruned > 3600:
+                self._prune()
+            return added
+
+    def _prune(self):
+        cutoff = time.time() - ROLLUP_MINUTE_DAYS * 86400
+        self._db.execute("DELETE FROM rollups WHERE res = 60 AND bucket < ?", (cutoff,))
+        self._pruned = time.time()
+
+    def catch_up(self, log_path, upto: Optional[int] = None,
+                 stop: Optional[threading.Event] = None) -> int:
+        """
+        Index the log's events after caught_up(), up to seq `upto` (newer ones
+        are indexed by the sink as it writes them). One pass over the log,
+        inserted CATCH_UP_PAGE at a time; the checkpoint moves with each
+        batch, so an interrupted catch-up resumes where it stopped. Returns
+        how many events were added.
+        """
+        last = self.caught_up()
+        cursor = tail.offset_after_seq(log_path, last) if last else 0
+        added, batch, seen = 0, [], last
+        for _, _, evt in tail.iter_since(log_path, cursor):
+            seq = evt.get("seq")
+            if not isinstance(seq, int) or seq <= last:
+                continue
+            if upto is not None and seq > upto:
+                break
+            batch.append((seq, evt))
+            if len(batch) >= CATCH_UP_PAGE:
+                if stop is not None and stop.is_set():
+                    return added
+                added += self._add_batch(batch)
+                batch = []
+            seen = seq
+        if batch:
+            added += self._add_batch(batch)
+        self._set_caught_up(max(seen, upto or 0))
+        return added
+
+    def _add_batch(self, batch: List[Tuple[int, Dict[str, Any]]]) -> int:
+        added = self.add(batch)
+        self._set_caught_up(batch[-1][0])
+        return added
+
+    def caught_up(self) -> int:
+        """Seq up to which the log has been indexed by catch_up()."""
+        return self._reader().execute("SELECT value FROM meta WHERE key = 'caught_up'").fetchone()[0]
+
+    def _set_caught_up(self, seq: int):
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO meta VALUES ('caught_up', ?) "
+                             "ON CONFLICT DO UPDATE SET value = MAX(value, excluded.value)", (seq,))
+
+    # ---- reads ----
+    def last_seq(self) -> int:
+        return self._reader().execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+
+    def count(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def query(self, *, domain: Optional[str] = None, action: Optional[str] = None,
+              blocked: Optional[bool] = None, reason: Optional[str] = None,
+              start: Optional[float] = None, end: Optional[float] = None,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        """The newest `limit` matching events, oldest first; `start`/`end` bound ts (epoch, inclusive)."""
+        where, args = [], []
+        for col, val in (("domain", domain), ("action", action), ("reason", reason)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if blocked is not None:
+            where.append("blocked = ?")
+            args.append(int(blocked))
+        if start is not None:
+            where.append("ts >= ?")
+            args.append(start)
+        if end is not None:
+            where.append("ts <= ?")
+            args.append(end)
+        sql = "SELECT event FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, seq DESC LIMIT ?"
+        rows = self._reader().execute(sql, args + [limit]).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+    def totals(self, *, domain: Optional[str] = None, action: Optional[str] = None) -> Dict[str, Any]:
+        """All-time counts from the counters table: total/blocked/allowed plus each key's count."""
+        where, args = _key_filter(domain, action)
+        rows = self._reader().execute(
+            "SELECT domain, action, blocked, reason, n FROM totals" + where + " ORDER BY n DESC", args).fetchall()
+        keys = [{"domain": d, "action": a, "blocked": None if b < 0 else bool(b), "reason": r, "n": n}
+                for d, a, b, r, n in rows]
+        return {"total": sum(k["n"] for k in keys),
+                "blocked": sum(k["n"] for k in keys if k["blocked"] is True),
+                "allowed": sum(k["n"] for k in keys if k["blocked"] is False),
+                "keys": keys}
+
+    def series(self, res: str = "minute", *, start: Optional[float] = None, end: Optional[float] = None,
+               domain: Optional[str] = None, action: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-bucket total/blocked/allowed (oldest first) for buckets starting in [start, end]."""
+        where, args = _key_filter(domain, action)
+        where = (where + " AND" if where else " WHERE") + " res = ?"
+        args.append(RESOLUTIONS[res])
+        if start is not None:
+            where += " AND bucket >= ?"
+            args.append(RESOLUTIONS[res] * (start // RESOLUTIONS[res]))
+        if end is not None:
+            where += " AND bucket <= ?"
+            args.append(end)
+        rows = self._reader().execute(
+            "SELECT bucket, SUM(n), SUM(CASE WHEN blocked = 1 THEN n ELSE 0 END), "
+            "SUM(CASE WHEN blocked = 0 THEN n ELSE 0 END) FROM rollups" + where +
+            " GROUP BY bucket ORDER BY bucket", args).fetchall()
+        return [{"bucket": b, "total": t, "blocked": bl, "allowed": al} for b, t, bl, al in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _key_filter(domain: Optional[str], action: Optional[str]) -> Tuple[str, List[Any]]:
+    where, args = [], []
+    for col, val in (("domain", domain), ("action", action)):
+        if val is not None:
+            where.append(f"{col} = ?")
+            args.append(val)
+    return (" WHERE " + " AND ".join(where) if where else ""), args
+
+
+if __name__ == "__main__":
+    import sys
+
+    log = sys.argv[1] if len(sys.argv) > 1 else os.path.join("logs", "events.jsonl")
+    store = EventStore(store_path(log))
+    start = time.time()
+    n = store.catch_up(log)
+    print(f"indexed {n} events in {time.time() - start:.1f}s; caught up to seq {store.caught_up()}")
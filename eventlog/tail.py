@@ -0,0 +1,234 @@
+# eventlog/tail.py
+"""
+Cursor-based reads of a (possibly rotated) JSONL event log without parsing
+the whole thing.
+
+Positions are logical byte offsets (see eventlog.segments): the start of a
+line is a stable cursor even after the active file is rotated away. The
+active file is read backwards from EOF in blocks, so the newest N events cost
+O(N) regardless of log size; closed segments are only opened when a page
+reaches into them.
+"""
+import json
+import os
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import segments
+
+BLOCK = 64 * 1024
+
+# (start offset, end offset, event)
+Entry = Tuple[int, int, Dict[str, Any]]
+
+
+def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _active_end(f) -> int:
+    """Size of the active file up to its last complete line."""
+    end = f.seek(0, os.SEEK_END)
+    pos = end
+    while pos > 0:
+        step = min(BLOCK, pos)
+        f.seek(pos - step)
+        chunk = f.read(step)
+        nl = chunk.rfind(b"\n")
+        if nl != -1:
+            return pos - step + nl + 1
+        pos -= step
+    return 0
+
+
+def _lines_backward(f, end: int) -> Iterator[Tuple[int, bytes]]:
+    """(start, line) pairs of the complete lines ending at or before `end`, newest first."""
+    pos, tail = end, b""
+    while pos > 0:
+        step = min(BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + tail
+        parts = buf.split(b"\n")
+        # parts[0] may be the tail of an earlier line; keep it for the next block
+        tail = parts[0]
+        offset = pos + len(parts[0]) + 1
+        found = []
+        for part in parts[1:]:
+            found.append((offset, part))
+            offset += len(part) + 1
+        for start, line in reversed(found):
+            if start < end:
+                yield start, line
+    if tail:
+        yield 0, tail
+
+
+def _segment_entries(path, seg: Dict[str, Any]) -> Iterator[Entry]:
+    offset = seg["offset"]
+    with segments.open_segment(path, seg) as f:
+        for line in f:
+            raw = line.encode("utf-8")
+            start, offset = offset, offset + len(raw)
+            evt = _decode(raw)
+            if evt is not None:
+                yield start, offset, evt
+
+
+def _snapshot(path):
+    manifest = segments.load_manifest(path)
+    return manifest["active_offset"], manifest["segments"]
+
+
+def read_before(path, before: Optional[int] = None, limit: int = 50) -> List[Entry]:
+    """The newest `limit` events starting before logical offset `before` (oldest first)."""
+    for _ in range(3):  # retry if a rotation lands while we read
+        base, segs = _snapshot(path)
+        out: List[Entry] = []
+        if os.path.exists(path) and (before is None or before > base):
+            with open(path, "rb") as f:
+                end = _active_end(f)
+                for start, line in _lines_backward(f, end):
+                    if len(out) >= limit:
+                        break
+                    if before is not None and base + start >= before:
+                        continue
+                    evt = _decode(line)
+                    if evt is not None:
+                        out.append((base + start, base + start + len(line) + 1, evt))
+        if _snapshot(path)[0] == base:
+            break
+    out.reverse()
+
+    for seg in reversed(segs):
+        if len(out) >= limit:
+            break
+        if before is not None and seg["offset"] >= before:
+            continue
+        need = limit - len(out)
+        window: deque = deque(maxlen=need)
+        for entry in _segment_entries(path, seg):
+            if before is None or entry[0] < before:
+                window.append(entry)
+        out = list(window) + out
+    return out[-limit:] if limit else []
+
+
+def read_since(path, since: int, limit: int = 50, before: Optional[int] = None) -> List[Entry]:
+    """The oldest `limit` events starting at or after `since` (and before `before`)."""
+    out: List[Entry] = []
+    for _ in range(3):
+        base, segs = _snapshot(path)
+        out = []
+        for seg in segs:
+            if seg["offset"] + seg["bytes"] <= since:
+                continue
+            for entry in _segment_entries(path, seg):
+                if entry[0] >= since and (before is None or entry[0] < before):
+                    out.append(entry)
+                    if len(out) >= limit:
+                        return out
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                end = _active_end(f)
+                pos = max(since - base, 0)
+                if pos and pos < end:
+                    # land on a line start if the cursor points mid-line
+                    f.seek(pos - 1)
+                    if f.read(1) != b"\n":
+                        f.readline()
+                        pos = f.tell()
+                f.seek(pos)
+                while pos < end and len(out) < limit:
+                    line = f.readline()
+                    start, pos = pos, pos + len(line)
+                    if before is not None and base + start >= before:
+                        break
+                    evt = _decode(line)
+                    if evt is not None:
+                        out.append((base + start, base + pos, evt))
+        if _snapshot(path)[0] == base:
+            break
+    return out
+
+
+def iter_since(path, since: int) -> Iterator[Entry]:
+    """
+    Every event starting at or after `since`, oldest first, in one pass:
+    each segment is decompressed once, then the active file is read to its
+    end. For bulk reads (index catch-up); pages go through read_since().
+    """
+    base, segs = _snapshot(path)
+    for seg in segs:
+        if seg["offset"] + seg["bytes"] <= since:
+            continue
+        for entry in _segment_entries(path, seg):
+            if entry[0] >= since:
+                yield entry
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        # a rotation from here on only renames: this handle keeps the same bytes
+        end = _active_end(f)
+        pos = max(since - base, 0)
+        if pos and pos < end:
+            f.seek(pos - 1)
+            if f.read(1) != b"\n":
+                f.readline()
+                pos = f.tell()
+        f.seek(pos)
+        while pos < end:
+            line = f.readline()
+            start, pos = pos, pos + len(line)
+            evt = _decode(line)
+            if evt is not None:
+                yield base + start, base + pos, evt
+
+
+def offset_after_seq(path, seq: int) -> int:
+    """
+    Logical offset just past the event numbered `seq` (or the first offset
+    whose events are all newer). The active file is read backwards from EOF,
+    so a cursor near the tail is cheap; closed segments whose manifest
+    first_seq is already past `seq` are skipped unopened, and any other
+    segment is read once, front to back.
+    """
+    base, segs = _snapshot(path)
+    oldest = base
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            for start, line in _lines_backward(f, _active_end(f)):
+                evt = _decode(line)
+                s = evt.get("seq") if isinstance(evt, dict) else None
+                if isinstance(s, int) and s <= seq:
+                    return base + start + len(line) + 1
+                oldest = base + start
+    for seg in reversed(segs):
+        first = seg.get("first_seq")
+        if isinstance(first, int) and first > seq:
+            oldest = seg["offset"]
+            continue
+        found = None
+        for start, end, evt in _segment_entries(path, seg):
+            s = evt.get("seq") if isinstance(evt, dict) else None
+            if isinstance(s, int) and s <= seq:
+                found = end
+        if found is not None:
+            return found
+        oldest = seg["offset"]
+    return oldest
+
+
+def end_offset(path) -> int:
+    """Logical offset just past the last complete line."""
+    base, _ = _snapshot(path)
+    if not os.path.exists(path):
+        return base
+    with open(path, "rb") as f:
+        return base + _active_end(f)
@@ -0,0 +1,167 @@
+# eventlog/wire.py
+"""
+Content negotiation for the log endpoints (agent /api/logs, /api/logs/stream,
+/api/events and server.py /api/logs), framework-free so FastAPI and Flask
+share it.
+
+    Accept                                  body
+    application/json (default, */*)         the payload as JSON
+    application/msgpack                     the payload as MessagePack
+    application/vnd.apache.arrow.stream     events as one Arrow IPC record batch;
+                                            the other payload keys as JSON in the
+                                            schema metadata under b"payload"
+
+    Accept-Encoding: br (brotli), gzip; bodies under MIN_COMPRESS bytes are sent as is.
+
+MessagePack, Arrow and brotli are optional dependencies (msgpack, pyarrow,
+brotli): a format whose package is missing is never chosen, so such clients
+get JSON. The Arrow batch uses the Parquet export's columns
+(eventlog.columnar) plus domain; `params` is a JSON string there too.
+"""
+import gzip
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+try:  # optional
+    import msgpack
+except ImportError:
+    msgpack = None
+try:  # optional
+    import brotli
+except ImportError:
+    brotli = None
+
+from . import columnar
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# ---- Config (env) ----
+MIN_COMPRESS = int(os.getenv("AFREEGUARD_WIRE_MIN_COMPRESS", "1024"))  # bytes
+GZIP_LEVEL = int(os.getenv("AFREEGUARD_WIRE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("AFREEGUARD_WIRE_BROTLI_QUALITY", "4"))  # 11 is far too slow per request
+
+
+def media_types() -> List[str]:
+    """Formats this process can encode and decode, preferred first."""
+    out = [JSON]
+    if msgpack is not None:
+        out.insert(0, MSGPACK)
+    if columnar.pa is not None:
+        out.append(ARROW)
+    return out
+
+
+def encodings() -> List[str]:
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def _accepted(header: Optional[str]) -> Dict[str, float]:
+    """{token: q} from an Accept / Accept-Encoding header."""
+    out: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        token, _, rest = part.strip().partition(";")
+        q = 1.0
+        for param in rest.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token:
+            out[token.strip().lower()] = q
+    return out
+
+
+def negotiate(accept: Optional[str], accept_encoding: Optional[str]) -> Tuple[str, Optional[str]]:
+    """(media type, content encoding or None) to answer a request with."""
+    types = _accepted(accept)
+    media = JSON
+    # JSON wins ties and anything unspecific (*/*, application/*, no header)
+    best = types.get(JSON, 0.0)
+    for candidate in media_types():
+        q = types.get(candidate, 0.0)
+        if candidate == MSGPACK:
+            q = max(q, types.get("application/x-msgpack", 0.0))
+        if q > best:
+            media, best = candidate, q
+    codings = _accepted(accept_encoding)
+    coding, best = None, 0.0
+    for candidate in encodings():
+        q = codings.get(candidate, codings.get("*", 0.0))
+        if q > best:
+            coding, best = candidate, q
+    return media, coding
+
+
+# ---- encoding ----
+def encode(payload: Dict[str, Any], media: str = JSON) -> bytes:
+    if media == MSGPACK:
+        return msgpack.packb(payload, default=str)
+    if media == ARROW:
+        return _arrow(payload)
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _arrow(payload: Dict[str, Any]) -> bytes:
+    pa = columnar.pa
+    rows = []
+    for event in payload.get("events") or []:
+        _, row = columnar.to_row(event)
+        domain = event.get("domain")
+        row["domain"] = domain if domain is None or isinstance(domain, str) else str(domain)
+        rows.append(row)
+    meta = {k: v for k, v in payload.items() if k != "events"}
+    schema = columnar._schema().append(pa.field("domain", pa.string())).with_metadata(
+        {b"payload": json.dumps(meta, default=str).encode("utf-8")})
+    table = pa.Table.from_pylist(rows, schema=schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def compress(body: bytes, coding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """(body, Content-Encoding) after compressing with `coding`, if worth it."""
+    if coding is None or len(body) < MIN_COMPRESS:
+        return body, None
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+
+
+def render(payload: Dict[str, Any], accept: Optional[str],
+           accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+    """Body and response headers (Content-Type, Content-Encoding, Vary) for one request."""
+    media, coding = negotiate(accept, accept_encoding)
+    body, coding = compress(encode(payload, media), coding)
+    headers = {"Content-Type": media, "Vary": "Accept, Accept-Encoding"}
+    if coding:
+        headers["Content-Encoding"] = coding
+    return body, headers
+
+
+# ---- decoding (clients) ----
+def accept_header() -> str:
+    """An Accept header asking for the most compact format this process can read as a dict."""
+    return ", ".join([MSGPACK, f"{JSON};q=0.9"] if msgpack is not None else [JSON])
+
+
+def decode(body: bytes, content_type: Optional[str]) -> Dict[str, Any]:
+    """A JSON or MessagePack payload (already decompressed, as HTTP clients do)."""
+    media = (content_type or JSON).split(";")[0].strip().lower()
+    if media in (MSGPACK, "application/x-msgpack"):
+        return msgpack.unpackb(body)
+    if media == ARROW:
+        raise ValueError("Arrow bodies are tables; use read_arrow()")
+    return json.loads(body)
+
+
+def read_arrow(body: bytes) -> Tuple["columnar.pa.Table", Dict[str, Any]]:
+    """(events table, the other payload keys) from an Arrow response body."""
+    reader = columnar.pa.ipc.open_stream(body)
+    table = reader.read_all()
+    return table, json.loads((reader.schema.metadata or {}).get(b"payload", b"{}"))
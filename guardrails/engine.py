@@ -1,5 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 import time, json, os
+from eventlog.sink import get_sink
+from .manager import Policy, PolicyManager, get_manager
 from .rules import RuleSet
 
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
@@ -7,37 +9,98 @@ os.makedirs(LOG_DIR, exist_ok=True)
 LOG_PATH = os.path.join(LOG_DIR, "events.jsonl")
 
 class GuardrailEngine:
-    def __init__(self, rules: RuleSet):
-        self.rules = rules
+    """
+    Checks requests against a RuleSet, or against whatever a PolicyManager
+    currently serves (hot-reloaded policies.yaml). Each check reads the
+    current policy once, so a reload mid-check cannot mix two versions;
+    the logged event records the version (and file digest) that decided.
+    Without `rules` it uses the process-wide manager of policies.yaml
+    (manager.get_manager), shared with every other default engine.
+    """
+
+    def __init__(self, rules: Optional[Union[RuleSet, PolicyManager]] = None):
+        if rules is None:
+            rules = get_manager()
+        self.policies = rules if isinstance(rules, PolicyManager) else PolicyManager.fixed(rules)
+
+    @property
+    def rules(self) -> RuleSet:
+        return self.policies.current.rules
 
     def check(self, domain: str, user_input: str, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        policy = self.policies.current
+        rules = policy.rules
         decision = {"allow": True, "reason": "ok"}
-        hits = self.rules.violates_keywords(user_input + " " + action + " " + json.dumps(params))
+        hits = rules.violates_keywords(user_input + " " + action + " " + json.dumps(params))
         if hits:
             decision = {"allow": False, "reason": f"blocked_keywords:{hits}"}
 
-        policy = self.rules.domain_policy(domain)
-        if domain == "finance" and policy.get("allow_advice") is False:
-            if action == "give_advice":
-                decision = {"allow": False, "reason": "finance_advice_disallowed"}
-
-        if domain == "web3":
-            safe = set(policy.get("safe_actions", []))
-            blocked = set(policy.get("blocked_actions", []))
-            if action in blocked or (safe and action not in safe):
-                decision = {"allow": False, "reason": "web3_action_not_permitted"}
+        # finance advice / web3 safe+blocked actions, pre-indexed by (domain, action)
+        reason = rules.policy.engine_reason(domain, action)
+        if reason:
+            decision = {"allow": False, "reason": reason}
 
-        self._log_event(domain, user_input, action, params, decision)
+        self._log_event(domain, user_input, action, params, decision, policy)
         return decision
 
-    def _log_event(self, domain, user_input, action, params, decision):
-        rec = {
+    def check_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Evaluate many requests (dicts with check()'s keyword arguments) at once.
+        Each decision is identical to check(**req); a user_input shared by the
+        batch is keyword-scanned once, params objects are serialized once,
+        policy lookups are memoized and all events are written in one flush.
+        The whole batch is decided by one policy version.
+        """
+        current = self.policies.current
+        matcher = current.rules.matcher
+        policy = current.rules.policy
+        heads: Dict[str, Any] = {}    # user_input -> (lowered, hits)
+        dumped: Dict[int, str] = {}   # id(params) -> json
+        reasons: Dict[Any, Any] = {}  # (domain, action) -> block reason
+        decisions, records = [], []
+        for req in requests:
+            domain, user_input, action = req["domain"], req["user_input"], req["action"]
+            params = req.get("params", {})
+
+            head = heads.get(user_input)
+            if head is None:
+                head = heads[user_input] = (user_input.lower(), matcher.find(user_input, "global"))
+            params_json = dumped.get(id(params))
+            if params_json is None:
+                params_json = dumped[id(params)] = json.dumps(params)
+
+            decision = {"allow": True, "reason": "ok"}
+            hits = matcher.find_concat(head[0], head[1], " " + action + " " + params_json, "global")
+            if hits:
+                decision = {"allow": False, "reason": f"blocked_keywords:{hits}"}
+
+            key = (domain, action)
+            if key not in reasons:
+                reasons[key] = policy.engine_reason(domain, action)
+            if reasons[key]:
+                decision = {"allow": False, "reason": reasons[key]}
+
+            decisions.append(decision)
+            records.append(self._record(domain, user_input, action, params, decision, current))
+
+        self._write(records)
+        return decisions
+
+    def _record(self, domain, user_input, action, params, decision, policy: Policy):
+        return {
             "ts": time.time(),
             "domain": domain,
             "user_input": user_input,
             "action": action,
             "params": params,
-            "decision": decision
+            "decision": decision,
+            "policy_version": policy.version,
+            "policy_digest": policy.digest,
         }
-        with open(LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(rec) + "\n")
\ No newline at end of file
+
+    def _log_event(self, domain, user_input, action, params, decision, policy: Policy):
+        self._write([self._record(domain, user_input, action, params, decision, policy)])
+
+    def _write(self, records):
+        # buffered: the shared sink's writer thread appends in the background
+        get_sink(LOG_PATH).emit_many(records)
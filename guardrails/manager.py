@@ -0,0 +1,210 @@
+# guardrails/manager.py
+"""
+Hot reload of policies.yaml without restarting the process.
+
+A PolicyManager holds the current Policy: (version, digest, RuleSet,
+loaded_at). A watcher thread notices file changes and reloads:
+
+    inotify (optional inotify_simple package, Linux)
+        the file's directory is watched; editors that save by rename and
+        Kubernetes ConfigMap symlink swaps are caught as well
+    mtime polling (fallback, or AFREEGUARD_POLICY_WATCH=poll)
+        os.stat() every `interval` seconds
+
+Either way the file is re-read only when its stat signature moved. It is
+then parsed, validated (policy.validate_config) and compiled into a new
+RuleSet on the watcher thread. The result is swapped in with one
+assignment, so readers (`current`) take no lock and never see a half-built
+policy. A file that fails to load is reported once and the previous
+version stays in force. Versions count loads in this process; the digest
+(sha256 of the file) identifies the same policy across workers.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import yaml
+
+from .policy import POLICY_PATH, validate_config
+from .rules import RuleSet
+
+try:  # optional; Linux only
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+# ---- Config (env) ----
+POLICY_WATCH = os.getenv("AFREEGUARD_POLICY_WATCH", "auto")  # auto (inotify if available) / poll
+POLICY_POLL_SEC = float(os.getenv("AFREEGUARD_POLICY_POLL_SEC", "1"))
+POLICY_SETTLE_SEC = float(os.getenv("AFREEGUARD_POLICY_SETTLE_SEC", "0.05"))  # let a save's writes land
+
+
+class Policy(NamedTuple):
+    """One loaded policies.yaml; never mutated."""
+    version: int
+    digest: Optional[str]  # first 12 hex digits of the file's sha256
+    rules: RuleSet
+    loaded_at: float
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _compile(data: bytes) -> RuleSet:
+    """Parse, validate and compile; raises on any problem."""
+    return RuleSet(validate_config(yaml.safe_load(data) or {}))
+
+
+class PolicyManager:
+    """
+    The first load happens in __init__ and raises if the file is unusable,
+    since there is nothing to fall back to; later reloads never raise.
+    """
+
+    def __init__(self, path=POLICY_PATH, *, interval: float = POLICY_POLL_SEC, watch: str = POLICY_WATCH):
+        self.path = None if path is None else os.path.abspath(path)
+        self.interval = interval
+        self.watch = watch
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.watching: Optional[str] = None  # "inotify" / "poll" while the thread runs
+        self._rejected: Optional[str] = None  # digest of the last file that failed to load
+        self._sig: Optional[Tuple[int, int, int]] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._current: Optional[Policy] = None
+        if self.path is not None:
+            sig, data = self._signature(), self._read()
+            self._current = Policy(1, _digest(data), _compile(data), time.time())
+            self._sig = sig
+
+    @classmethod
+    def fixed(cls, rules: RuleSet) -> "PolicyManager":
+        """A manager that always serves `rules` (version 1) and never reloads."""
+        manager = cls(None)
+        manager._current = Policy(1, None, rules, time.time())
+        return manager
+
+    @property
+    def current(self) -> Policy:
+        return self._current
+
+    @property
+    def version(self) -> int:
+        return self._current.version
+
+    def _signature(self) -> Tuple[int, int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def changed(self) -> bool:
+        """Whether the file's stat signature moved since the last successful load."""
+        try:
+            return self._signature() != self._sig
+        except OSError:
+            return False  # gone (mid-rename?); keep serving the last version
+
+    def reload(self) -> bool:
+        """Load the file if its content changed and is valid. Returns whether a new version went in."""
+        if self.path is None:
+            return False
+        with self._reload_lock:
+            try:
+                sig, data = self._signature(), self._read()
+            except OSError as e:
+                self._reject(None, e)
+                return False
+            digest = _digest(data)
+            if digest == self._current.digest:
+                self._sig, self._rejected = sig, None  # touched, or reverted to what is in force
+                return False
+            if digest == self._rejected:
+                return False  # already reported
+            try:
+                rules = _compile(data)
+            except Exception as e:
+                self._reject(digest, e)
+                return False
+            self._current = Policy(self._current.version + 1, digest, rules, time.time())
+            self._sig, self._rejected = sig, None
+            return True
+
+    def _reject(self, digest: Optional[str], error: Exception):
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        self._rejected = digest
+        print(f"Policy reload rejected, keeping v{self._current.version} ({self.path}):", error)
+
+    # ---- background watching ----
+    def start(self) -> "PolicyManager":
+        if self._thread is None and self.path is not None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="policy-watcher")
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _inotify(self):
+        if INotify is None or self.watch != "auto":
+            return None
+        try:
+            watcher = INotify()
+            watcher.add_watch(os.path.dirname(self.path),
+                              flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.ATTRIB)
+            return watcher
+        except OSError as e:  # e.g. out of watches
+            print("Policy watcher falling back to polling:", e)
+            return None
+
+    def _run(self):
+        watcher = self._inotify()
+        self.watching = "poll" if watcher is None else "inotify"
+        try:
+            while not self._stop.is_set():
+                if watcher is None:
+                    self._stop.wait(self.interval)
+                elif watcher.read(timeout=int(self.interval * 1000)):
+                    # one save can be several writes / renames: wait for them, then drain
+                    self._stop.wait(POLICY_SETTLE_SEC)
+                    watcher.read(timeout=0)
+                # events only say "something in the directory"; the stat signature decides
+                if not self._stop.is_set() and (self.changed() or self._rejected):
+                    self.reload()
+        finally:
+            self.watching = None
+            if watcher is not None:
+                watcher.close()
+
+    def stats(self) -> Dict[str, Any]:
+        version, digest, _, loaded_at = self._current
+        return {"path": self.path, "version": version, "digest": digest, "loaded_at": loaded_at,
+                "watching": self.watching, "errors": self.errors, "last_error": self.last_error}
+
+
+_managers: Dict[str, PolicyManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(path=POLICY_PATH) -> PolicyManager:
+    """Return the process-wide, watching manager for `path`, creating it on first use."""
+    key = os.path.abspath(path)
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(key)
+            if manager is None:
+                manager = _managers[key] = PolicyManager(key).start()
+    return manager
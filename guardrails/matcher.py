@@ -0,0 +1,128 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Below this many distinct patterns a plain `k in text` loop (C substring
+# search) beats walking the automaton in Python, so we keep using it.
+SCAN_THRESHOLD = 256
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern substring matcher (Aho-Corasick).
+
+    Patterns are grouped by name, e.g. {"global": [...], "education.blocked_terms": [...]},
+    and every group is found in a single pass over the lowercased text.
+    Hits keep the same semantics as `[k for k in patterns if k in text.lower()]`,
+    ordered as the patterns were given.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]], threshold: int = SCAN_THRESHOLD):
+        self.groups: Dict[str, Tuple[str, ...]] = {
+            name: tuple(dict.fromkeys(pats)) for name, pats in groups.items()
+        }
+        self.patterns: List[str] = list(dict.fromkeys(
+            p for pats in self.groups.values() for p in pats
+        ))
+        self._index = {p: i for i, p in enumerate(self.patterns)}
+        self.max_len = max(map(len, self.patterns), default=0)
+        self.use_automaton = len(self.patterns) >= threshold
+        self._always: Tuple[int, ...] = ()
+        if self.use_automaton:
+            self._build()
+
+    # ---- construction ----
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for idx, pat in enumerate(self.patterns):
+            if not pat:
+                # "" is a substring of everything
+                self._always += (idx,)
+                continue
+            state = 0
+            for ch in pat:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] += (idx,)
+
+        # breadth-first so a node's failure target is always finished first;
+        # depth-1 nodes keep fail = 0 (the root)
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    # ---- matching ----
+    def _seen(self, text_l: str) -> List[bool]:
+        seen = [False] * len(self.patterns)
+        for i in self._always:
+            seen[i] = True
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text_l:
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            if nxt is None:
+                # only reachable from the root: character starts no pattern
+                state = 0
+                continue
+            state = nxt
+            for i in out[state]:
+                seen[i] = True
+        return seen
+
+    def scan(self, text: str, groups: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Return {group: [hits]} for every requested group (all groups by default)."""
+        text_l = text.lower()
+        names = self.groups if groups is None else groups
+        if not self.use_automaton:
+            contains, groups, found = text_l.__contains__, self.groups, {}
+            for name in names:
+                found[name] = list(filter(contains, groups.get(name, ())))
+            return found
+        seen = self._seen(text_l)
+        index = self._index
+        return {
+            name: [p for p in self.groups.get(name, ()) if seen[index[p]]]
+            for name in names
+        }
+
+    def find(self, text: str, group: str) -> List[str]:
+        if not self.use_automaton:
+            return list(filter(text.lower().__contains__, self.groups.get(group, ())))
+        return self.scan(text, (group,))[group]
+
+    def any(self, text: str, group: str) -> bool:
+        if not self.use_automaton:
+            return any(map(text.lower().__contains__, self.groups.get(group, ())))
+        return bool(self.find(text, group))
+
+    def find_concat(self, head_l: str, head_hits: List[str], tail: str, group: str) -> List[str]:
+        """
+        find(head + tail, group) when `head` was already scanned: `head_l` is
+        head.lower() and `head_hits` its hits. Only `tail` and the few
+        characters around the seam are scanned, so a shared head is paid once.
+        """
+        tail_l = tail.lower()
+        hits = set(head_hits)
+        hits.update(self.find(tail_l, group))
+        n = self.max_len - 1
+        if n > 0 and head_l and tail_l:
+            hits.update(self.find(head_l[-n:] + tail_l[:n], group))
+        return [p for p in self.groups.get(group, ()) if p in hits]
@@ -0,0 +1,203 @@
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+import yaml
+
+from .matcher import KeywordMatcher
+
+POLICY_PATH = Path(__file__).resolve().parent.parent / "data" / "policies.yaml"
+
+# domains with built-in rules; they get defaults even when absent from the yaml
+BUILTIN_DOMAINS = ("finance", "web3", "education")
+
+# per-domain list fields that are matched as substrings of request text
+TERM_FIELDS = ("blocked_terms", "allowed_info_topics")
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """
+    One RuleSet check. With no `terms` the rule blocks outright; otherwise it
+    blocks when `field` matches a term of the matcher group (or, for a
+    whitelist, when a non-empty `field` matches none of them).
+    """
+    reason: str
+    terms: Optional[str] = None
+    field: str = "user_input"
+    whitelist: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class Plan:
+    """Rules for one (domain, action) plus the matcher groups to scan over user_input."""
+    rules: Tuple[Rule, ...]
+    groups: Tuple[str, ...]
+
+    @classmethod
+    def of(cls, *rules: Rule) -> "Plan":
+        terms = tuple(dict.fromkeys(r.terms for r in rules if r.terms and not r.whitelist))
+        return cls(rules, ("global",) + terms)
+
+
+DEFAULT_PLAN = Plan.of()
+
+
+@dataclass(frozen=True, slots=True)
+class DomainPolicy:
+    name: str
+    block_advice: bool
+    allow_advice: Optional[bool]
+    block_execute: bool
+    allowed_info_topics: FrozenSet[str]
+    blocked_terms: FrozenSet[str]
+    safe_actions: FrozenSet[str]
+    blocked_actions: FrozenSet[str]
+    raw: Mapping[str, Any]
+
+    @classmethod
+    def from_config(cls, name: str, raw: Optional[Dict[str, Any]]) -> "DomainPolicy":
+        raw = raw or {}
+        return cls(
+            name=name,
+            block_advice=bool(raw.get("block_advice", True)),
+            allow_advice=raw.get("allow_advice"),
+            block_execute=bool(raw.get("block_execute", True)),
+            allowed_info_topics=frozenset(raw.get("allowed_info_topics", []) or []),
+            blocked_terms=frozenset(raw.get("blocked_terms", []) or []),
+            safe_actions=frozenset(raw.get("safe_actions", []) or []),
+            blocked_actions=frozenset(raw.get("blocked_actions", []) or []),
+            raw=MappingProxyType(dict(raw)),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledPolicy:
+    """
+    Immutable, pre-indexed form of policies.yaml.
+
+    `rules` / `domain_rules` drive RuleSet.check: (domain, action) -> plan of
+    rules to apply in order, falling back to the plan for every action of the
+    domain.
+    `engine_rules` / `engine_defaults` drive GuardrailEngine.check:
+    (domain, action) -> block reason or None for an explicit allow.
+    """
+    domains: Mapping[str, DomainPolicy]
+    blocked_keywords: FrozenSet[str]
+    matcher: KeywordMatcher
+    rules: Mapping[Tuple[str, str], Plan]
+    domain_rules: Mapping[str, Plan]
+    engine_rules: Mapping[Tuple[str, str], Optional[str]]
+    engine_defaults: Mapping[str, str]
+
+    def domain(self, name: str) -> Optional[DomainPolicy]:
+        return self.domains.get(name)
+
+    def plan(self, domain: str, action: str) -> Plan:
+        plan = self.rules.get((domain, action))
+        if plan is None:
+            return self.domain_rules.get(domain, DEFAULT_PLAN)
+        return plan
+
+    def engine_reason(self, domain: str, action: str) -> Optional[str]:
+        key = (domain, action)
+        if key in self.engine_rules:
+            return self.engine_rules[key]
+        return self.engine_defaults.get(domain)
+
+
+def load_config(path=POLICY_PATH) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+# per-domain fields that must be lists of strings / booleans when present
+LIST_FIELDS = TERM_FIELDS + ("safe_actions", "blocked_actions")
+BOOL_FIELDS = ("block_advice", "allow_advice", "block_execute")
+
+
+def validate_config(cfg: Any) -> Dict[str, Any]:
+    """Raise ValueError if `cfg` is not shaped like policies.yaml; returns it otherwise."""
+    def strings(value, where):
+        if value is None:
+            return
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"{where} must be a list of strings")
+
+    if not isinstance(cfg, dict):
+        raise ValueError("policy file must be a mapping")
+    glob = cfg.get("global") or {}
+    if not isinstance(glob, dict):
+        raise ValueError("global must be a mapping")
+    strings(glob.get("blocked_keywords"), "global.blocked_keywords")
+    domains = cfg.get("domains") or {}
+    if not isinstance(domains, dict):
+        raise ValueError("domains must be a mapping")
+    for name, raw in domains.items():
+        if raw is None:
+            continue
+        if not isinstance(raw, dict):
+            raise ValueError(f"domains.{name} must be a mapping")
+        for field in LIST_FIELDS:
+            strings(raw.get(field), f"domains.{name}.{field}")
+        for field in BOOL_FIELDS:
+            if raw.get(field) is not None and not isinstance(raw[field], bool):
+                raise ValueError(f"domains.{name}.{field} must be true or false")
+    return cfg
+
+
+def compile_policy(cfg: Dict[str, Any]) -> CompiledPolicy:
+    raw_domains = cfg.get("domains", {}) or {}
+    keywords = cfg.get("global", {}).get("blocked_keywords", []) or []
+
+    groups = {"global": keywords}
+    for name, raw in raw_domains.items():
+        for field in TERM_FIELDS:
+            groups[f"{name}.{field}"] = (raw or {}).get(field, []) or []
+    matcher = KeywordMatcher(groups)
+
+    domains = {
+        name: DomainPolicy.from_config(name, raw_domains.get(name))
+        for name in (*raw_domains, *BUILTIN_DOMAINS)
+    }
+    finance, web3, education = (domains[d] for d in BUILTIN_DOMAINS)
+
+    # ---- RuleSet.check dispatch ----
+    rules: Dict[Tuple[str, str], Plan] = {}
+    domain_rules: Dict[str, Plan] = {}
+    if finance.block_advice:
+        rules[("finance", "give_advice")] = Plan.of(Rule("finance_advice_blocked"))
+    if finance.allowed_info_topics:
+        rules[("finance", "give_information")] = Plan.of(
+            Rule("finance_topic_not_whitelisted", terms="finance.allowed_info_topics",
+                 field="query", whitelist=True),
+        )
+    if web3.block_execute:
+        rules[("web3", "execute_transaction")] = Plan.of(Rule("web3_execute_blocked"))
+    if education.blocked_terms:
+        domain_rules["education"] = Plan.of(
+            Rule("education_blocked_content", terms="education.blocked_terms"),
+        )
+
+    # ---- GuardrailEngine.check dispatch ----
+    engine_rules: Dict[Tuple[str, str], Optional[str]] = {}
+    engine_defaults: Dict[str, str] = {}
+    if finance.allow_advice is False:
+        engine_rules[("finance", "give_advice")] = "finance_advice_disallowed"
+    if web3.safe_actions:
+        engine_defaults["web3"] = "web3_action_not_permitted"
+        for action in web3.safe_actions:
+            engine_rules[("web3", action)] = None
+    for action in web3.blocked_actions:
+        engine_rules[("web3", action)] = "web3_action_not_permitted"
+
+    return CompiledPolicy(
+        domains=MappingProxyType(domains),
+        blocked_keywords=frozenset(keywords),
+        matcher=matcher,
+        rules=MappingProxyType(rules),
+        domain_rules=MappingProxyType(domain_rules),
+        engine_rules=MappingProxyType(engine_rules),
+        engine_defaults=MappingProxyType(engine_defaults),
+    )
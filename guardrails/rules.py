@@ -1,16 +1,23 @@
 from typing import Dict, Any, List
 import re
 
+from .policy import POLICY_PATH, compile_policy, load_config
+
+
 class RuleSet:
     def __init__(self, cfg: Dict[str, Any]):
         self.cfg = cfg
         # load global blocked keywords
         self.blocked = set(cfg.get("global", {}).get("blocked_keywords", []))
+        self.policy = compile_policy(cfg)
+        self.matcher = self.policy.matcher
+
+    @classmethod
+    def from_yaml(cls, path=POLICY_PATH) -> "RuleSet":
+        return cls(load_config(path))
 
     def violates_keywords(self, text: str) -> List[str]:
-        text_l = text.lower()
-        hits = [k for k in self.blocked if k in text_l]
-        return hits
+        return self.matcher.find(text, "global")
 
     def domain_policy(self, domain: str) -> Dict[str, Any]:
         return self.cfg.get("domains", {}).get(domain, {})
@@ -20,33 +27,25 @@ class RuleSet:
         Returns (allow: bool, reason: str)
         """
 
+        # (domain, action) -> pre-indexed rules; global keywords and any
+        # user_input term list (education) are found in one pass
+        plan = self.policy.plan(domain, action)
+        found = self.matcher.scan(user_input, plan.groups)
+
         # --- Global keyword block ---
-        hits = self.violates_keywords(user_input)
+        hits = found["global"]
         if hits:
             return False, f"global_blocked_keywords: {hits}"
 
-        policy = self.domain_policy(domain)
-
-        # --- Finance rules ---
-        if domain == "finance":
-            if policy.get("block_advice", True) and action == "give_advice":
-                return False, "finance_advice_blocked"
-
-            allowed_topics = set(policy.get("allowed_info_topics", []))
-            if action == "give_information" and allowed_topics:
-                topic = (params or {}).get("query", "").lower()
-                if topic and not any(a in topic for a in allowed_topics):
-                    return False, "finance_topic_not_whitelisted"
-
-        # --- Web3 rules ---
-        if domain == "web3":
-            if policy.get("block_execute", True) and action == "execute_transaction":
-                return False, "web3_execute_blocked"
-
-        # --- Education rules ---
-        if domain == "education":
-            blocked_terms = set(policy.get("blocked_terms", []))
-            if any(term in user_input.lower() for term in blocked_terms):
-                return False, "education_blocked_content"
+        # --- Domain rules (finance / web3 / education) ---
+        for rule in plan.rules:
+            if rule.terms is None:
+                return False, rule.reason
+            if rule.whitelist:
+                text = (params or {}).get(rule.field, "").lower()
+                if text and not self.matcher.any(text, rule.terms):
+                    return False, rule.reason
+            elif found[rule.terms]:
+                return False, rule.reason
 
         return True, "ok"
@@ -0,0 +1,92 @@
+# scripts/bench_dashboard.py
+# CPU per refresh of one idle dashboard tab (no new events), old data path
+# vs dashboard.feed + cached renders, against a local fake of the agent's
+# /api/logs and /api/logs/stream holding BENCH_EVENTS events.
+#   python scripts/bench_dashboard.py
+import json, os, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import requests
+
+from dashboard.feed import EventFeed, summarize_frame
+from dashboard.view import chart_png, table_html
+from scripts.bench_summarize import summarize_row  # the old per-row path
+
+EVENTS = int(os.getenv("BENCH_EVENTS", "50"))
+CYCLES = int(os.getenv("BENCH_CYCLES", "20"))
+
+
+def _events(n):
+    return [{"seq": i + 1, "ts": f"2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z", "domain": "finance",
+             "action": "transfer", "blocked": i % 4 == 0, "reason": "limit" if i % 4 == 0 else None,
+             "params": {"amount": i}} for i in range(n)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    events = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/api/logs":
+            limit = int(q.get("limit", 50))
+            body = {"ok": True, "events": self.events[-limit:], "cursor": len(self.events)}
+        else:  # /api/logs/stream: the cursor is an index here
+            start = int(q.get("offset", 0))
+            body = {"ok": True, "events": self.events[start:], "cursor": len(self.events)}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def old_cycle(api):
+    # check_backend() + fetch_events() + metrics/chart/table rebuilt every time
+    requests.get(f"{api}/api/logs", timeout=5)
+    raw = requests.get(f"{api}/api/logs", timeout=10).json().get("events", [])[-2000:]
+    rows = [summarize_row(r) for r in raw]
+    blocked = [r for r in rows if r["blocked"]]
+    allowed = [r for r in rows if not r["blocked"]]
+    chart_png([("finance", len(allowed), len(blocked))])
+    table_html(summarize_frame(raw))
+
+
+def new_cycle(feed, cache):
+    feed.poll()
+    if cache.get("version") != feed.version:
+        cache.update(version=feed.version, chart=chart_png([("finance", feed.allowed, feed.blocked)]),
+                     table=table_html(feed.frame))
+
+
+def measure(fn, *args):
+    fn(*args)  # warm-up (and, for the feed, the initial full load)
+    cpu, wall = time.thread_time(), time.perf_counter()
+    for _ in range(CYCLES):
+        fn(*args)
+    return (time.thread_time() - cpu) / CYCLES * 1000, (time.perf_counter() - wall) / CYCLES * 1000
+
+
+def main():
+    _Handler.events = _events(EVENTS)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        old = measure(old_cycle, api)
+        new = measure(new_cycle, EventFeed(api), {})
+    finally:
+        server.shutdown()
+    print(f"{EVENTS} events, idle tab, per refresh (dashboard thread only):")
+    print(f"  old path: {old[0]:8.2f} ms CPU {old[1]:8.2f} ms wall")
+    print(f"  new path: {new[0]:8.2f} ms CPU {new[1]:8.2f} ms wall")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# scripts/bench_keywords.py
+# Compare RuleSet keyword scanning (substring loop vs. Aho-Corasick automaton).
+#   python scripts/bench_keywords.py
+import os, random, string, sys, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from guardrails.matcher import KeywordMatcher
+
+TEXT_LEN = int(os.getenv("BENCH_TEXT_LEN", "4000"))
+
+
+def legacy(blocked, text):
+    text_l = text.lower()
+    return [k for k in blocked if k in text_l]
+
+
+def main():
+    rng = random.Random(42)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+             for _ in range(20000)]
+    text = " ".join(rng.choice(words) for _ in range(TEXT_LEN // 6))[:TEXT_LEN]
+
+    print(f"text length: {len(text)} chars")
+    print(f"{'keywords':>9} {'loop us':>10} {'automaton us':>13} {'default us':>11} {'speedup':>8}")
+    for n in (10, 1_000, 50_000):
+        keywords = list(dict.fromkeys(
+            "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+            + rng.choice(["", " ", " " + rng.choice(words)])
+            for _ in range(n)
+        ))
+        blocked = set(keywords)
+        auto = KeywordMatcher({"global": keywords}, threshold=0)
+        default = KeywordMatcher({"global": keywords})
+        assert sorted(auto.find(text, "global")) == sorted(legacy(blocked, text))
+
+        reps = max(3, 2000 // max(1, n // 50))
+        t_loop = min(timeit.repeat(lambda: legacy(blocked, text), number=reps, repeat=3)) / reps
+        t_auto = min(timeit.repeat(lambda: auto.find(text, "global"), number=reps, repeat=3)) / reps
+        t_def = min(timeit.repeat(lambda: default.find(text, "global"), number=reps, repeat=3)) / reps
+        print(f"{len(keywords):>9} {t_loop * 1e6:>10.1f} {t_auto * 1e6:>13.1f} "
+              f"{t_def * 1e6:>11.1f} {t_loop / t_def:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# scripts/bench_membership.py
+# holds_asa latency per backend against the local stub node, for accounts
+# holding 100 .. 20k assets (the target ASA last, the worst case for a scan).
+#   python scripts/bench_membership.py
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algosdk import account
+from algosdk.v2client import algod, indexer
+
+from blockchain.membership import BACKENDS, make_backend
+from scripts.stub_algod import StubNode, synthetic_account
+
+ASA = 745467084
+SIZES = [int(x) for x in os.getenv("BENCH_SIZES", "100,1000,5000,20000").split(",")]
+N = int(os.getenv("BENCH_N", "50"))
+
+
+def main():
+    accounts = {n: account.generate_account()[1] for n in SIZES}
+    with StubNode({addr: synthetic_account(n, ASA) for n, addr in accounts.items()}) as node:
+        a, i = algod.AlgodClient("", node.url), indexer.IndexerClient("", node.url)
+        print(f"{'assets':>8} " + " ".join(f"{name:>14}" for name in BACKENDS) + "   (ms/lookup)")
+        for n, addr in accounts.items():
+            row = []
+            for name in BACKENDS:
+                backend = make_backend(name, a, i)
+                assert backend.holds(addr, ASA)
+                t0 = time.perf_counter()
+                for _ in range(N):
+                    backend.holds(addr, ASA)
+                row.append((time.perf_counter() - t0) / N * 1000)
+            print(f"{n:>8} " + " ".join(f"{ms:>14.2f}" for ms in row))
+
+
+if __name__ == "__main__":
+    main()
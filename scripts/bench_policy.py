@@ -0,0 +1,114 @@
+# scripts/bench_policy.py
+# ns/decision for the dict-lookup policy path vs. the compiled policy.
+#   python scripts/bench_policy.py
+import copy, os, random, string, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from guardrails.policy import load_config
+from guardrails.rules import RuleSet
+
+N = int(os.getenv("BENCH_N", "60000"))
+
+
+class LegacyRuleSet:
+    """RuleSet.check / GuardrailEngine policy checks as they were before compile_policy."""
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.blocked = set(cfg.get("global", {}).get("blocked_keywords", []))
+
+    def violates_keywords(self, text):
+        text_l = text.lower()
+        return [k for k in self.blocked if k in text_l]
+
+    def domain_policy(self, domain):
+        return self.cfg.get("domains", {}).get(domain, {})
+
+    def check(self, domain, action, params, user_input):
+        hits = self.violates_keywords(user_input)
+        if hits:
+            return False, f"global_blocked_keywords: {hits}"
+        policy = self.domain_policy(domain)
+        if domain == "finance":
+            if policy.get("block_advice", True) and action == "give_advice":
+                return False, "finance_advice_blocked"
+            allowed_topics = set(policy.get("allowed_info_topics", []))
+            if action == "give_information" and allowed_topics:
+                topic = (params or {}).get("query", "").lower()
+                if topic and not any(a in topic for a in allowed_topics):
+                    return False, "finance_topic_not_whitelisted"
+        if domain == "web3":
+            if policy.get("block_execute", True) and action == "execute_transaction":
+                return False, "web3_execute_blocked"
+        if domain == "education":
+            blocked_terms = set(policy.get("blocked_terms", []))
+            if any(term in user_input.lower() for term in blocked_terms):
+                return False, "education_blocked_content"
+        return True, "ok"
+
+    def engine_reason(self, domain, action):
+        policy = self.domain_policy(domain)
+        reason = None
+        if domain == "finance" and policy.get("allow_advice") is False:
+            if action == "give_advice":
+                reason = "finance_advice_disallowed"
+        if domain == "web3":
+            safe = set(policy.get("safe_actions", []))
+            blocked = set(policy.get("blocked_actions", []))
+            if action in blocked or (safe and action not in safe):
+                reason = "web3_action_not_permitted"
+        return reason
+
+
+REQUESTS = [
+    ("education", "tutor_answer", {"topic": "derivatives"}, "Explain calculus basics"),
+    ("education", "tutor_answer", {"topic": "cheating"}, "How do I cheat on exam day"),
+    ("finance", "give_advice", {"query": "which coin"}, "Tell me which crypto to buy"),
+    ("finance", "give_information", {"query": "ETFs"}, "General information on ETFs"),
+    ("web3", "execute_transaction", {"tx": "0x..."}, "Execute this transaction"),
+    ("web3", "propose_vote", {"proposal": "Fund X"}, "Summarise this proposal"),
+]
+
+
+def bench(fn):
+    reqs = REQUESTS * (N // len(REQUESTS))
+    t0 = time.perf_counter_ns()
+    for r in reqs:
+        fn(*r)
+    return (time.perf_counter_ns() - t0) / len(reqs)
+
+
+def large_config(cfg, n):
+    """The shipped policy padded with n random keywords / terms / topics per list."""
+    rng = random.Random(n)
+    words = lambda: ["".join(rng.choice(string.ascii_lowercase) for _ in range(8)) for _ in range(n)]
+    cfg = copy.deepcopy(cfg)
+    cfg["global"]["blocked_keywords"] += words()
+    cfg["domains"]["finance"]["allowed_info_topics"] += words()
+    cfg["domains"]["education"]["blocked_terms"] += words()
+    cfg["domains"]["web3"].update({"safe_actions": ["propose_vote"] + words(), "blocked_actions": words()})
+    return cfg
+
+
+def main():
+    base = load_config()
+    base["domains"]["web3"].update({"safe_actions": ["propose_vote"], "blocked_actions": ["drain"]})
+    print(f"{'policy':<14} {'path':<22} {'before ns':>10} {'after ns':>10} {'speedup':>8}")
+    for label, cfg in (("shipped", base), ("500/list", large_config(base, 500))):
+        legacy, compiled = LegacyRuleSet(cfg), RuleSet(cfg)
+        for r in REQUESTS:
+            assert legacy.check(*r)[0] == compiled.check(*r)[0]
+            assert legacy.engine_reason(r[0], r[1]) == compiled.policy.engine_reason(r[0], r[1])
+
+        policy = compiled.policy
+        rows = [
+            ("RuleSet.check", bench(legacy.check), bench(compiled.check)),
+            ("engine policy lookup", bench(lambda d, a, p, u: legacy.engine_reason(d, a)),
+             bench(lambda d, a, p, u: policy.engine_reason(d, a))),
+        ]
+        for name, before, after in rows:
+            print(f"{label:<14} {name:<22} {before:>10.0f} {after:>10.0f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# scripts/bench_summarize.py
+# Summarizing N raw events (half engine decisions, half agent events) into
+# the dashboard's table plus allowed / blocked counts: per-row summarize_row()
+# into a DataFrame vs dashboard.feed.summarize_frame().
+#   python scripts/bench_summarize.py            # 10k, 100k, 1M
+#   BENCH_SIZES=10000 python scripts/bench_summarize.py
+import os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+
+from dashboard.feed import summarize_frame
+
+SIZES = [int(n) for n in os.getenv("BENCH_SIZES", "10000,100000,1000000").split(",")]
+ACTIONS = ["transfer", "mint", "approve", "swap"]
+
+
+# the dashboard's old per-row path, kept here as the baseline
+def is_blocked(row: dict) -> bool:
+    if "blocked" in row:
+        return bool(row.get("blocked"))
+    try:
+        return not bool(row["decision"]["allow"])
+    except Exception:
+        return False
+
+
+def summarize_row(row: dict) -> dict:
+    ts = row.get("ts") or row.get("timestamp") or ""
+    if isinstance(ts, str):
+        ts_str = ts.replace("T", " ").split(".")[0]
+    else:
+        ts_str = str(ts)
+    return {
+        "ts": ts_str,
+        "action": row.get("action") or row.get("type", "unknown"),
+        "blocked": is_blocked(row),
+        "reason": row.get("reason", ""),
+        "txid": row.get("txid", "N/A"),
+        "params": row.get("params", {}),
+    }
+
+
+def _events(n):
+    out = []
+    for i in range(n):
+        blocked = i % 5 == 0
+        if i % 2:  # agent event
+            out.append({"seq": i, "ts": 1735689600 + i, "domain": "finance", "action": ACTIONS[i % 4],
+                        "blocked": blocked, "reason": "limit" if blocked else None,
+                        "txid": f"TX{i}", "params": {"amount": i}})
+        else:  # engine decision
+            out.append({"timestamp": f"2025-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.123Z",
+                        "type": ACTIONS[i % 4], "decision": {"allow": not blocked},
+                        "reason": "policy" if blocked else "", "params": {"amount": i}})
+    return out
+
+
+def old_path(events):
+    rows = [summarize_row(e) for e in events]
+    blocked = len([r for r in rows if r["blocked"]])
+    allowed = len([r for r in rows if not r["blocked"]])
+    return pd.DataFrame(rows), allowed, blocked
+
+
+def new_path(events):
+    frame = summarize_frame(events)
+    blocked = int(frame["blocked"].sum())
+    return frame, len(frame) - blocked, blocked
+
+
+def measure(fn, events):
+    start = time.perf_counter()
+    frame, allowed, blocked = fn(events)
+    return time.perf_counter() - start, frame, allowed + blocked
+
+
+def main():
+    print(f"{'events':>9} {'per-row':>10} {'vectorized':>11} {'speedup':>8}")
+    for n in SIZES:
+        events = _events(n)
+        old, _, total_old = measure(old_path, events)
+        new, frame, total_new = measure(new_path, events)
+        assert total_old == total_new == n
+        print(f"{n:>9} {old:>9.3f}s {new:>10.3f}s {old / new:>7.2f}x")
+    print("vectorized columns:", ", ".join(f"{c}={t}" for c, t in frame.dtypes.items()))
+
+
+if __name__ == "__main__":
+    main()
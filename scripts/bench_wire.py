@@ -0,0 +1,58 @@
+# scripts/bench_wire.py
+# /api/logs payload size and client decode time for each wire format and
+# compression (eventlog.wire), on BENCH_EVENTS agent-style events. Server
+# encode time is listed too; decode includes decompression and, for Arrow,
+# conversion of the table to a pandas DataFrame.
+#   python scripts/bench_wire.py
+import gzip, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eventlog import wire
+
+EVENTS = int(os.getenv("BENCH_EVENTS", "5000"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "5"))
+ACTIONS = ["transfer", "mint", "approve", "swap"]
+
+
+def _payload(n):
+    events = [{"ts": f"2025-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d}000Z",
+               "domain": "finance", "action": ACTIONS[i % 4], "blocked": i % 5 == 0,
+               "reason": "Blocked by policy: amount over limit" if i % 5 == 0 else None,
+               "params": {"amount": i * 10, "receiver": f"RCV{i % 97:04d}", "note": "invoice"},
+               "seq": i + 1} for i in range(n)]
+    return {"ok": True, "events": events, "next_before": 0, "cursor": n * 200}
+
+
+def _decoder(media, coding):
+    inflate = {None: lambda b: b, "gzip": gzip.decompress}
+    if coding == "br":
+        inflate["br"] = wire.brotli.decompress
+    if media == wire.ARROW:
+        return lambda body: wire.read_arrow(inflate[coding](body))[0].to_pandas()
+    return lambda body: wire.decode(inflate[coding](body), media)
+
+
+def best_of(fn, arg):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    payload = _payload(EVENTS)
+    print(f"{EVENTS} events; best of {REPEAT}")
+    print(f"{'format':<44} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for media in wire.media_types():
+        for coding in [None] + wire.encodings():
+            encode = lambda p: wire.compress(wire.encode(p, media), coding)
+            body, _ = encode(payload)
+            label = media + (f" + {coding}" if coding else "")
+            print(f"{label:<44} {len(body):>10} {best_of(encode, payload):>10.2f} "
+                  f"{best_of(_decoder(media, coding), body):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
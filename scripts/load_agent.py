@@ -0,0 +1,56 @@
+# scripts/load_agent.py
+# Load test for POST /query (web3 propose_vote) against a local stub algod
+# with a fixed per-request latency. Every request uses a fresh wallet, so each
+# one is a real membership RPC; the app runs in-process as one worker.
+#   python scripts/load_agent.py            # LOAD_N=2000 LOAD_DELAY_MS=50
+import asyncio, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import httpx
+from algosdk import account
+
+import agent.agent as agent_mod
+from blockchain import nft_access
+from blockchain.aio import AsyncNodeClient
+from blockchain.membership import MembershipCache
+from eventlog.sink import close_all
+from scripts.stub_algod import StubNode
+
+N = int(os.getenv("LOAD_N", "2000"))
+DELAY = float(os.getenv("LOAD_DELAY_MS", "50")) / 1000
+ASA = nft_access.env_asa_id() or nft_access.DEFAULT_ASA_ID
+
+
+async def main():
+    wallets = [account.generate_account()[1] for _ in range(N)]
+    with StubNode({w: {ASA: 1} for w in wallets[::2]}, delay=DELAY) as node:
+        nft_access.aclient = AsyncNodeClient("", node.url)
+        nft_access.membership_backend = "algod"
+        nft_access.membership_cache = MembershipCache()
+        agent_mod.EVENTS_FILE = agent_mod.LOG_DIR / "load-test.jsonl"
+
+        transport = httpx.ASGITransport(app=agent_mod.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://agent") as http:
+            async def vote(w):
+                r = await http.post("/query", json={"domain": "web3", "action": "propose_vote",
+                                                    "params": {"wallet_address": w}})
+                return r.json()["blocked"]
+
+            t0 = time.perf_counter()
+            blocked = await asyncio.gather(*(vote(w) for w in wallets))
+            elapsed = time.perf_counter() - t0
+
+    assert blocked == [i % 2 == 1 for i in range(N)]
+    print(f"{N} membership checks, {DELAY * 1000:.0f} ms node latency")
+    print(f"  wall {elapsed:.2f}s  ->  {N / elapsed:.0f} req/s, "
+          f"peak {node.peak} concurrent node requests (serial would take {N * DELAY:.0f}s)")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        close_all()
+        path = agent_mod.LOG_DIR / "load-test.jsonl"
+        if path.exists():
+            path.unlink()
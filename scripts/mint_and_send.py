@@ -1,19 +1,19 @@
 # scripts/mint_and_send.py
-import os, time
-from algosdk.v2client import algod, indexer
+import os, sys, time
 from algosdk import account, mnemonic
 from algosdk import transaction as tx
 
-ALGOD_URL     = os.getenv("ALGO_ALGOD_URL", "https://testnet-api.algonode.cloud")
-INDEXER_URL   = os.getenv("ALGO_INDEXER_URL", "https://testnet-idx.algonode.cloud")
-ALGOD_TOKEN   = os.getenv("ALGO_API_KEY", "")           # none needed for Algonode
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from blockchain.clients import get_algod, get_indexer
+
 PARA_ADDR     = os.getenv("PARA_ADDR")                  # your ParaWallet address
 
 if not PARA_ADDR:
     raise SystemExit("Set PARA_ADDR to your ParaWallet TestNet address")
 
-algod_client   = algod.AlgodClient(ALGOD_TOKEN, ALGOD_URL)
-indexer_client = indexer.IndexerClient(ALGOD_TOKEN, INDEXER_URL)
+# shared clients; ALGO_ALGOD_URL / ALGO_INDEXER_URL / ALGO_API_KEY (none needed for Algonode)
+algod_client   = get_algod()
+indexer_client = get_indexer()
 
 def wait(txid, max_rounds=30):
     for _ in range(max_rounds):
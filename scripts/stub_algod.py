@@ -0,0 +1,294 @@
+# scripts/stub_algod.py
+# Local stand-in for algod + indexer, for tests, benchmarks and load tests.
+# It serves the response shapes our code reads, from in-memory accounts:
+#   algod   GET /v2/accounts/{addr}                 full account (all assets)
+#   algod   GET /v2/accounts/{addr}/assets/{id}     one holding, 404 if not opted in
+#   indexer GET /v2/accounts/{addr}/assets?asset-id one holding as a list
+#   indexer GET /v2/assets/{id}/balances            holders, paginated by next-token
+#   algod   GET /v2/status, /v2/transactions/params, /v2/transactions/pending/{txid}
+#   algod   POST /v2/transactions                   accepts signed txns (group or single)
+#   indexer GET /v2/accounts/{addr}/transactions    history, newest first (min-round, limit, next)
+#   indexer GET /v2/transactions?txid               one confirmed transaction by id
+# Rounds only move when advance() is called; sent transactions confirm then
+# unless `confirming` is off, in which case they expire after their last valid
+# round (and are forgotten, like algod's pool).
+#
+#   python scripts/stub_algod.py --port 4001 --assets 5000
+import base64
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import msgpack
+from algosdk import transaction
+
+ACCOUNT_ASSET = re.compile(r"^/v2/accounts/([A-Z2-7]+)/assets/(\d+)$")
+ACCOUNT_ASSETS = re.compile(r"^/v2/accounts/([A-Z2-7]+)/assets$")
+ACCOUNT = re.compile(r"^/v2/accounts/([A-Z2-7]+)$")
+ASSET_BALANCES = re.compile(r"^/v2/assets/(\d+)/balances$")
+ACCOUNT_TXNS = re.compile(r"^/v2/accounts/([A-Z2-7]+)/transactions$")
+PENDING = re.compile(r"^/v2/transactions/pending/([A-Z2-7]+)$")
+GENESIS_HASH = base64.b64encode(b"\x07" * 32).decode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # load tests open many connections at once
+
+
+class StubNode:
+    """
+    accounts: {address: {asa_id: amount}}. `delay` adds latency per request,
+    a non-None `fail_status` makes every request fail with it; `requests`
+    counts hits per route name and `peak` the most requests in flight at once.
+    """
+
+    def __init__(self, accounts: Optional[Dict[str, Dict[int, int]]] = None,
+                 delay: float = 0.0, round: int = 1000):
+        self.accounts = accounts or {}
+        self.delay = delay
+        self.round = round
+        self.fail_status: Optional[int] = None
+        self._txn_seq = 0
+        self.confirming = True
+        # txid -> {"confirmed-round": int, "last-valid": int, "pool-error": str, "txn": indexer dict}
+        self.txns: Dict[str, Dict[str, Any]] = {}
+        # address -> confirmed transactions in indexer shape, oldest first
+        self.history: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests: Dict[str, int] = {}
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ---- lifecycle ----
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, port: int = 0) -> "StubNode":
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                node._handle(self, "GET")
+
+            def do_POST(self):
+                node._handle(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- chain ----
+    def advance(self, rounds: int = 1):
+        """Move the chain forward; pending transactions confirm or expire."""
+        with self._lock:
+            for _ in range(rounds):
+                self.round += 1
+                for txid, t in list(self.txns.items()):
+                    if t["confirmed-round"]:
+                        continue
+                    if self.round > t["last-valid"]:
+                        del self.txns[txid]
+                    elif self.confirming:
+                        t["confirmed-round"] = self.round
+                        self._record(dict(t["txn"]))
+
+    def add_transaction(self, **fields) -> Dict[str, Any]:
+        """Put a confirmed transaction (indexer shape) in the history, at the current round."""
+        with self._lock:
+            self._txn_seq += 1
+            txn = {"id": f"STUB{self._txn_seq:048d}", "tx-type": "pay", "fee": 1000,
+                   "sender": "", "payment-transaction": {"receiver": "", "amount": 0}, **fields}
+            return self._record(txn)
+
+    def _record(self, txn: Dict[str, Any]) -> Dict[str, Any]:
+        txn.setdefault("confirmed-round", self.round)
+        txn.setdefault("round-time", 1_700_000_000 + 3 * txn["confirmed-round"])
+        parties = {txn.get("sender"), txn.get("payment-transaction", {}).get("receiver")}
+        for addr in filter(None, parties):
+            self.history.setdefault(addr, []).append(txn)
+        return txn
+
+    def _accept(self, body: bytes) -> str:
+        txids = []
+        unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+        unpacker.feed(body)
+        with self._lock:
+            for obj in unpacker:
+                stxn = transaction.SignedTransaction.undictify(obj)
+                txid = stxn.get_txid()
+                self.txns[txid] = {"confirmed-round": 0, "last-valid": stxn.transaction.last_valid_round,
+                                   "pool-error": "", "txn": _indexer_txn(txid, stxn.transaction)}
+                txids.append(txid)
+        return txids[0]
+
+    # ---- routing ----
+    def _count(self, name: str):
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    def _handle(self, h: BaseHTTPRequestHandler, method: str):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            self._respond(h, method)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _respond(self, h: BaseHTTPRequestHandler, method: str):
+        if self.delay:
+            time.sleep(self.delay)
+        url = urlparse(h.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(h.headers.get("Content-Length") or 0)
+        body = h.rfile.read(length) if length else b""
+        status, payload = self.route(method, url.path, query, body)
+        data = json.dumps(payload).encode()
+        h.send_response(status)
+        h.send_header("Content-Type", "application/json")
+        h.send_header("Content-Length", str(len(data)))
+        h.end_headers()
+        h.wfile.write(data)
+
+    def route(self, method: str, path: str, query: Dict[str, str], body: bytes):
+        if self.fail_status is not None:
+            return self.fail_status, {"message": "stub: injected failure"}
+        if path == "/v2/status":
+            self._count("status")
+            return 200, {"last-round": self.round}
+        if path == "/v2/transactions/params":
+            self._count("params")
+            return 200, {"consensus-version": "stub", "fee": 0, "genesis-hash": GENESIS_HASH,
+                         "genesis-id": "stub-v1", "last-round": self.round, "min-fee": 1000}
+        if path == "/v2/transactions" and method == "POST":
+            self._count("send")
+            return 200, {"txId": self._accept(body)}
+        if path == "/v2/transactions":
+            self._count("search_transactions")
+            txid = query.get("txid")
+            seen = {t["id"]: t for txns in self.history.values() for t in txns}
+            return 200, {"current-round": self.round, "transactions": [seen[txid]] if txid in seen else []}
+        m = PENDING.match(path)
+        if m:
+            self._count("pending")
+            t = self.txns.get(m.group(1))
+            if t is None:
+                return 404, {"message": "txn does not exist"}
+            return 200, {"confirmed-round": t["confirmed-round"], "pool-error": t["pool-error"]}
+        m = ACCOUNT_ASSET.match(path)
+        if m:
+            self._count("account_asset")
+            amount = self.accounts.get(m.group(1), {}).get(int(m.group(2)))
+            if amount is None:
+                return 404, {"message": "account asset info not found"}
+            return 200, {"round": self.round,
+                         "asset-holding": _holding(int(m.group(2)), amount)}
+        m = ACCOUNT_TXNS.match(path)
+        if m:
+            self._count("account_transactions")
+            txns = [t for t in self.history.get(m.group(1), [])
+                    if t["confirmed-round"] >= int(query.get("min-round", 0))]
+            txns.reverse()  # newest first, like the indexer
+            start, limit = int(query.get("next") or 0), int(query.get("limit") or 1000)
+            page = txns[start:start + limit]
+            out = {"current-round": self.round, "transactions": page}
+            if len(page) == limit:
+                out["next-token"] = str(start + limit)
+            return 200, out
+        m = ACCOUNT_ASSETS.match(path)
+        if m:
+            self._count("indexer_account_assets")
+            if m.group(1) not in self.accounts:
+                return 404, {"message": f"no accounts found for address: {m.group(1)}"}
+            held = self.accounts[m.group(1)]
+            wanted = int(query["asset-id"]) if "asset-id" in query else None
+            assets = [_holding(a, amt) for a, amt in held.items() if wanted in (None, a)]
+            return 200, {"current-round": self.round, "assets": assets}
+        m = ASSET_BALANCES.match(path)
+        if m:
+            self._count("asset_balances")
+            asa_id, start = int(m.group(1)), int(query.get("next") or 0)
+            limit = int(query.get("limit") or 1000)
+            floor = int(query.get("currency-greater-than", -1))
+            holders = [{"address": addr, "amount": held[asa_id], "is-frozen": False, "deleted": False}
+                       for addr, held in sorted(self.accounts.items())
+                       if asa_id in held and held[asa_id] > floor]
+            page = holders[start:start + limit]
+            out = {"current-round": self.round, "balances": page}
+            if len(page) == limit:
+                out["next-token"] = str(start + limit)
+            return 200, out
+        m = ACCOUNT.match(path)
+        if m:
+            self._count("account_info")
+            held = self.accounts.get(m.group(1), {})
+            return 200, {"address": m.group(1), "amount": 1_000_000, "round": self.round,
+                         "assets": [_holding(a, amt) for a, amt in held.items()]}
+        return 404, {"message": f"stub: no route for {method} {path}"}
+
+
+def _indexer_txn(txid: str, txn) -> Dict[str, Any]:
+    out = {"id": txid, "tx-type": txn.type, "sender": txn.sender, "fee": txn.fee,
+           "first-valid": txn.first_valid_round, "last-valid": txn.last_valid_round}
+    if txn.note:
+        out["note"] = base64.b64encode(txn.note).decode()
+    if txn.group:
+        out["group"] = base64.b64encode(txn.group).decode()
+    if txn.type == "pay":
+        out["payment-transaction"] = {"receiver": txn.receiver, "amount": txn.amt}
+    return out
+
+
+def _holding(asa_id: int, amount: int) -> dict:
+    return {"asset-id": asa_id, "amount": amount, "is-frozen": False}
+
+
+def synthetic_account(n_assets: int, asa_id: int, amount: int = 1) -> Dict[int, int]:
+    """n_assets holdings, with `asa_id` last so a linear scan has to walk them all."""
+    held = {100_000 + i: 1 for i in range(n_assets - 1)}
+    held[asa_id] = amount
+    return held
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from algosdk import account
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=4001)
+    parser.add_argument("--assets", type=int, default=1000)
+    parser.add_argument("--asa", type=int, default=745467084)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    addr = account.generate_account()[1]
+    node = StubNode({addr: synthetic_account(args.assets, args.asa)}, delay=args.delay).start(args.port)
+    print(f"stub algod/indexer on {node.url}; holder {addr} has {args.assets} assets")
+    threading.Event().wait()
@@ -1,20 +1,28 @@
 # server.py
-from flask import Flask, jsonify
-from algosdk.v2client import algod, indexer
+from flask import Flask, Response, jsonify, request
 from datetime import datetime
 from flask_cors import CORS
 import os
 
+from blockchain.clients import get_algod, get_indexer
+from blockchain.mirror import MIRROR_ADDRESSES, MIRROR_DB, MirrorSync, TransactionMirror
+from blockchain.txfeed import get_feed
+from eventlog import wire
+
 # === Flask Setup ===
 app = Flask(__name__)
 CORS(app)
 
-# === Algorand Clients ===
-ALGOD_URL = "https://testnet-api.algonode.cloud"
-INDEXER_URL = "https://testnet-idx.algonode.cloud"
+# === Algorand Clients (shared; ALGO_ALGOD_URL / ALGO_INDEXER_URL / ALGO_API_KEY) ===
+client = get_algod()
+indexer_client = get_indexer()
+
+# Your monitored wallet address
+WALLET = os.getenv("AFREECHAIN_WALLET", "SONYLXSLS4W6DW4YGILBQBLIFH74CJAXMFX5CZVXCQG06LQK7GCRWJAY")
 
-client = algod.AlgodClient("", ALGOD_URL)
-indexer_client = indexer.IndexerClient("", INDEXER_URL)
+# === Local transaction mirror (ALGO_MIRROR_DB; off when unset) ===
+mirror = TransactionMirror(MIRROR_DB) if MIRROR_DB else None
+mirror_sync = MirrorSync(mirror, indexer_client, MIRROR_ADDRESSES or [WALLET]).start() if mirror else None
 
 # === Health Check Endpoint ===
 @app.route("/", methods=["GET"])
@@ -26,17 +34,25 @@ def root():
         "status": status
     }), 200
 
+def negotiated(payload, status=200):
+    """`payload` as JSON, MessagePack or Arrow IPC, gzip/brotli-compressed, as the client asked (eventlog.wire)."""
+    body, headers = wire.render(payload, request.headers.get("Accept"), request.headers.get("Accept-Encoding"))
+    return Response(body, status=status, headers=headers)
+
 # === Blockchain Logs Endpoint ===
 @app.route("/api/logs", methods=["GET"])
 def get_logs():
-    """Fetch recent transactions from Algorand TestNet using Indexer"""
+    """Recent transactions of the monitored wallet (?limit=, default 10): from the local mirror
+    once it has synced the wallet, else from a shared feed refreshed by small min-round deltas"""
     try:
-        # Your monitored wallet address
-        address = os.getenv("AFREECHAIN_WALLET", "SONYLXSLS4W6DW4YGILBQBLIFH74CJAXMFX5CZVXCQG06LQK7GCRWJAY")
+        address = WALLET
 
         # Fetch recent transactions
-        response = indexer_client.search_transactions_by_address(address, limit=10)
-        txns = response.get("transactions", [])
+        limit = request.args.get("limit", default=10, type=int)
+        if mirror is not None and mirror.checkpoint(address) is not None:
+            txns = mirror.transactions(address, limit=limit)
+        else:
+            txns = get_feed(indexer_client, address).recent(limit)
         logs = []
 
         for tx in txns:
@@ -55,10 +71,10 @@ def get_logs():
                 }
             })
 
-        return jsonify({"events": logs}), 200
+        return negotiated({"events": logs})
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return negotiated({"error": str(e)}, 500)
 
 # === Reset Logs Placeholder (optional) ===
 @app.route("/api/reset", methods=["POST"])
@@ -1,10 +1,9 @@
 from algosdk import account, transaction, mnemonic
-from algosdk.v2client import algod
 import json, time
 
-ALGOD_URL = "https://testnet-api.algonode.cloud"
-ALGOD_TOKEN = ""
-ALGOD_CLIENT = algod.AlgodClient(ALGOD_TOKEN, ALGOD_URL)
+from blockchain.clients import get_algod
+
+ALGOD_CLIENT = get_algod()
 
 # === Your wallet mnemonic (testnet) ===
 ALGO_MNEMONIC = "keen daughter jelly actress heart over child tongue mystery bag inflict setup convince path space naive forward economy desk lottery master engine marble above practice"
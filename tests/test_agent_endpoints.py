@@ -29,9 +29,17 @@ def test_finance_advice_blocked(client):
     assert data["blocked"] is True
     assert "reason" in data
 
+async def _holds(address, asa_id=None):
+    return True
+
+
+async def _not_holds(address, asa_id=None):
+    return False
+
+
 def test_web3_vote_requires_nft_denied(client, monkeypatch):
     # Pretend wallet does NOT hold the NFT
-    monkeypatch.setattr(nft_access, "holds_asa", lambda address, asa_id=None: False)
+    monkeypatch.setattr(nft_access, "aholds_asa", _not_holds)
 
     payload = {
         "domain": "web3",
@@ -51,7 +59,7 @@ def test_web3_vote_requires_nft_denied(client, monkeypatch):
 
 def test_web3_vote_allowed_with_nft(client, monkeypatch):
     # Pretend wallet DOES hold the NFT
-    monkeypatch.setattr(nft_access, "holds_asa", lambda address, asa_id=None: True)
+    monkeypatch.setattr(nft_access, "aholds_asa", _holds)
 
     payload = {
         "domain": "web3",
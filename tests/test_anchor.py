@@ -0,0 +1,163 @@
+# tests/test_anchor.py
+import base64
+import os
+
+from algosdk import account, transaction
+
+from algosdk.v2client import algod, indexer
+
+from blockchain.anchor import (NOTE_LIMIT, AnchorPipeline, AnchorStore, anchor_groups, anchor_notes,
+                               leaf_hash, merkle_tree, parse_note, verify_proof)
+from scripts.stub_algod import StubNode
+
+
+class FakeAlgod:
+    """Accepts every group and confirms it in the next round."""
+
+    def __init__(self):
+        self.sent = []  # list of groups (lists of SignedTransaction)
+        self.fail = False
+
+    def suggested_params(self):
+        return transaction.SuggestedParams(fee=1000, first=100, last=1100, flat_fee=True,
+                                           gh=base64.b64encode(b"\x01" * 32).decode(), gen="test-v1")
+
+    def send_transactions(self, signed):
+        if self.fail:
+            raise ConnectionError("algod down")
+        self.sent.append(list(signed))
+        return signed[0].get_txid()
+
+    def status(self):
+        return {"last-round": 100}
+
+    def pending_transaction_info(self, txid):
+        return {"confirmed-round": 0}
+
+
+def _events(n):
+    return [{"ts": i, "domain": "web3", "action": "propose_vote", "blocked": i % 3 == 0} for i in range(n)]
+
+
+def test_every_leaf_has_a_valid_proof():
+    for n in (1, 2, 3, 5, 8, 13):
+        events = _events(n)
+        root, proofs = merkle_tree([leaf_hash(e) for e in events])
+        for evt, proof in zip(events, proofs):
+            assert verify_proof(evt, proof, root.hex())
+            assert not verify_proof({**evt, "blocked": not evt["blocked"]}, proof, root.hex())
+        if n > 1:
+            assert not verify_proof(events[0], proofs[1], root.hex())
+
+
+def test_notes_stay_under_limit_and_group():
+    batches = [{"id": f"{i:016x}", "root": "ab" * 32, "n": 256} for i in range(300)]
+    notes = anchor_notes(batches)
+    assert all(len(n) <= NOTE_LIMIT for n in notes) and len(notes) > 16
+    assert [b for n in notes for b in parse_note(n)] == batches
+
+    sender = account.generate_account()[1]
+    groups = anchor_groups(notes, sender, FakeAlgod().suggested_params())
+    assert [len(g) for g in groups] == [16] * (len(notes) // 16) + ([len(notes) % 16] if len(notes) % 16 else [])
+    assert len({t.group for t in groups[0]}) == 1 and groups[0][0].group is not None
+
+
+def test_pipeline_batches_and_retries(tmp_path):
+    algod = FakeAlgod()
+    sk = account.generate_account()[0]
+    pipe = AnchorPipeline(lambda: algod, sk, store=AnchorStore(str(tmp_path)), batch_size=4)
+    events = _events(6)
+    leaves = [pipe.add(e) for e in events[:3]]
+
+    algod.fail = True
+    assert pipe.flush() == []  # node down: batch kept for retry
+    algod.fail = False
+    leaves += [pipe.add(e) for e in events[3:]]
+    sent = pipe.flush()
+    assert [b["n"] for b in sent] == [3, 3]
+    assert len(algod.sent) == 1 and len(algod.sent[0]) == 1  # both roots in one note
+
+    note = algod.sent[0][0].transaction.note
+    assert [b["root"] for b in parse_note(note)] == [b["root"] for b in sent]
+    for evt, leaf in zip(events, leaves):
+        rec = pipe.store.proof(leaf)
+        assert rec["event"] == evt and verify_proof(evt, rec["proof"], rec["root"])
+    states = pipe.store.batches()
+    assert {b["status"] for b in states.values()} == {"pending"}
+    assert all(b["txids"] == [algod.sent[0][0].get_txid()] for b in states.values())
+
+
+def test_store_index_is_rebuilt_from_the_logs(tmp_path):
+    pipe = AnchorPipeline(lambda: FakeAlgod(), account.generate_account()[0],
+                          store=AnchorStore(str(tmp_path)), batch_size=4)
+    leaves = [pipe.add(e) for e in _events(5)]
+    pipe.flush()
+    before = pipe.store.batches()
+    pipe.store.flush()
+    pipe.store.close()
+    os.remove(pipe.store.index_path)
+
+    store = AnchorStore(str(tmp_path))  # no anchors.db: one pass over the logs
+    assert store.batches() == before
+    assert [store.proof(leaf)["index"] for leaf in leaves] == list(range(5))
+    assert {store.status(leaf) for leaf in leaves} == {"pending"}
+    assert store.proof("00" * 32) is None and store.status("00" * 32) is None
+
+
+def test_confirmation_tracking_against_stub_node(tmp_path):
+    with StubNode() as node:
+        sk = account.generate_account()[0]
+        pipe = AnchorPipeline(lambda: algod.AlgodClient("", node.url), sk,
+                              store=AnchorStore(str(tmp_path)), max_retries=1)
+        first = pipe.add({"n": 1})
+        assert [b["status"] for b in pipe.flush()] == ["pending"]  # returns without waiting
+        assert pipe.store.status(first) == "pending"
+        node.advance()
+        assert pipe.poll()["confirmed"] == 1 and pipe.store.status(first) == "confirmed"
+
+        # node stops including our transactions: expire, resend with fresh params, give up
+        node.confirming = False
+        second = pipe.add({"n": 2})
+        [batch] = pipe.flush()
+        node.advance(1001)
+        assert pipe.poll()["expired"] == 1 and pipe.store.status(second) == "retrying"
+        resent = pipe.flush()
+        assert resent[0]["last_valid"] == node.round + 1000 and resent[0]["attempts"] == 2
+        assert pipe.tracker.pending == 1
+        node.advance(1001)
+        pipe.poll()
+        assert pipe.store.status(second) == "failed" and pipe.tracker.pending == 0
+        assert node.requests["send"] == 3
+
+
+def test_forgotten_confirmation_is_found_on_the_indexer(tmp_path):
+    with StubNode() as node:
+        updates = []
+        pipe = AnchorPipeline(lambda: algod.AlgodClient("", node.url), account.generate_account()[0],
+                              store=AnchorStore(str(tmp_path)),
+                              indexer_factory=lambda: indexer.IndexerClient("", node.url),
+                              on_update=lambda b: updates.append((b["status"], b["txids"][0])))
+        leaf = pipe.add({"n": 1})
+        [batch] = pipe.flush()
+        node.advance()
+        node.txns.clear()  # algod no longer remembers it: pending-info answers 404
+        node.advance(1001)
+        assert pipe.poll()["confirmed"] == 1 and pipe.store.status(leaf) == "confirmed"
+        assert updates == [("pending", batch["txids"][0]), ("confirmed", batch["txids"][0])]
+
+
+def test_unsettled_batches_are_resumed(tmp_path):
+    fake = FakeAlgod()
+    sk = account.generate_account()[0]
+    pipe = AnchorPipeline(lambda: fake, sk, store=AnchorStore(str(tmp_path)))
+    pipe.add({"n": 1})
+    [sent] = pipe.flush()
+    fake.fail = True
+    pipe.add({"n": 2})
+    assert pipe.flush() == []
+
+    fake.fail = False
+    restarted = AnchorPipeline(lambda: fake, sk, store=AnchorStore(str(tmp_path)))
+    assert restarted.resume() == 2 and restarted.tracker.pending == 1
+    [resent] = restarted.flush()
+    assert resent["n"] == 1 and resent["id"] != sent["id"] and restarted.tracker.pending == 2
@@ -0,0 +1,79 @@
+# tests/test_async_membership.py
+import asyncio
+import time
+
+import pytest
+from algosdk import account
+
+import blockchain.nft_access as nft_access
+from blockchain.aio import AsyncNodeClient
+from blockchain.membership import MembershipCache, make_backend
+from eventlog.sink import EventSink
+from scripts.stub_algod import StubNode, synthetic_account
+
+HOLDER = "SONYLXSLS4WV6DW4YGILBQBLIFH74CJAXMFXK5CZVXCQGO6LQK7GCRWJAY"
+ASA = 745467084
+
+
+@pytest.mark.parametrize("name", ["algod", "indexer", "account_info"])
+def test_async_backends_match_sync_semantics(name):
+    async def run(url):
+        backend = make_backend(name, AsyncNodeClient("", url), AsyncNodeClient("", url, indexer=True))
+        return [await backend.aholds(HOLDER, ASA), await backend.aholds(HOLDER, 1),
+                await backend.aholds("UNKNOWN" + HOLDER[7:], ASA)]
+
+    with StubNode({HOLDER: synthetic_account(50, ASA)}) as node:
+        assert asyncio.run(run(node.url)) == [True, False, False]
+
+
+def test_concurrent_lookups_overlap(monkeypatch):
+    """200 distinct wallets against a 50 ms node finish in far less than 200 x 50 ms."""
+    wallets = [account.generate_account()[1] for _ in range(200)]
+    with StubNode({w: {ASA: 1} for w in wallets[::2]}, delay=0.05) as node:
+        monkeypatch.setattr(nft_access, "aclient", AsyncNodeClient("", node.url))
+        monkeypatch.setattr(nft_access, "membership_cache", MembershipCache())
+        monkeypatch.setattr(nft_access, "membership_backend", "algod")
+
+        async def run():
+            return await asyncio.gather(*(nft_access.aholds_asa(w, ASA) for w in wallets))
+
+        t0 = time.perf_counter()
+        held = asyncio.run(run())
+        elapsed = time.perf_counter() - t0
+    assert held == [i % 2 == 0 for i in range(200)]
+    assert node.requests["account_asset"] == 200
+    assert elapsed < 5  # serial: 10 s
+
+
+def test_aemit_falls_back_to_thread_when_full(tmp_path):
+    sink = EventSink(tmp_path / "events.jsonl", max_queue=1, flush_interval=0.01)
+
+    async def run():
+        for i in range(20):
+            await sink.aemit({"i": i})
+
+    asyncio.run(run())
+    sink.close()
+    lines = (tmp_path / "events.jsonl").read_text().splitlines()
+    assert len(lines) == 20
+
+
+def test_pools_are_closed_with_their_loop():
+    with StubNode({HOLDER: synthetic_account(3, ASA)}) as node:
+        client = AsyncNodeClient("", node.url, max_connections=16)
+
+        async def lookup():
+            amount = (await client.account_asset_info(HOLDER, ASA))["asset-holding"]["amount"]
+            return amount, client._loops[asyncio.get_running_loop()][0]
+
+        amount, first = asyncio.run(lookup())  # e.g. one TestClient's loop
+        assert amount == 1 and len(first) == 2
+        assert all(pool.is_closed for pool in first) and not client._loops
+
+        async def lookup_and_close():
+            _, pools = await lookup()
+            await client.aclose()  # what the agent's lifespan does
+            return pools
+
+        second = asyncio.run(lookup_and_close())
+        assert second is not first and all(pool.is_closed for pool in second)
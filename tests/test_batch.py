@@ -0,0 +1,73 @@
+# tests/test_batch.py
+import json
+import random
+
+import blockchain.nft_access as nft_access
+import agent.agent as agent_mod
+import guardrails.engine as engine_mod
+from guardrails.engine import GuardrailEngine
+from guardrails.matcher import KeywordMatcher
+from guardrails.rules import RuleSet
+from eventlog.sink import flush_all
+
+WALLET = "SONYLXSLS4WV6DW4YGILBQBLIFH74CJAXMFXK5CZVXCQGO6LQK7GCRWJAY"
+
+
+def test_find_concat_matches_full_scan():
+    rng = random.Random(3)
+    patterns = ["ab c", "c d", "b", "xyz", "a"]
+    for threshold in (0, 10**6):
+        m = KeywordMatcher({"g": patterns}, threshold=threshold)
+        for _ in range(300):
+            head = "".join(rng.choice("abcdxyz ") for _ in range(rng.randint(0, 8)))
+            tail = "".join(rng.choice("abcdxyz ") for _ in range(rng.randint(0, 8)))
+            assert m.find_concat(head.lower(), m.find(head, "g"), tail, "g") == m.find(head + tail, "g")
+
+
+def test_check_batch_matches_single_checks(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_mod, "LOG_PATH", str(tmp_path / "events.jsonl"))
+    cfg = {"global": {"blocked_keywords": ["bomb", "hack system", "system drain"]},
+           "domains": {"web3": {"safe_actions": ["propose_vote", "read"], "blocked_actions": ["drain"]}}}
+    engine = GuardrailEngine(RuleSet(cfg))
+    shared = {"proposal": "Fund X"}
+    reqs = [
+        {"domain": "web3", "user_input": "please hack", "action": "system", "params": {}},
+        {"domain": "web3", "user_input": "vote", "action": "propose_vote", "params": shared},
+        {"domain": "web3", "user_input": "vote", "action": "read", "params": {"q": "a bomb"}},
+        {"domain": "web3", "user_input": "vote", "action": "drain", "params": shared},
+        {"domain": "finance", "user_input": "the system", "action": "drain", "params": {}},
+    ]
+    single = [engine.check(**r) for r in reqs]
+    assert engine.check_batch(reqs) == single
+    assert single[0] == {"allow": False, "reason": "web3_action_not_permitted"}
+    assert single[4] == {"allow": False, "reason": "blocked_keywords:['system drain']"}
+
+    flush_all()
+    lines = (tmp_path / "events.jsonl").read_text().splitlines()
+    assert [json.loads(l)["decision"] for l in lines] == single + single
+
+
+def test_query_batch_endpoint(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    calls = []
+
+    async def fake_holds(address, asa_id=None):
+        calls.append(address)
+        return True
+
+    monkeypatch.setattr(nft_access, "aholds_asa", fake_holds)
+    vote = {"domain": "web3", "action": "propose_vote", "params": {"wallet_address": WALLET}}
+    items = [
+        {"domain": "finance", "action": "give_advice", "params": {"query": "coin"}},
+        vote, vote,
+        {"domain": "web3", "action": "propose_vote", "params": {"wallet_address": "nope"}},
+        {"domain": "education", "action": "tutor_answer", "params": {}},
+    ]
+    r = client.post("/query/batch", json=items)
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert results == [client.post("/query", json=i).json() for i in items]
+    # one membership lookup for the batch, two for the single calls
+    assert calls == [WALLET] * 3
+    flush_all()
+    assert len((tmp_path / "events.jsonl").read_text().splitlines()) == 2 * len(items)
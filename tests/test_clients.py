@@ -0,0 +1,59 @@
+# tests/test_clients.py
+import pytest
+from algosdk.error import AlgodHTTPError, IndexerHTTPError
+
+from blockchain import clients
+from blockchain.clients import PooledAlgodClient, PooledIndexerClient
+from scripts.stub_algod import StubNode, synthetic_account
+
+HOLDER = "SONYLXSLS4WV6DW4YGILBQBLIFH74CJAXMFXK5CZVXCQGO6LQK7GCRWJAY"
+ASA = 745467084
+
+
+def test_pooled_clients_match_algosdk_responses_and_errors():
+    with StubNode({HOLDER: synthetic_account(3, ASA)}) as node:
+        a, i = PooledAlgodClient("", node.url), PooledIndexerClient("", node.url)
+        assert a.status() == {"last-round": node.round}
+        assert a.account_asset_info(HOLDER, ASA)["asset-holding"]["amount"] == 1
+        with pytest.raises(AlgodHTTPError) as e:
+            a.account_asset_info(HOLDER, 1)
+        assert e.value.code == 404
+        assert list(i.lookup_account_assets(HOLDER, asset_id=ASA)) == ["assets", "current-round"]
+        with pytest.raises(IndexerHTTPError, match="no accounts found"):
+            i.lookup_account_assets("UNKNOWN" + HOLDER[7:])
+
+
+def test_suggested_params_cached_for_n_rounds():
+    now = [0.0]
+    with StubNode() as node:
+        a = PooledAlgodClient("", node.url, params_rounds=10, round_sec=3, clock=lambda: now[0])
+        first = a.suggested_params()
+        first.fee = 5000  # caller tweaks its copy
+        node.advance(5)
+        now[0] = 29
+        again = a.suggested_params()
+        assert again.first == first.first and again.fee == 0
+        now[0] = 30
+        assert a.suggested_params().first == node.round
+        a.invalidate_params()
+        a.suggested_params()
+        assert node.requests["params"] == 3
+
+
+def test_registry_shares_clients():
+    clients.reset()
+    assert clients.get_algod() is clients.get_algod()
+    assert clients.get_indexer() is clients.get_indexer()
+    assert clients.get_async_algod() is clients.get_async_algod()
+
+
+def test_async_clients_send_the_api_key_header(monkeypatch):
+    monkeypatch.setattr(clients, "API_KEY", "k")
+    clients.reset()
+    try:
+        # the same extra headers as the sync clients, next to the token header
+        assert clients.get_algod().headers == {"X-API-Key": "k"}
+        assert clients.get_async_algod().headers == {"X-Algo-API-Token": "k", "X-API-Key": "k"}
+        assert clients.get_async_indexer().headers == {"X-Indexer-API-Token": "k", "X-API-Key": "k"}
+    finally:
+        clients.reset()
@@ -0,0 +1,68 @@
+# tests/test_columnar.py
+import json
+
+import pytest
+
+from eventlog import columnar
+from eventlog.sink import EventSink
+
+
+def _write_log(path):
+    sink = EventSink(path, rotate_bytes=400, rotate_age=0, index=False)
+    for i in range(12):
+        sink.emit({"ts": 1735689600.0 + i * 43200,  # two events a day from 2025-01-01
+                   "domain": "finance" if i % 3 else "edu/k12",
+                   "action": "transfer", "blocked": i % 2 == 0, "reason": None,
+                   "params": {"amount": i, "to": {"addr": "X"}}})
+        sink.flush()
+    sink.close()
+
+
+def test_compact_partitions_and_reads_back(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "events.jsonl"
+    _write_log(path)
+    segs = columnar.segments.load_manifest(path)["segments"]
+    assert segs
+
+    stats = columnar.compact(path)
+    assert stats["segments"] == len(segs)
+    assert columnar.compact(path) == {"segments": 0, "files": 0}  # idempotent
+    assert (tmp_path / "events.parquet" / "date=2025-01-01" / "domain=finance").is_dir()
+    assert (tmp_path / "events.parquet" / "date=2025-01-01" / "domain=edu%2Fk12").is_dir()
+
+    table = columnar.load(path)
+    compacted_count = sum(s["count"] for s in segs)
+    assert table.num_rows == compacted_count
+    assert table.column("seq").to_pylist() == list(range(1, compacted_count + 1))
+    assert json.loads(table.column("params")[1].as_py()) == {"amount": 1, "to": {"addr": "X"}}
+
+    edu = columnar.load(path, domain="edu/k12", columns=["seq", "blocked"])
+    assert edu.column("seq").to_pylist() == [s for s in range(1, compacted_count + 1) if (s - 1) % 3 == 0]
+
+    day = columnar.load_frame(path, since=1735776000.0, until=1735862399.0)  # 2025-01-02
+    assert list(day["seq"]) == [3, 4]
+    assert set(day["date"]) == {"2025-01-02"}
+
+
+def test_partition_keys_without_pyarrow():
+    key, row = columnar.to_row({"ts": "2025-03-04T05:06:07Z", "action": "x",
+                                "decision": {"allow": False, "reason": "r"}})
+    assert key == ("2025-03-04", columnar.NULL_PARTITION)
+    assert row["blocked"] is True and row["reason"] == "r" and row["params"] is None
+
+
+def test_dashboard_history_reads_the_compacted_copy(tmp_path):
+    pytest.importorskip("pyarrow")
+    from dashboard.feed import COLUMNS, daily_counts, history_frame
+
+    path = tmp_path / "events.jsonl"
+    assert history_frame(path).empty  # nothing compacted yet
+    _write_log(path)
+    columnar.compact(path)
+    frame = history_frame(path, since=1735689600.0, until=1735862399.0)  # 2025-01-01 .. 01-02
+    assert list(frame.columns) == COLUMNS and len(frame) == 4
+    assert list(frame["blocked"]) == [True, False, True, False] and set(frame["txid"]) == {"N/A"}
+    assert daily_counts(frame).to_dict("index") == {"2025-01-01": {"Allowed": 1, "Blocked": 1},
+                                                    "2025-01-02": {"Allowed": 1, "Blocked": 1}}
+    assert len(history_frame(path, limit=3)) == 3
@@ -0,0 +1,139 @@
+# tests/test_dashboard_feed.py
+import time
+
+import pandas as pd
+import requests
+
+import agent.agent as agent_mod
+from dashboard.feed import EventFeed, SharedFeed, summarize_frame
+from eventlog.sink import flush_all
+
+
+def _log(*blocked):
+    agent_mod.log_events([agent_mod._event(domain="d", action="a", blocked=b, reason=None, params=None)
+                          for b in blocked])
+    flush_all()
+
+
+def test_feed_follows_cursor(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    _log(True, False, False)
+    feed = EventFeed("http://testserver", max_events=4, session=client)
+
+    assert feed.poll() == 3 and feed.status == ("ok", None)
+    assert (feed.allowed, feed.blocked, feed.version) == (2, 1, 1)
+    assert feed.poll() == 0 and feed.version == 1  # idle: nothing to rebuild
+
+    _log(True, True)
+    assert feed.poll() == 2
+    # window of 4: the oldest (blocked) row left, counts follow
+    assert (feed.total, feed.allowed, feed.blocked, feed.version) == (4, 2, 2, 2)
+
+
+class _Snapshot:
+    """A backend without cursors (server.py), then one that is down."""
+
+    def __init__(self):
+        self.events = [{"txid": "A", "blocked": False}]
+        self.body = None  # sent as is instead of {"events": ...} when set
+        self.down = False
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        if self.down:
+            raise requests.ConnectionError("refused")
+        resp = requests.Response()
+        resp.status_code = 200
+        body = {"events": self.events} if self.body is None else self.body
+        resp._content = requests.compat.json.dumps(body).encode()
+        return resp
+
+
+def test_feed_snapshot_backend_and_health():
+    session = _Snapshot()
+    feed = EventFeed("http://x", session=session)
+    assert feed.poll() == 1 and not feed.incremental
+    assert feed.poll() == 0 and feed.version == 1
+    session.events = [{"txid": "B", "blocked": True}, {"txid": "A", "blocked": False}]
+    assert feed.poll() == 2 and (feed.total, feed.blocked) == (2, 1)
+
+    session.down = True
+    assert feed.poll() == 0 and feed.status[0] == "down"
+    assert feed.total == 2  # last rows kept while the backend is away
+
+    session.down = False
+    for body in (["not", "a", "dict"], {"events": {"txid": "C"}}, {"events": ["C"]}):
+        session.body = body
+        assert feed.poll() == 0 and feed.status[0] == "error"
+    assert feed.total == 2
+
+
+class _Counting:
+    def __init__(self, session):
+        self.session, self.gets = session, 0
+
+    def get(self, *args, **kwargs):
+        self.gets += 1
+        return self.session.get(*args, **kwargs)
+
+
+def test_shared_feed_polls_once_for_all_sessions(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    _log(False, True)
+    session = _Counting(client)
+    shared = SharedFeed(EventFeed("http://testserver", session=session))
+    assert shared.view().total == 0 and shared.view().status[0] == "down"
+
+    first = shared.refresh()
+    views = [shared.view() for _ in range(10)]  # ten tabs
+    assert session.gets == 2 and all(v is first for v in views)  # events, then /api/stats
+    assert (first.total, first.allowed, first.blocked) == (2, 1, 1)
+
+    idle = shared.refresh()
+    assert idle.version == first.version and idle.frame is first.frame  # nothing copied
+    assert session.gets == 3  # stats are only asked for again when rows changed
+    _log(True)
+    assert shared.refresh().blocked == 2 and session.gets == 5
+
+
+def test_tiles_count_all_time_not_the_window(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    _log(False, True, True)
+    view = SharedFeed(EventFeed("http://testserver", max_events=2, session=client)).refresh()
+    assert (view.total, view.allowed, view.blocked) == (2, 0, 2)  # the window
+    assert view.counts() == (3, 1, 2, (("d", 1, 2),))  # /api/stats
+
+    # no /api/stats (server.py): the window's own counts
+    snapshot = SharedFeed(EventFeed("http://x", session=_Snapshot())).refresh()
+    assert snapshot.stats is None and snapshot.counts() == (1, 1, 0, (("last events", 1, 0),))
+
+
+def test_shared_feed_thread_survives_a_failing_refresh():
+    feed = EventFeed("http://x", session=_Snapshot())
+    feed.poll = lambda: 1 / 0
+    shared = SharedFeed(feed, interval=0.01).start()
+    try:
+        deadline = time.time() + 5
+        while shared.view().status[0] != "error" and time.time() < deadline:
+            time.sleep(0.01)
+        assert shared.view().status == ("error", "ZeroDivisionError: division by zero")
+        assert shared._thread.is_alive()
+    finally:
+        shared.stop()
+
+
+def test_summarize_frame_normalizes_both_schemas():
+    frame = summarize_frame([
+        {"timestamp": "2025-01-01T00:00:01.5Z", "type": "mint", "decision": {"allow": False}, "reason": "policy"},
+        {"ts": 1735689602, "action": "transfer", "blocked": False, "txid": "T1", "params": {"amount": 1}},
+        {"ts": "2025-01-01T01:00:03+01:00", "action": "transfer", "blocked": True},
+        {"ts": "garbage"},
+    ])
+    assert list(frame["blocked"]) == [True, False, True, False]
+    assert list(frame["action"]) == ["mint", "transfer", "transfer", "unknown"]
+    assert frame["action"].dtype == "category" and frame["reason"].dtype == "category"
+    assert list(frame["ts"][:3]) == [pd.Timestamp("2025-01-01 00:00:01.5", tz="UTC"),
+                                     pd.Timestamp("2025-01-01 00:00:02", tz="UTC"),
+                                     pd.Timestamp("2025-01-01 00:00:03", tz="UTC")]
+    assert frame["ts"].isna().iat[3]
+    assert list(frame["txid"]) == ["N/A", "T1", "N/A", "N/A"]
+    assert list(frame["params"]) == [{}, {"amount": 1}, {}, {}]
@@ -0,0 +1,73 @@
+# tests/test_event_sink.py
+import json
+import threading
+
+import pytest
+
+from eventlog.sink import EventSink, close_all, get_sink
+
+
+def read(path):
+    return [json.loads(l) for l in path.read_text().splitlines()]
+
+
+def test_concurrent_emits_are_whole_lines(tmp_path):
+    sink = EventSink(tmp_path / "events.jsonl", flush_interval=0.01, flush_size=64)
+
+    def worker(n):
+        for i in range(200):
+            sink.emit({"worker": n, "i": i, "pad": "x" * 500})
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    sink.close()
+
+    events = read(tmp_path / "events.jsonl")
+    assert len(events) == 1600
+    for n in range(8):
+        assert [e["i"] for e in events if e["worker"] == n] == list(range(200))
+    assert sink.stats()["written"] == 1600
+
+
+@pytest.mark.parametrize("on_full", ["drop", "spill"])
+def test_full_queue_policies(tmp_path, on_full):
+    sink = EventSink(tmp_path / "events.jsonl", max_queue=2, flush_size=1, on_full=on_full)
+    spill = threading.Thread(target=sink.emit, args=({"i": 3},))
+    with sink._file_lock:  # stall the writer mid-commit
+        sink.emit({"i": 0})
+        while sink._queue.qsize():
+            pass
+        sink.emit({"i": 1})
+        sink.emit({"i": 2})
+        if on_full == "drop":
+            assert sink.emit({"i": 3}) is False
+        else:
+            spill.start()  # appends on its own thread once the lock is free
+    if on_full == "spill":
+        spill.join()
+    sink.close()
+
+    got = sorted(e["i"] for e in read(tmp_path / "events.jsonl"))
+    if on_full == "drop":
+        assert got == [0, 1, 2] and sink.dropped == 1
+    else:
+        assert got == [0, 1, 2, 3] and sink.spilled == 1
+
+
+def test_registry_flush_and_close(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = get_sink(path, flush_interval=10)
+    assert get_sink(str(path)) is sink
+    sink.emit_many([{"i": 0}, {"i": 1}])
+    assert sink.flush(timeout=5)
+    assert [e["i"] for e in read(path)] == [0, 1]
+
+    sink.emit({"i": 2})
+    close_all()
+    assert [e["i"] for e in read(path)] == [0, 1, 2]
+    with pytest.raises(RuntimeError):
+        sink.emit({"i": 3})
+    assert get_sink(path) is not sink
@@ -0,0 +1,127 @@
+# tests/test_event_store.py
+import os
+import threading
+
+import agent.agent as agent_mod
+import eventlog.store as store_mod
+from eventlog.sink import EventSink, flush_all
+from eventlog.store import EventStore, store_path
+
+
+def _events():
+    return [
+        {"ts": "2025-01-01T00:00:00Z", "domain": "finance", "action": "transfer", "blocked": True,
+         "reason": "limit"},
+        {"ts": 1735689660.0, "domain": "finance", "action": "transfer",
+         "decision": {"allow": True}},  # engine shape
+        {"ts": "2025-01-01T00:02:00Z", "domain": "education", "action": "tutor_answer", "blocked": False},
+        {"ts": 1735689780.0, "domain": "finance", "action": "swap",
+         "decision": {"allow": False, "reason": "limit"}},
+    ]
+
+
+def test_sink_indexes_what_it_writes(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path)
+    sink.emit_many(_events())
+    sink.close()
+
+    store = EventStore(store_path(path))
+    assert store.count() == 4 and store.last_seq() == 4
+    assert [e["seq"] for e in store.query(domain="finance")] == [1, 2, 4]
+    assert [e["seq"] for e in store.query(blocked=True)] == [1, 4]
+    assert [e["seq"] for e in store.query(reason="limit", domain="finance", limit=1)] == [4]
+    assert [e["seq"] for e in store.query(start=1735689660.0, end=1735689720.0)] == [2, 3]
+
+
+def test_store_catches_up_with_its_log(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path, index=False)
+    sink.emit_many(_events())
+    sink.close()
+    assert not os.path.exists(store_path(path))
+
+    sink = EventSink(path)  # new store: filled from the log, in the background
+    assert sink.caught_up(timeout=5) and sink.store.count() == 4
+    sink.emit({"domain": "finance"})
+    sink.close()
+    assert EventStore(store_path(path)).last_seq() == 5
+
+
+def test_events_endpoint(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    agent_mod.log_events(_events())
+    flush_all()
+
+    got = client.get("/api/events", params={"domain": "finance", "blocked": "true"}).json()
+    assert got["ok"] and [e["seq"] for e in got["events"]] == [1, 4]
+    got = client.get("/api/events", params={"from": "2025-01-01T00:01:00Z", "to": 1735689720}).json()
+    assert [e["seq"] for e in got["events"]] == [2, 3]
+    assert client.get("/api/events", params={"from": "yesterday"}).json()["ok"] is False
+
+
+def test_counters_and_rollups_persist(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_mod, "ROLLUP_MINUTE_DAYS", 10000)  # keep the 2025 minute buckets
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path)
+    sink.emit_many(_events())
+    sink.close()
+
+    store = EventStore(store_path(path))
+    totals = store.totals()
+    assert (totals["total"], totals["blocked"], totals["allowed"]) == (4, 2, 2)
+    assert store.totals(domain="finance")["total"] == 3
+    assert {"domain": "finance", "action": "swap", "blocked": True, "reason": "limit", "n": 1} in totals["keys"]
+    minutes = store.series("minute", start=1735689600.0)
+    assert [(b["bucket"] - 1735689600, b["total"], b["blocked"]) for b in minutes] == \
+        [(0, 1, 1), (60, 1, 0), (120, 1, 0), (180, 1, 1)]
+    assert store.series("hour", start=1735689600.0) == [{"bucket": 1735689600, "total": 4,
+                                                          "blocked": 2, "allowed": 2}]
+    # duplicates (e.g. a catch-up overlapping the sink) are not counted twice
+    assert store.add([(1, _events()[0])]) == 0 and store.totals()["total"] == 4
+
+    # counters lost (store from before they existed): rebuilt from the rows on open
+    store._db.executescript("DELETE FROM totals; DELETE FROM rollups;")
+    assert EventStore(store_path(path)).totals()["total"] == 4
+
+
+def test_stats_endpoint(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    agent_mod.log_events(_events())
+    flush_all()
+
+    got = client.get("/api/stats", params={"res": "hour", "from": "2025-01-01T00:00:00Z"}).json()
+    assert got["ok"] and (got["total"], got["blocked"], got["allowed"]) == (4, 2, 2)
+    assert [b["total"] for b in got["series"]] == [4]
+    assert client.get("/api/stats", params={"res": "week"}).status_code == 422
+
+
+def test_catch_up_resumes_from_its_checkpoint(tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path, index=False)
+    sink.emit_many({"domain": "d", "i": i} for i in range(10))
+    sink.close()
+
+    monkeypatch.setattr(store_mod, "CATCH_UP_PAGE", 3)
+    store = EventStore(store_path(path))
+    stop = threading.Event()
+    real_add = store.add
+
+    def add_then_stop(rows):
+        stop.set()  # interrupted after the first page
+        return real_add(rows)
+
+    monkeypatch.setattr(store, "add", add_then_stop)
+    assert store.catch_up(path, stop=stop) == 3 and store.caught_up() == 3
+    monkeypatch.setattr(store, "add", real_add)
+    assert store.catch_up(path) == 7 and store.caught_up() == 10
+    assert store.count() == 10
+
+
+def test_index_collisions_are_counted(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path)
+    sink.store.add([(1, {"domain": "stale"})])  # a store out of step with its log
+    sink.emit_many([{"i": 0}, {"i": 1}])
+    sink.close()
+    assert sink.index_errors == 1
@@ -0,0 +1,56 @@
+# tests/test_holder_snapshot.py
+from algosdk import account
+from algosdk.v2client import indexer
+
+import blockchain.nft_access as nft_access
+from blockchain.membership import HolderSnapshot, MembershipCache
+from scripts.stub_algod import StubNode
+
+ASA = 745467084
+HOLDERS = [account.generate_account()[1] for _ in range(25)]
+
+
+def _accounts():
+    accounts = {addr: {ASA: 1} for addr in HOLDERS}
+    accounts["Z" * 58] = {ASA: 0}  # opted in, zero balance
+    return accounts
+
+
+def test_refresh_pages_through_all_holders():
+    now = [100.0]
+    with StubNode(_accounts()) as node:
+        snap = HolderSnapshot(indexer.IndexerClient("", node.url), ASA,
+                              page_size=10, max_age=60, clock=lambda: now[0])
+        assert snap.lookup(HOLDERS[0]) is None  # not loaded yet
+        assert snap.refresh() == 1
+        assert node.requests["asset_balances"] == 3
+        assert all(snap.lookup(a) for a in HOLDERS)
+        assert snap.lookup("Z" * 58) is False
+
+        del node.accounts[HOLDERS[0]]
+        assert snap.refresh() == 2 and snap.lookup(HOLDERS[0]) is False
+        assert snap.stats()["holders"] == 24
+
+        now[0] += 61
+        assert snap.lookup(HOLDERS[1]) is None  # stale
+        node.fail_status = 500
+        try:
+            snap.refresh()
+        except Exception:
+            pass
+        assert snap.version == 2 and not snap.fresh()  # old snapshot kept
+
+
+def test_holds_asa_prefers_fresh_snapshot(monkeypatch):
+    with StubNode(_accounts()) as node:
+        snap = HolderSnapshot(indexer.IndexerClient("", node.url), ASA)
+        snap.refresh()
+        monkeypatch.setattr(nft_access, "holder_snapshot", snap)
+        monkeypatch.setattr(nft_access, "membership_cache", MembershipCache())
+        monkeypatch.setattr(nft_access, "client", None)  # any live check would fail closed
+        assert nft_access.holds_asa(HOLDERS[3], ASA) is True
+        assert nft_access.holds_asa("Z" * 58, ASA) is False
+        assert nft_access.membership_cache.stats()["misses"] == 0
+        # other ASAs are not covered by the snapshot
+        assert nft_access.holds_asa(HOLDERS[3], 1) is False
+        assert nft_access.membership_cache.stats()["misses"] == 1
@@ -0,0 +1,41 @@
+# tests/test_keyword_matcher.py
+import random
+
+from guardrails.matcher import KeywordMatcher
+from guardrails.rules import RuleSet
+
+
+def naive(patterns, text):
+    text_l = text.lower()
+    return [k for k in dict.fromkeys(patterns) if k in text_l]
+
+
+def test_automaton_matches_substring_loop():
+    rng = random.Random(7)
+    alphabet = "abc é"
+    patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(300)]
+    patterns += ["", "bomb", "hack system"]
+    m = KeywordMatcher({"g": patterns}, threshold=0)
+    assert m.use_automaton
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet + "ABC") for _ in range(rng.randint(0, 60)))
+        assert m.find(text, "g") == naive(patterns, text)
+
+
+def test_groups_found_in_one_scan():
+    m = KeywordMatcher({"global": ["bomb"], "education.blocked_terms": ["cheat on exam", "bomb"]},
+                       threshold=0)
+    found = m.scan("How to CHEAT ON EXAM with a bomb")
+    assert found == {"global": ["bomb"], "education.blocked_terms": ["cheat on exam", "bomb"]}
+    assert m.scan("hello") == {"global": [], "education.blocked_terms": []}
+
+
+def test_ruleset_decisions_unchanged():
+    rules = RuleSet.from_yaml()
+    assert rules.violates_keywords("Please HACK SYSTEM now") == ["hack system"]
+    assert rules.check("education", "tutor_answer", {}, "help me cheat on exam") == \
+        (False, "education_blocked_content")
+    assert rules.check("finance", "give_information", {"query": "ETF fees"}, "etfs") == (True, "ok")
+    assert rules.check("finance", "give_information", {"query": "which coin"}, "x") == \
+        (False, "finance_topic_not_whitelisted")
+    assert rules.check("web3", "x", {}, "a bomb") == (False, "global_blocked_keywords: ['bomb']")
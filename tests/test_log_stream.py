@@ -0,0 +1,84 @@
+# tests/test_log_stream.py
+import json
+
+import agent.agent as agent_mod
+from eventlog import segments, tail
+from eventlog.segments import read_events
+from eventlog.sink import EventSink, flush_all
+
+
+def test_log_event_sequence_numbers_resume(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path, rotate_bytes=300, rotate_age=0)
+    sink.emit_many([{"i": i} for i in range(10)])
+    sink.emit({})
+    sink.close()
+    sink = EventSink(path)
+    sink.emit({"i": 10})
+    sink.close()
+    assert [e["seq"] for e in read_events(path)] == list(range(1, 13))
+
+
+def test_stream_returns_only_new_events(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    start = client.get("/api/logs/stream").json()
+    assert start["events"] == []
+
+    for i in range(3):
+        client.post("/query", json={"domain": "education", "action": "tutor_answer", "params": {"i": i}})
+    flush_all()
+    page = client.get("/api/logs/stream", params={"offset": start["cursor"]}).json()
+    assert [e["params"]["i"] for e in page["events"]] == [0, 1, 2]
+    assert [e["seq"] for e in page["events"]] == [1, 2, 3]
+
+    again = client.get("/api/logs/stream", params={"offset": page["cursor"]}).json()
+    assert again["events"] == [] and again["cursor"] == page["cursor"]
+    by_seq = client.get("/api/logs/stream", params={"seq": 1}).json()
+    assert [e["seq"] for e in by_seq["events"]] == [2, 3]
+    assert by_seq["cursor"] == page["cursor"]
+
+
+def test_stream_sse(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    monkeypatch.setattr(agent_mod, "SSE_POLL_SEC", 0.05)
+    client.post("/query", json={"domain": "education", "action": "tutor_answer"})
+    flush_all()
+    with client.stream("GET", "/api/logs/stream", params={"offset": 0, "idle": 0.1},
+                       headers={"Accept": "text/event-stream"}) as r:
+        assert r.headers["content-type"].startswith("text/event-stream")
+        body = "".join(r.iter_text())
+    events = [json.loads(l[len("data: "):]) for l in body.splitlines() if l.startswith("data: ")]
+    ids = [int(l[len("id: "):]) for l in body.splitlines() if l.startswith("id: ")]
+    assert [e["seq"] for e in events] == [1]
+    assert ids == [(tmp_path / "events.jsonl").stat().st_size]
+
+
+def test_offset_after_seq_skips_segments_by_first_seq(tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path, flush_size=1, rotate_bytes=300, rotate_age=0, index=False)
+    for i in range(40):
+        sink.emit({"i": i, "pad": "x" * 40})
+        sink.flush()
+    sink.close()
+    segs = segments.load_manifest(path)["segments"]
+    assert len(segs) > 4 and all(isinstance(s["first_seq"], int) for s in segs)
+
+    opened = []
+    real_open = segments.open_segment
+    monkeypatch.setattr(segments, "open_segment", lambda p, seg: opened.append(seg["seq"]) or real_open(p, seg))
+    entries = {e[2]["seq"]: e for e in tail.read_since(path, 0, 100)}
+    opened.clear()
+    target = segs[1]["first_seq"] + 1
+    assert tail.offset_after_seq(path, target) == entries[target][1]
+    assert opened == [2]  # newer segments skipped by first_seq, older never reached
+    assert tail.offset_after_seq(path, 40) == entries[40][1]
+    assert tail.offset_after_seq(path, 0) == 0
+
+
+def test_stale_seq_in_record_is_replaced(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = EventSink(path, index=False)
+    sink.emit({"i": 0})
+    sink.emit({"seq": 1, "i": 1})  # e.g. re-emitted from the log
+    sink.close()
+    assert [(e["seq"], e["i"]) for e in read_events(path)] == [(1, 0), (2, 1)]
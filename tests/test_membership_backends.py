@@ -0,0 +1,56 @@
+# tests/test_membership_backends.py
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod, indexer
+
+import blockchain.nft_access as nft_access
+from blockchain.membership import MembershipCache, make_backend
+from scripts.stub_algod import StubNode, synthetic_account
+
+HOLDER = "SONYLXSLS4WV6DW4YGILBQBLIFH74CJAXMFXK5CZVXCQGO6LQK7GCRWJAY"
+EMPTY = "4FNWVVRNQSIBRC2H3SCIVGMHE7X5N7G4EDL2ZRKG6M3TE4SUW6KPOJLWHE"
+ASA = 745467084
+
+
+@pytest.fixture
+def node():
+    accounts = {HOLDER: synthetic_account(500, ASA), EMPTY: {ASA: 0}}
+    with StubNode(accounts) as n:
+        yield n
+
+
+@pytest.mark.parametrize("name", ["algod", "indexer", "account_info"])
+def test_backends_agree(node, name):
+    backend = make_backend(name, algod.AlgodClient("", node.url), indexer.IndexerClient("", node.url))
+    assert backend.holds(HOLDER, ASA) is True
+    assert backend.holds(HOLDER, 1) is False          # not opted in
+    assert backend.holds(EMPTY, ASA) is False         # opted in, zero balance
+    assert backend.holds("UNKNOWN" + HOLDER[7:], ASA) is False  # unknown account
+
+
+def test_single_asset_backends_skip_account_info(node):
+    for name in ("algod", "indexer"):
+        make_backend(name, algod.AlgodClient("", node.url),
+                     indexer.IndexerClient("", node.url)).holds(HOLDER, ASA)
+    assert node.requests == {"account_asset": 1, "indexer_account_assets": 1}
+
+
+def test_server_errors_raise(node):
+    node.fail_status = 500
+    backend = make_backend("algod", algod.AlgodClient("", node.url))
+    with pytest.raises(AlgodHTTPError):
+        backend.holds(HOLDER, ASA)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        make_backend("graphql")
+
+
+def test_holds_asa_uses_configured_backend(node, monkeypatch):
+    monkeypatch.setattr(nft_access, "client", algod.AlgodClient("", node.url))
+    monkeypatch.setattr(nft_access, "indexer_client", indexer.IndexerClient("", node.url))
+    monkeypatch.setattr(nft_access, "membership_cache", MembershipCache())
+    monkeypatch.setattr(nft_access, "membership_backend", "indexer")
+    assert nft_access.holds_asa(HOLDER, ASA) is True
+    assert node.requests == {"indexer_account_assets": 1}
@@ -0,0 +1,64 @@
+# tests/test_membership_cache.py
+from algosdk.error import AlgodHTTPError
+
+import blockchain.nft_access as nft_access
+from blockchain.membership import MembershipCache
+
+WALLET = "SONYLXSLS4WV6DW4YGILBQBLIFH74CJAXMFXK5CZVXCQGO6LQK7GCRWJAY"
+
+
+class FakeAlgod:
+    def __init__(self, assets):
+        self.assets = assets
+        self.calls = 0
+        self.fail = False
+
+    def account_info(self, address):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("algod down")
+        return {"assets": self.assets.get(address, [])}
+
+    def account_asset_info(self, address, asset_id):
+        for asset in self.account_info(address)["assets"]:
+            if asset["asset-id"] == asset_id:
+                return {"asset-holding": asset}
+        raise AlgodHTTPError("account asset info not found", 404)
+
+
+def test_ttl_and_lru():
+    now = [0.0]
+    cache = MembershipCache(maxsize=2, positive_ttl=60, negative_ttl=5, clock=lambda: now[0])
+    cache.put("A", 1, True)
+    cache.put("B", 1, False)
+    assert cache.get("A", 1) is True and cache.get("B", 1) is False
+    now[0] = 6  # negative answer expired, positive still fresh
+    assert cache.get("B", 1) is None and cache.get("A", 1) is True
+    cache.put("C", 1, True)
+    cache.put("D", 1, True)  # evicts A (least recently used)
+    assert cache.get("A", 1) is None
+    assert cache.stats() == {"size": 2, "hits": 3, "misses": 2, "evictions": 1}
+    assert cache.invalidate(address="C") == 1 and cache.get("C", 1) is None
+    assert cache.invalidate() == 1
+
+
+def test_holds_asa_caches_answers_but_not_errors(monkeypatch):
+    fake = FakeAlgod({WALLET: [{"asset-id": 7, "amount": 1}]})
+    monkeypatch.setattr(nft_access, "client", fake)
+    monkeypatch.setattr(nft_access, "membership_backend", "algod")
+    monkeypatch.setattr(nft_access, "membership_cache", MembershipCache())
+
+    assert nft_access.holds_asa(WALLET, 7) is True
+    assert nft_access.holds_asa(" " + WALLET + " ", 7) is True
+    assert nft_access.holds_asa(WALLET, 8) is False
+    assert fake.calls == 2
+
+    fake.fail = True
+    assert nft_access.holds_asa("OTHER", 7) is False  # fails closed
+    assert nft_access.holds_asa("OTHER", 7) is False
+    assert fake.calls == 4  # errors are retried, not cached
+
+    fake.fail = False
+    fake.assets[WALLET] = []  # NFT transferred away
+    assert nft_access.invalidate_membership(WALLET) == 2
+    assert nft_access.holds_asa(WALLET, 7) is False
@@ -0,0 +1,92 @@
+# tests/test_mirror.py
+import base64
+import json
+
+from algosdk import account
+from algosdk.v2client import algod, indexer
+
+from blockchain.anchor import AnchorPipeline, AnchorStore, anchor_notes
+from blockchain.mirror import MirrorSync, TransactionMirror, decode_note
+from scripts.stub_algod import StubNode
+
+WALLET = account.generate_account()[1]
+OTHER = account.generate_account()[1]
+
+
+def _note(raw: bytes) -> str:
+    return base64.b64encode(raw).decode()
+
+
+def _event(domain, action, blocked):
+    return _note(json.dumps({"domain": domain, "action": action, "blocked": blocked}).encode())
+
+
+def test_decode_note():
+    assert decode_note(None) == {"kind": None}
+    assert decode_note(_note(b"hello")) == {"kind": "text"}
+    assert decode_note(_event("a.io", "deploy", True)) == {"kind": "event", "domain": "a.io",
+                                                           "action": "deploy", "blocked": 1}
+    anchor = decode_note(_note(anchor_notes([{"id": "00000000000000a7", "root": "ab" * 32, "n": 3}])[0]))
+    assert anchor == {"kind": "anchor", "refs": [{"id": "00000000000000a7", "root": "ab" * 32, "n": 3}]}
+
+
+def test_sync_pages_checkpoints_and_resumes(tmp_path):
+    db = str(tmp_path / "mirror.db")
+    with StubNode({}, round=100) as node:
+        for i in range(5):
+            node.add_transaction(sender=WALLET, fee=1000 + i)
+        node.add_transaction(sender=OTHER, **{"payment-transaction": {"receiver": WALLET, "amount": 5}})
+        node.add_transaction(sender=OTHER)  # not ours
+
+        sync = MirrorSync(TransactionMirror(db), indexer.IndexerClient("", node.url), [WALLET], page_size=2)
+        assert sync.sync_once() == 6
+        assert node.requests["account_transactions"] == 4  # 3 full pages + the empty tail
+        assert sync.mirror.checkpoint(WALLET) == 100
+
+        # a restart resumes from the checkpoint round; round 100 rows are not duplicated
+        node.advance(2)
+        node.add_transaction(sender=WALLET, note=_event("x.io", "transfer", True))
+        sync = MirrorSync(TransactionMirror(db), indexer.IndexerClient("", node.url), [WALLET])
+        assert sync.sync_once() == 1
+        assert sync.mirror.checkpoint(WALLET) == 102
+        assert sync.mirror.stats()["transactions"] == 7
+
+
+def test_local_queries(tmp_path):
+    mirror = TransactionMirror(str(tmp_path / "mirror.db"))
+    note = _note(anchor_notes([{"id": "0000000000000001", "root": "00" * 32, "n": 4}])[0])
+    mirror.add([
+        {"id": "A", "confirmed-round": 10, "sender": WALLET, "note": _event("a.io", "deploy", True)},
+        {"id": "B", "confirmed-round": 11, "sender": OTHER,
+         "payment-transaction": {"receiver": WALLET, "amount": 1}, "note": _event("b.io", "deploy", False)},
+        {"id": "C", "confirmed-round": 12, "sender": WALLET, "note": note},
+        {"id": "D", "confirmed-round": 13, "sender": OTHER},
+    ])
+    assert mirror.add([{"id": "A", "confirmed-round": 10}]) == 0
+
+    ids = lambda txns: [t["id"] for t in txns]
+    assert ids(mirror.transactions(WALLET)) == ["C", "B", "A"]
+    assert ids(mirror.transactions(WALLET, limit=1)) == ["C"]
+    assert ids(mirror.transactions(action="deploy", blocked=True)) == ["A"]
+    assert ids(mirror.transactions(receiver=WALLET)) == ["B"]
+    assert ids(mirror.transactions(min_round=11, max_round=12)) == ["C", "B"]
+    assert mirror.anchor_txids("0000000000000001") == ["C"]
+    assert mirror.transaction("D")["sender"] == OTHER
+
+
+def test_anchor_batches_are_found_by_id(tmp_path):
+    # real batches, sent by the pipeline and mirrored back from the indexer
+    with StubNode({}, round=100) as node:
+        sk = account.generate_account()[0]
+        pipe = AnchorPipeline(lambda: algod.AlgodClient("", node.url), sk, store=AnchorStore(str(tmp_path)))
+        batches = []
+        for i in range(3):
+            pipe.add({"n": i})
+            batches += pipe.flush()
+            node.advance()
+        sync = MirrorSync(TransactionMirror(str(tmp_path / "mirror.db")),
+                          indexer.IndexerClient("", node.url), [pipe.sender])
+        assert sync.sync_once() == 3
+        for batch in batches:
+            assert sync.mirror.anchor_txids(batch["id"]) == batch["txids"]
+        assert sync.mirror.anchor_txids("0" * 16) == []
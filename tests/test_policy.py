@@ -0,0 +1,113 @@
+# tests/test_policy.py
+import dataclasses
+import json
+import os
+import time
+
+import pytest
+import yaml
+
+import guardrails.engine as engine_mod
+from eventlog.sink import flush_all
+from guardrails.engine import GuardrailEngine
+from guardrails.manager import PolicyManager, get_manager
+from guardrails.policy import compile_policy
+from guardrails.rules import RuleSet
+
+CFG = {
+    "global": {"blocked_keywords": ["bomb"]},
+    "domains": {
+        "finance": {"allow_advice": False, "allowed_info_topics": ["etf"]},
+        "web3": {"safe_actions": ["propose_vote", "read_state"],
+                 "blocked_actions": ["read_state", "drain"]},
+        "education": {"blocked_terms": ["cheat on exam"]},
+    },
+}
+
+
+def test_compiled_policy_is_frozen():
+    policy = compile_policy(CFG)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        policy.matcher = None
+    with pytest.raises(TypeError):
+        policy.rules[("web3", "x")] = ()
+    assert policy.domain("web3").safe_actions == frozenset({"propose_vote", "read_state"})
+    # builtin domains get their yaml defaults even when missing
+    assert compile_policy({}).plan("finance", "give_advice").rules[0].reason == "finance_advice_blocked"
+
+
+def test_engine_dispatch_table(monkeypatch):
+    engine = GuardrailEngine(RuleSet(CFG))
+    monkeypatch.setattr(engine, "_log_event", lambda *a: None)
+    assert engine.check("web3", "hi", "propose_vote", {}) == {"allow": True, "reason": "ok"}
+    # blocked wins over safe, unknown actions fall back to the domain default
+    for action in ("read_state", "drain", "unknown"):
+        assert engine.check("web3", "hi", action, {})["reason"] == "web3_action_not_permitted"
+    assert engine.check("finance", "hi", "give_advice", {})["reason"] == "finance_advice_disallowed"
+    assert engine.check("education", "a bomb", "tutor_answer", {})["reason"] == "blocked_keywords:['bomb']"
+
+
+def test_default_engines_share_the_process_manager():
+    engine = GuardrailEngine()
+    assert engine.policies is get_manager() is GuardrailEngine().policies
+    assert engine.policies.current.digest is not None  # policies.yaml, not a fixed RuleSet
+
+
+def test_ruleset_dispatch_table():
+    rules = RuleSet(CFG)
+    assert rules.check("finance", "give_advice", {}, "x") == (False, "finance_advice_blocked")
+    assert rules.check("finance", "give_information", {"query": "ETF"}, "x") == (True, "ok")
+    assert rules.check("web3", "execute_transaction", {}, "x") == (False, "web3_execute_blocked")
+    assert rules.check("education", "anything", {}, "Cheat on exam?") == \
+        (False, "education_blocked_content")
+    assert rules.check("other", "anything", {}, "cheat on exam") == (True, "ok")
+
+
+def _write(path, cfg, bump=0):
+    path.write_text(cfg if isinstance(cfg, str) else yaml.safe_dump(cfg))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))  # coarse-mtime filesystems
+
+
+def test_policy_reload_swaps_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_mod, "LOG_PATH", str(tmp_path / "events.jsonl"))
+    path = tmp_path / "policies.yaml"
+    _write(path, CFG)
+    manager = PolicyManager(path)
+    engine = GuardrailEngine(manager)
+    assert engine.check("web3", "hi", "drain", {})["allow"] is False
+    first = manager.current
+    assert manager.reload() is False and manager.current is first  # unchanged
+
+    _write(path, {**CFG, "domains": {"web3": {"safe_actions": ["drain"]}}}, bump=10**9)
+    assert manager.reload() is True and manager.version == 2
+    assert engine.check("web3", "hi", "drain", {})["allow"] is True
+
+    # invalid files are rejected (once) and the last good version stays in force
+    for bad in ("domains: [", "domains: {web3: {safe_actions: drain}}"):
+        _write(path, bad, bump=2 * 10**9)
+        assert manager.reload() is False and manager.reload() is False
+        assert manager.version == 2
+    assert manager.errors == 2 and "safe_actions" in manager.last_error
+
+    flush_all()
+    lines = [json.loads(l) for l in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert [e["policy_version"] for e in lines] == [1, 2]
+    assert lines[0]["policy_digest"] == first.digest != lines[1]["policy_digest"]
+
+
+@pytest.mark.parametrize("watch", ["auto", "poll"])
+def test_policy_watcher_picks_up_changes(tmp_path, watch):
+    path = tmp_path / "policies.yaml"
+    _write(path, CFG)
+    manager = PolicyManager(path, interval=0.05, watch=watch).start()
+    try:
+        tmp = tmp_path / ".policies.yaml.tmp"
+        _write(tmp, {"global": {"blocked_keywords": ["rocket"]}}, bump=10**9)
+        os.replace(tmp, path)  # how editors and deploy tools save
+        deadline = time.time() + 5
+        while manager.version == 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert manager.version == 2 and manager.current.rules.violates_keywords("a rocket") == ["rocket"]
+    finally:
+        manager.stop()
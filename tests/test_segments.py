@@ -0,0 +1,107 @@
+# tests/test_segments.py
+import gzip
+import json
+import threading
+
+from eventlog import segments
+from eventlog.sink import EventSink
+
+
+def write_events(path, n, start=1000.0, **kwargs):
+    sink = EventSink(path, flush_size=1, **kwargs)
+    for i in range(n):
+        sink.emit({"ts": start + i, "i": i, "pad": "x" * 50})
+        sink.flush()
+    sink.close()
+
+
+def test_size_rotation_and_manifest(tmp_path):
+    path = tmp_path / "events.jsonl"
+    write_events(path, 30, rotate_bytes=500, rotate_age=0)
+
+    manifest = segments.load_manifest(path)
+    segs = manifest["segments"]
+    assert len(segs) >= 5
+    assert sum(s["count"] for s in segs) + len(path.read_text().splitlines()) == 30
+    assert all(s["bytes"] <= 500 and s["file"].endswith(".jsonl.gz") for s in segs)
+    # logical offsets are contiguous and the active file starts where the last segment ends
+    for a, b in zip(segs, segs[1:]):
+        assert a["offset"] + a["bytes"] == b["offset"]
+        assert a["last_ts"] < b["first_ts"]
+    assert manifest["active_offset"] == segs[-1]["offset"] + segs[-1]["bytes"]
+    with gzip.open(tmp_path / segs[0]["file"], "rt") as f:
+        assert json.loads(f.readline())["i"] == 0
+
+    assert [e["i"] for e in segments.read_events(path)] == list(range(30))
+
+
+def test_time_bounded_read_opens_only_overlapping_segments(tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    write_events(path, 30, rotate_bytes=500, rotate_age=0)
+    opened = []
+    real_open = segments.open_segment
+    monkeypatch.setattr(segments, "open_segment",
+                        lambda p, seg: opened.append(seg["seq"]) or real_open(p, seg))
+
+    got = [e["i"] for e in segments.read_events(path, since=1010, until=1013)]
+    assert got == [10, 11, 12, 13]
+    segs = segments.load_manifest(path)["segments"]
+    expected = [s["seq"] for s in segs if s["last_ts"] >= 1010 and s["first_ts"] <= 1013]
+    assert opened == expected and len(opened) < len(segs)
+
+
+def test_age_rotation(tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    clock = [1000.0]
+    monkeypatch.setattr(segments.time, "time", lambda: clock[0])
+    writer = segments.SegmentedWriter(path, max_bytes=0, max_age=60, compression="none")
+    writer.append(json.dumps({"ts": 1000.0}) + "\n")
+    clock[0] += 30
+    writer.append(json.dumps({"ts": 1030.0}) + "\n")
+    assert segments.load_manifest(path)["segments"] == []
+    clock[0] += 31
+    writer.append(json.dumps({"ts": 1061.0}) + "\n")
+    writer.close()  # waits for the helper that collects count / time range
+    (seg,) = segments.load_manifest(path)["segments"]
+    assert (seg["count"], seg["first_ts"], seg["last_ts"]) == (2, 1000.0, 1030.0)
+    assert [e["ts"] for e in segments.read_events(path)] == [1000.0, 1030.0, 1061.0]
+
+
+def test_two_writers_share_one_log(tmp_path):
+    # e.g. the agent and blockchain/logger.py: separate sinks on one file
+    path = tmp_path / "events.jsonl"
+    a = EventSink(path, flush_size=1, rotate_bytes=600, rotate_age=0, index=False)
+    b = EventSink(path, flush_size=1, rotate_bytes=600, rotate_age=0, index=False)
+    for i in range(40):
+        (a if i % 2 else b).emit({"i": i, "pad": "x" * 40})
+        (a if i % 2 else b).flush()
+    a.close()
+    b.close()
+
+    events = list(segments.read_events(path))
+    assert [e["i"] for e in events] == list(range(40))
+    assert [e["seq"] for e in events] == list(range(1, 41))
+    segs = segments.load_manifest(path)["segments"]
+    assert len(segs) > 2 and all(s["codec"] == "gzip" and "pending" not in s for s in segs)
+    assert sum(s["count"] for s in segs) + len(path.read_text().splitlines()) == 40
+
+
+def test_rotation_does_not_compress_under_the_lock(tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    writer = segments.SegmentedWriter(path, max_bytes=100, max_age=0)
+    release = threading.Event()
+    real = segments._compressor
+    monkeypatch.setattr(segments, "_compressor", lambda t, c: release.wait(5) and real(t, c))
+    with writer.lock:
+        writer.append(json.dumps({"i": 0, "pad": "x" * 40}) + "\n")
+        writer.append(json.dumps({"i": 1, "pad": "x" * 60}) + "\n")  # rotates
+    (seg,) = segments.load_manifest(path)["segments"]
+    assert seg["pending"] == "gzip" and seg["file"].endswith(".jsonl")
+    with writer.lock:  # free while the compression is stuck
+        writer.append(json.dumps({"i": 2}) + "\n")
+    assert [e["i"] for e in segments.read_events(path)] == [0, 1, 2]
+    release.set()
+    writer.close()
+    (seg,) = segments.load_manifest(path)["segments"]
+    assert seg["codec"] == "gzip" and seg["count"] == 1 and "pending" not in seg
+    assert [e["i"] for e in segments.read_events(path)] == [0, 1, 2]
@@ -0,0 +1,87 @@
+# tests/test_singleflight.py
+import asyncio
+import threading
+import time
+
+import blockchain.nft_access as nft_access
+from blockchain.membership import AsyncSingleFlight, MembershipCache, SingleFlight
+
+WALLET = "SONYLXSLS4WV6DW4YGILBQBLIFH74CJAXMFXK5CZVXCQGO6LQK7GCRWJAY"
+
+
+def test_threads_share_one_call_and_its_error():
+    flight = SingleFlight()
+    gate = threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        gate.wait()
+        raise ConnectionError("algod down")
+
+    errors = []
+
+    def caller():
+        try:
+            flight.do("k", slow)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(10)]
+    for t in threads:
+        t.start()
+    while flight.stats()["calls"] + flight.stats()["coalesced"] < 10:
+        time.sleep(0.001)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(runs) == 1 and len(errors) == 10
+    assert flight.stats() == {"calls": 1, "coalesced": 9, "in_flight": 0}
+    assert flight.do("k", lambda: 5) == 5  # nothing remembered afterwards
+
+
+def test_async_coalescing_survives_caller_cancel():
+    flight = AsyncSingleFlight()
+    runs = []
+
+    async def lookup():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return True
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("k", lookup))
+        others = [asyncio.ensure_future(flight.do("k", lookup)) for _ in range(50)]
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.gather(*others)
+
+    assert asyncio.run(run()) == [True] * 50
+    assert runs == [1]
+    assert flight.stats() == {"calls": 1, "coalesced": 50, "in_flight": 0}
+
+
+def test_aholds_asa_coalesces(monkeypatch):
+    calls = []
+
+    async def lookup(address, asa_id):
+        calls.append(address)
+        await asyncio.sleep(0.02)
+        return True
+
+    monkeypatch.setattr(nft_access, "_alookup_and_cache", lookup)
+    monkeypatch.setattr(nft_access, "ainflight", AsyncSingleFlight())
+    monkeypatch.setattr(nft_access, "membership_cache", MembershipCache())
+
+    async def run():
+        return await asyncio.gather(*(nft_access.aholds_asa(WALLET, 7) for _ in range(100)))
+
+    assert asyncio.run(run()) == [True] * 100
+    assert calls == [WALLET]
+    assert nft_access.membership_stats()["lookups"]["coalesced"] >= 99
+
+
+def test_membership_stats_endpoint(client):
+    data = client.get("/api/membership/stats").json()
+    assert data["ok"] is True
+    assert set(data["lookups"]) == {"calls", "coalesced", "in_flight"}
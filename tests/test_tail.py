@@ -0,0 +1,65 @@
+# tests/test_tail.py
+import agent.agent as agent_mod
+from eventlog import tail
+from eventlog.sink import EventSink
+
+
+def make_log(path, n, **kwargs):
+    sink = EventSink(path, flush_size=1, **kwargs)
+    for i in range(n):
+        sink.emit({"ts": 1000.0 + i, "i": i, "pad": "y" * (i % 7) * 40})
+        sink.flush()
+    sink.close()
+
+
+def test_tail_pages_backward_and_forward_across_segments(tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    make_log(path, 120, rotate_bytes=1500, rotate_age=0)
+    monkeypatch.setattr(tail, "BLOCK", 64)  # force multi-block backward reads
+
+    newest = tail.read_before(path, limit=10)
+    assert [e["i"] for _, _, e in newest] == list(range(110, 120))
+
+    seen, before = [], None
+    while True:
+        page = tail.read_before(path, before, limit=7)
+        if not page:
+            break
+        seen = [e["i"] for _, _, e in page] + seen
+        before = page[0][0]
+    assert seen == list(range(120))
+
+    seen, since = [], 0
+    while True:
+        page = tail.read_since(path, since, limit=9)
+        if not page:
+            break
+        seen += [e["i"] for _, _, e in page]
+        since = page[-1][1]
+    assert seen == list(range(120))
+    assert since == tail.end_offset(path)
+
+
+def test_partial_last_line_and_mid_line_cursor(tmp_path):
+    path = tmp_path / "events.jsonl"
+    make_log(path, 5, rotate_bytes=0, rotate_age=0)
+    with open(path, "a") as f:
+        f.write('{"i": 99, "half')
+    assert [e["i"] for _, _, e in tail.read_before(path, limit=50)] == [0, 1, 2, 3, 4]
+    start = tail.read_before(path, limit=2)[0][0]
+    assert [e["i"] for _, _, e in tail.read_since(path, start + 3)] == [4]
+
+
+def test_api_logs_cursors(client, tmp_path, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    make_log(path, 80, rotate_bytes=2000, rotate_age=0)
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", path)
+
+    data = client.get("/api/logs").json()
+    assert data["ok"] and [e["i"] for e in data["events"]] == list(range(30, 80))
+    older = client.get("/api/logs", params={"before": data["next_before"], "limit": 5}).json()
+    assert [e["i"] for e in older["events"]] == list(range(25, 30))
+    newer = client.get("/api/logs", params={"since": older["cursor"], "limit": 3}).json()
+    assert [e["i"] for e in newer["events"]] == [30, 31, 32]
+    done = client.get("/api/logs", params={"since": data["cursor"]}).json()
+    assert done["events"] == [] and done["cursor"] == data["cursor"]
@@ -0,0 +1,79 @@
+# tests/test_txfeed.py
+import time
+
+import pytest
+from algosdk import account
+from algosdk.v2client import indexer
+
+from blockchain.txfeed import TransactionFeed
+from scripts.stub_algod import StubNode
+
+WALLET = account.generate_account()[1]
+
+
+class RecordingIndexer(indexer.IndexerClient):
+    def __init__(self, url):
+        super().__init__("", url)
+        self.calls = []
+
+    def search_transactions_by_address(self, address, **kwargs):
+        self.calls.append(kwargs)
+        return super().search_transactions_by_address(address, **kwargs)
+
+
+def _wait(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_feed_serves_cached_then_merges_deltas():
+    now = [0.0]
+    with StubNode({}, round=50) as node:
+        for i in range(3):
+            node.add_transaction(sender=WALLET, fee=1000 + i)
+        idx = RecordingIndexer(node.url)
+        feed = TransactionFeed(idx, WALLET, size=4, ttl=5, max_stale=60, clock=lambda: now[0])
+
+        assert [t["fee"] for t in feed.recent(10)] == [1002, 1001, 1000]
+        assert idx.calls == [{"limit": 4}]
+        feed.recent(2)
+        assert node.requests["account_transactions"] == 1  # fresh: memory only
+
+        node.advance(1)
+        node.add_transaction(sender=WALLET, fee=2000)
+        node.add_transaction(sender=WALLET, fee=2001)
+        now[0] += 6
+        assert len(feed.recent(10)) == 3  # stale is served at once...
+        assert _wait(lambda: feed.fetches == 2)  # ...while one delta query runs
+        assert idx.calls[-1] == {"limit": 4, "min_round": 50}
+        assert [t["fee"] for t in feed.recent(10)] == [2001, 2000, 1002, 1001]  # ring buffer of 4
+        assert feed.last_round == 51
+
+        now[0] += 6
+        feed.recent()
+        assert _wait(lambda: feed.fetches == 3)
+        assert idx.calls[-1]["min_round"] == 51
+        assert len(feed.recent(10)) == 4  # re-read round 51 is not duplicated
+
+
+def test_feed_keeps_stale_data_on_error():
+    now = [0.0]
+    with StubNode({}, round=10) as node:
+        node.add_transaction(sender=WALLET)
+        feed = TransactionFeed(indexer.IndexerClient("", node.url), WALLET, ttl=1, max_stale=5,
+                               clock=lambda: now[0])
+        assert len(feed.recent()) == 1
+        node.fail_status = 500
+        now[0] += 10
+        assert len(feed.recent()) == 1  # too stale: refetched synchronously, failure keeps data
+        assert feed.stats()["errors"] == 1 and feed.stats()["last_error"]
+
+
+def test_feed_raises_without_any_data():
+    with StubNode({}) as node:
+        node.fail_status = 500
+        feed = TransactionFeed(indexer.IndexerClient("", node.url), WALLET)
+        with pytest.raises(Exception):
+            feed.recent()
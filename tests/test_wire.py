@@ -0,0 +1,47 @@
+# tests/test_wire.py
+import gzip
+
+import pytest
+
+import agent.agent as agent_mod
+from eventlog import wire
+from eventlog.sink import flush_all
+
+
+def test_negotiate_defaults_to_json():
+    assert wire.negotiate(None, None) == (wire.JSON, None)
+    assert wire.negotiate("*/*", "identity") == (wire.JSON, None)
+    assert wire.negotiate("text/html, application/json;q=0.5", "gzip;q=0")[0] == wire.JSON
+    assert wire.negotiate(None, "gzip, deflate")[1] == "gzip"
+    assert wire.compress(b"x" * 10, "gzip") == (b"x" * 10, None)  # too small to bother
+
+
+def _log_three(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(agent_mod, "EVENTS_FILE", tmp_path / "events.jsonl")
+    for i in range(3):
+        client.post("/query", json={"domain": "finance", "action": "transfer", "params": {"i": i}})
+    flush_all()
+
+
+def test_logs_as_msgpack_gzip(client, tmp_path, monkeypatch):
+    pytest.importorskip("msgpack")
+    _log_three(client, tmp_path, monkeypatch)
+    monkeypatch.setattr(wire, "MIN_COMPRESS", 0)
+    plain = client.get("/api/logs").json()
+
+    resp = client.get("/api/logs", headers={"Accept": "application/msgpack, application/json;q=0.9",
+                                            "Accept-Encoding": "gzip"})
+    assert resp.headers["content-type"] == wire.MSGPACK and resp.headers["content-encoding"] == "gzip"
+    assert wire.decode(resp.content, resp.headers["content-type"]) == plain
+    assert len(gzip.compress(wire.encode(plain, wire.MSGPACK))) < len(wire.encode(plain))
+
+
+def test_logs_as_arrow(client, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    _log_three(client, tmp_path, monkeypatch)
+    resp = client.get("/api/logs", headers={"Accept": wire.ARROW})
+    assert resp.headers["content-type"] == wire.ARROW
+    table, meta = wire.read_arrow(resp.content)
+    assert table.column("seq").to_pylist() == [1, 2, 3]
+    assert table.column("domain").to_pylist() == ["finance"] * 3
+    assert meta["ok"] is True and "cursor" in meta and "events" not in meta